@@ -0,0 +1,268 @@
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from config import config
+
+# Shared preprocessing artifacts every bundle must contain
+REQUIRED_ARTIFACTS = ['scaler.pkl', 'label_encoders.pkl', 'feature_columns.pkl', 'best_model_info.pkl']
+
+# Optional artifacts copied when present
+OPTIONAL_ARTIFACTS = ['compiled_encoders.pkl', 'training_history.csv', 'cv_results.csv', 'tuned_params.json']
+# Per-model artifacts written by training: <model_name><suffix>. Lookup tables
+# are built from a published bundle and only live in bundles (see extend_bundle).
+MODEL_ARTIFACT_SUFFIXES = ['_model.pkl', '_model.shared', '_compiled.npz']
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+def bundles_dir(model_dir=None):
+    """Directory holding one subdirectory per published bundle"""
+    return os.path.join(model_dir or config.api.model_dir, 'bundles')
+
+def bundle_path(version, model_dir=None):
+    """Directory of a published bundle"""
+    return os.path.join(bundles_dir(model_dir), version)
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def history_model_artifacts(model_dir):
+    """Per-model artifacts of the models in the training history of the last run"""
+    path = os.path.join(model_dir, 'training_history.csv')
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', newline='') as f:
+        model_names = list(dict.fromkeys(row['model_name'] for row in csv.DictReader(f)))
+    return [f'{model_name}{suffix}' for model_name in model_names for suffix in MODEL_ARTIFACT_SUFFIXES
+            if os.path.exists(os.path.join(model_dir, f'{model_name}{suffix}'))]
+
+def collect_artifacts(model_dir, model_artifacts=None):
+    """List the artifact file names of one training run in a flat model directory.
+    
+    The flat directory also holds files of earlier runs (e.g. models that
+    failed to train this time), so per-model artifacts are only taken from
+    `model_artifacts`, the files the run wrote, or else from the models in
+    its training history.
+    """
+    missing = [name for name in REQUIRED_ARTIFACTS if not os.path.exists(os.path.join(model_dir, name))]
+    if model_artifacts is None:
+        model_artifacts = history_model_artifacts(model_dir)
+    missing += [name for name in model_artifacts if not os.path.exists(os.path.join(model_dir, name))]
+    if missing:
+        raise FileNotFoundError(f"Missing artifacts in {model_dir}: {missing}")
+    
+    names = REQUIRED_ARTIFACTS + [name for name in OPTIONAL_ARTIFACTS
+                                  if os.path.exists(os.path.join(model_dir, name))]
+    names += sorted(set(model_artifacts))
+    
+    if not any(name.endswith('_model.pkl') for name in names):
+        raise FileNotFoundError(f"No trained models found in {model_dir}")
+    return names
+
+def write_atomic(path, text):
+    """Replace a small text file so readers see either the old or new content"""
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def publish_bundle(model_dir=None, version=None, activate=True, model_artifacts=None):
+    """Snapshot the flat model directory into an immutable, versioned bundle.
+    
+    `model_artifacts` lists the per-model files written by the training
+    run being published (see collect_artifacts). Files are copied (not
+    linked) because training rewrites the flat artifacts in place.
+    """
+    model_dir = model_dir or config.api.model_dir
+    names = collect_artifacts(model_dir, model_artifacts)
+    sources = {name: os.path.join(model_dir, name) for name in names}
+    return write_bundle(sources, model_dir, version, activate)
+
+def extend_bundle(base_version, extra_files, model_dir=None, version=None, activate=True):
+    """Publish a new bundle with the files of `base_version` plus `extra_files`.
+    
+    Used for artifacts derived from a published bundle, such as lookup
+    tables, so they always ship next to the model they were built from.
+    `extra_files` are paths; each is stored under its base name.
+    """
+    model_dir = model_dir or config.api.model_dir
+    manifest = verify_bundle(base_version, model_dir)
+    base_path = bundle_path(base_version, model_dir)
+    sources = {name: os.path.join(base_path, name) for name in manifest['files']}
+    sources.update({os.path.basename(path): path for path in extra_files})
+    return write_bundle(sources, model_dir, version, activate)
+
+def write_bundle(sources, model_dir, version=None, activate=True):
+    """Copy {name: source path} into a new bundle and optionally activate it.
+    
+    The bundle is assembled in a staging directory and renamed into place,
+    and the CURRENT pointer is swapped last, so a watcher never sees a
+    partially written bundle.
+    """
+    files = {}
+    staging = os.path.join(bundles_dir(model_dir), f'.staging-{os.getpid()}-{time.time_ns()}')
+    os.makedirs(staging)
+    try:
+        for name, source in sources.items():
+            shutil.copy2(source, os.path.join(staging, name))
+            files[name] = file_digest(os.path.join(staging, name))
+        
+        # Versions sort by creation time and are unique per content
+        content_hash = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+        generated = version is None
+        version = version or f"{time.strftime('%Y%m%d-%H%M%S')}-{content_hash[:8]}"
+        
+        manifest = {
+            'version': version,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'content_hash': content_hash,
+            'files': files
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
+        target = bundle_path(version, model_dir)
+        if os.path.exists(target):
+            if not generated:
+                raise FileExistsError(f"Bundle {version} already exists")
+            # The same content was published within the same second: reuse that bundle
+            shutil.rmtree(staging)
+        else:
+            os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    
+    if activate:
+        activate_bundle(version, model_dir)
+    return version
+
+def activate_bundle(version, model_dir=None):
+    """Point CURRENT at a published bundle (also used for rollbacks)"""
+    model_dir = model_dir or config.api.model_dir
+    verify_bundle(version, model_dir, check_digests=False)
+    write_atomic(os.path.join(model_dir, CURRENT_FILE), version + '\n')
+
+def current_version(model_dir=None):
+    """Return the active bundle version, or None before the first publish"""
+    try:
+        with open(os.path.join(model_dir or config.api.model_dir, CURRENT_FILE), 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def read_manifest(version, model_dir=None):
+    """Load the manifest of a published bundle"""
+    with open(os.path.join(bundle_path(version, model_dir), MANIFEST_FILE), 'r') as f:
+        return json.load(f)
+
+def verify_bundle(version, model_dir=None, check_digests=True):
+    """Check that a bundle is complete and, optionally, that no file changed"""
+    manifest = read_manifest(version, model_dir)
+    path = bundle_path(version, model_dir)
+    
+    missing = [name for name in REQUIRED_ARTIFACTS if name not in manifest['files']]
+    if missing:
+        raise ValueError(f"Bundle {version} is missing artifacts: {missing}")
+    
+    for name, digest in manifest['files'].items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            raise ValueError(f"Bundle {version} is missing {name}")
+        if check_digests and file_digest(file_path) != digest:
+            raise ValueError(f"Bundle {version} file {name} does not match its manifest")
+    return manifest
+
+def list_bundles(model_dir=None):
+    """Return published bundle versions, oldest first"""
+    root = bundles_dir(model_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if not name.startswith('.') and os.path.exists(os.path.join(root, name, MANIFEST_FILE)))
+
+class BundleWatcher:
+    """Poll the CURRENT pointer and report new versions from a background thread"""
+    
+    def __init__(self, on_change, model_dir=None, interval=None):
+        self.on_change = on_change
+        self.model_dir = model_dir or config.api.model_dir
+        self.interval = interval if interval is not None else config.api.reload_interval
+        self.last_seen = current_version(self.model_dir)
+        self.rejected = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self.interval <= 0 or self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self.run, name='bundle-watcher', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop polling and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def poll(self):
+        """Check the pointer once, calling on_change if it moved"""
+        version = current_version(self.model_dir)
+        if version is None or version in (self.last_seen, self.rejected):
+            return
+        
+        # A bundle that fails to load is not retried until the pointer moves again
+        if self.on_change(version):
+            self.last_seen = version
+            self.rejected = None
+        else:
+            self.rejected = version
+            print(f"Rejected model bundle {version}; still serving {self.last_seen}")
+    
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error checking for new model bundle: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage versioned model artifact bundles')
+    parser.add_argument('--model-dir', default=None)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('publish', help='snapshot the current artifacts and activate them')
+    subparsers.add_parser('list', help='list published bundles')
+    activate_parser = subparsers.add_parser('activate', help='activate (or roll back to) a bundle')
+    activate_parser.add_argument('version')
+    args = parser.parse_args()
+    
+    if args.command == 'publish':
+        version = publish_bundle(args.model_dir)
+        print(f"Published and activated bundle {version}")
+    elif args.command == 'activate':
+        activate_bundle(args.version, args.model_dir)
+        print(f"Activated bundle {args.version}")
+    else:
+        active = current_version(args.model_dir)
+        for version in list_bundles(args.model_dir):
+            marker = '*' if version == active else ' '
+            print(f"{marker} {version}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+from prediction_api import REQUIRED_FIELDS, model_request_error, predictor
+from instrumentation import CONTENT_TYPE, instrumentation
+from profiling import StackSampler, profile_from_argv, profile_lock, profile_request_error
+from config import config
+
+class MicroBatcher:
+    """Group concurrent single-record predictions into vectorized batches.
+    
+    Requests are queued on the event loop. A collector takes the first
+    waiting request, then keeps adding requests until the batch is full or
+    max_wait_us has passed. The batch goes to SalaryPredictor.predict_batch
+    in one call on a worker thread, and each result is handed back to the
+    request that is waiting on it. Requests that arrive while a batch runs
+    make up the next batch.
+    """
+    
+    def __init__(self, predictor, max_batch_size=None, max_wait_us=None):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size or config.api.max_batch_size
+        self.max_wait = (max_wait_us if max_wait_us is not None else config.api.max_batch_wait_us) / 1e6
+        
+        self.queue = None
+        self.task = None
+        self.executor = None
+        
+        self.batches = 0
+        self.records = 0
+        self.largest_batch = 0
+    
+    def start(self):
+        """Start the worker thread and the collector on the running event loop"""
+        # A single worker keeps model calls serialized; sklearn parallelizes inside predict.
+        # It is created here so the batcher can be started again after stop()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='micro-batch')
+        self.queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self.run())
+    
+    async def stop(self):
+        """Cancel the collector and release the worker thread"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+    
+    async def submit(self, record, model=None, combine=None):
+        """Queue one record and wait for its prediction result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, model, combine, future))
+        return await future
+    
+    def predict_groups(self, batch):
+        """Run one predict_batch call per distinct model selection in a batch"""
+        groups = defaultdict(list)
+        for position, (_, model, combine, _) in enumerate(batch):
+            key = (tuple(model) if isinstance(model, list) else model, combine)
+            groups[key].append(position)
+        
+        results = [None] * len(batch)
+        for (model, combine), positions in groups.items():
+            model = list(model) if isinstance(model, tuple) else model
+            records = [batch[position][0] for position in positions]
+            for position, result in zip(positions, self.predictor.predict_batch(records, model, combine)):
+                if 'error' in result:
+                    # Rerun failed records on the single-record path so /predict answers
+                    # with the same error message as the Flask app
+                    result, error = self.predictor.predict_salary(batch[position][0], model, combine)
+                    result = {'error': error} if error else result
+                results[position] = result
+        return results
+    
+    async def collect(self):
+        """Wait for one request, then fill the batch until it is full or the wait expires"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued before waiting
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.collect()
+            
+            try:
+                results = await loop.run_in_executor(self.executor, self.predict_groups, batch)
+            except Exception as e:
+                results = [{'error': f"Error making prediction: {e}"}] * len(batch)
+            
+            self.batches += 1
+            self.records += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            instrumentation.record_batch('micro-batch', results)
+            
+            # Fan results back out to the waiting requests
+            for (_, _, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+    
+    def stats(self):
+        """Return batching counters for monitoring"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_us': self.max_wait * 1e6,
+            'batches': self.batches,
+            'records': self.records,
+            'mean_batch_size': self.records / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch
+        }
+
+batcher = MicroBatcher(predictor)
+
+async def read_body(receive):
+    """Read the full request body from the ASGI receive channel"""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+def parse_json(scope, body):
+    """Decode a request body, failing with the errors Flask's request.json raises"""
+    content_type = dict(scope.get('headers', [])).get(b'content-type', b'').decode('latin-1')
+    mimetype = content_type.split(';')[0].strip().lower()
+    if not (mimetype == 'application/json'
+            or (mimetype.startswith('application/') and mimetype.endswith('+json'))):
+        raise UnsupportedMediaType("Did not attempt to load JSON data because the request "
+                                   "Content-Type was not 'application/json'.")
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise BadRequest()
+
+async def send_body(send, body, content_type, status=200, headers=()):
+    """Send a complete response"""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode()),
+                    (b'content-length', str(len(body)).encode())] + list(headers)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def send_json(send, payload, status=200):
+    """Send a JSON response"""
+    with instrumentation.span('serialize'):
+        body = json.dumps(payload).encode('utf-8')
+    await send_body(send, body, 'application/json', status)
+
+async def predict(input_data, query):
+    """Salary prediction endpoint, answered from a micro-batch"""
+    # Validate required fields
+    for field in REQUIRED_FIELDS:
+        if field not in input_data:
+            return {'error': f'Missing required field: {field}'}, 400
+    
+    # Route to one model, an ensemble or a comparison (JSON field or query parameter)
+    model = input_data.get('model', query.get('model', [None])[0])
+    combine = input_data.get('combine', query.get('combine', [None])[0])
+    error = model_request_error(model, combine)
+    if error:
+        return {'error': error}, 400
+    
+    result = await batcher.submit(input_data, model, combine)
+    if 'error' in result:
+        return result, 500
+    return result, 200
+
+async def predict_batch(input_data, query):
+    """Batch prediction endpoint"""
+    if not isinstance(input_data, list):
+        return {'error': 'Input must be a list of records'}, 400
+    
+    # Route the whole batch with ?model=name (repeatable) and ?combine=
+    model = query.get('model')
+    if model is not None and len(model) == 1:
+        model = model[0]
+    combine = query.get('combine', [None])[0]
+    error = model_request_error(model, combine)
+    if error:
+        return {'error': error}, 400
+    
+    # Large client batches are already vectorized, so they bypass the micro-batcher
+    results = await asyncio.get_running_loop().run_in_executor(
+        batcher.executor, predictor.predict_batch, input_data, model, combine)
+    instrumentation.record_batch('/predict-batch', results)
+    return {'predictions': results}, 200
+
+async def debug_profile(scope, send):
+    """Sample every thread for ?seconds=N and send the collapsed stacks; return the status"""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    headers = dict(scope.get('headers', []))
+    seconds = query.get('seconds', ['10'])[0]
+    token = headers.get(b'x-profile-token', b'').decode('latin-1') or None
+    
+    error = profile_request_error(seconds, token)
+    if error:
+        await send_json(send, {'error': error[0]}, error[1])
+        return error[1]
+    if not profile_lock.acquire(blocking=False):
+        await send_json(send, {'error': 'A profile is already being captured'}, 409)
+        return 409
+    
+    # The event loop keeps serving requests while the sampler runs
+    sampler = StackSampler().start()
+    try:
+        await asyncio.sleep(float(seconds))
+    finally:
+        sampler.stop()
+        profile_lock.release()
+    
+    path = sampler.write('async_api')
+    await send_body(send, sampler.collapsed().encode(), 'text/plain; charset=utf-8',
+                    headers=[(b'x-profile-path', path.encode())])
+    return 200
+
+async def handle_http(scope, receive, send):
+    """Route an HTTP request and record its metrics"""
+    start_time = time.perf_counter()
+    route = (scope['method'], scope['path'])
+    status = await route_http(route, scope, receive, send)
+    
+    # Unknown paths share one label so label cardinality stays bounded
+    endpoint = scope['path'] if status != 404 or route == ('GET', '/metrics') else 'unmatched'
+    instrumentation.record_request(endpoint, status, time.perf_counter() - start_time)
+
+async def route_http(route, scope, receive, send):
+    """Answer an HTTP request, keeping the JSON contract of the Flask app; return the status"""
+    if route == ('GET', '/health'):
+        await send_json(send, predictor.health())
+        return 200
+    
+    if route == ('GET', '/model-info'):
+        info = predictor.describe()
+        info['micro_batching'] = batcher.stats()
+        await send_json(send, info)
+        return 200
+    
+    if route == ('GET', '/debug/profile'):
+        return await debug_profile(scope, send)
+    
+    if route == ('GET', '/metrics'):
+        if not instrumentation.enabled:
+            await send_json(send, {'error': 'Metrics are disabled'}, 404)
+            return 404
+        await send_body(send, instrumentation.render().encode(), CONTENT_TYPE)
+        return 200
+    
+    handlers = {('POST', '/predict'): predict, ('POST', '/predict-batch'): predict_batch}
+    if route not in handlers:
+        await send_json(send, {'error': 'Not found'}, 404)
+        return 404
+    
+    try:
+        # Get input data
+        body = await read_body(receive)
+        with instrumentation.span('parse_json'):
+            input_data = parse_json(scope, body)
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        payload, status = await handlers[route](input_data, query)
+    except Exception as e:
+        payload, status = {'error': str(e)}, 500
+    await send_json(send, payload, status)
+    return status
+
+async def handle_lifespan(receive, send):
+    """Load the model and start the batcher when the server starts"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if predictor.bundle is None and not predictor.load_model():
+                await send({'type': 'lifespan.startup.failed',
+                            'message': 'Failed to load model. Please train the model first.'})
+                return
+            predictor.start_watcher()
+            batcher.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await batcher.stop()
+            if predictor.watcher is not None:
+                predictor.watcher.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+    elif scope['type'] == 'http':
+        await handle_http(scope, receive, send)
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve predictions over ASGI with request micro-batching')
+    parser.add_argument('--host', default=config.api.host)
+    parser.add_argument('--port', type=int, default=config.api.port)
+    parser.add_argument('--model', default=config.api.default_model)
+    parser.add_argument('--max-batch-size', type=int, default=None)
+    parser.add_argument('--max-wait-us', type=int, default=None)
+    args = parser.parse_args()
+    
+    # Imported here so the module can be loaded by any ASGI server
+    import uvicorn
+    
+    if args.max_batch_size is not None:
+        batcher.max_batch_size = args.max_batch_size
+    if args.max_wait_us is not None:
+        batcher.max_wait = args.max_wait_us / 1e6
+    
+    if not predictor.load_model(args.model):
+        print("Failed to load model. Please train the model first.")
+        return
+    
+    print(f"Starting ASGI API server (micro-batches of up to {batcher.max_batch_size} "
+          f"requests, {batcher.max_wait * 1e6:.0f}us max wait)...")
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+if __name__ == '__main__':
+    with profile_from_argv('async_api'):
+        main()
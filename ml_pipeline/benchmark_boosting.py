@@ -0,0 +1,67 @@
+
+import time
+import numpy as np
+from benchmark_utils import generate_salary_dataset
+from config import config
+
+def bench_boosting(sizes=(1_000, 10_000, 100_000), repeats=1):
+    """Fit time and test R² of exact vs histogram gradient boosting as the row count grows.
+    
+    The histogram backend runs twice: with the label-encoded columns
+    split as native categories and with every column binned as a number.
+    """
+    import contextlib
+    import io
+    from sklearn.base import clone
+    from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+    from sklearn.metrics import r2_score
+    from data_processing import DataProcessor
+    from model_training import categorical_feature_mask
+    
+    results = []
+    for n_rows in sizes:
+        df = generate_salary_dataset(n_rows, seed=config.model.random_state)
+        processor = DataProcessor()
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = processor.encode_categorical_features(processor.clean_data(df))
+            X, y = processor.prepare_features(processor.create_features(data))
+            X_train, X_test, y_train, y_test = processor.split_data(X, y)
+            X_train, X_test = processor.scale_features(X_train, X_test)
+        
+        hist_params = config.model.hist_gradient_boosting_params
+        mask = categorical_feature_mask(processor.feature_columns, processor.label_encoders,
+                                        hist_params.get('max_bins', 255))
+        variants = {
+            'exact': GradientBoostingRegressor(**config.model.gradient_boosting_params),
+            'histogram': HistGradientBoostingRegressor(**hist_params),
+            'histogram_categorical': HistGradientBoostingRegressor(**dict(hist_params, categorical_features=mask))
+        }
+        
+        for variant, model in variants.items():
+            fit_s = np.inf
+            for _ in range(repeats):
+                fitted = clone(model)
+                start = time.perf_counter()
+                fitted.fit(X_train, y_train)
+                fit_s = min(fit_s, time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            y_pred = fitted.predict(X_test)
+            results.append({
+                'rows': n_rows,
+                'variant': variant,
+                'fit_s': fit_s,
+                'predict_s': time.perf_counter() - start,
+                'test_r2': r2_score(y_test, y_pred),
+                'iterations': fitted.n_estimators_ if variant == 'exact' else fitted.n_iter_,
+                'categorical_columns': int(sum(mask)) if variant == 'histogram_categorical' else 0
+            })
+            print(f"  {n_rows:,} rows, {variant}: fit {fit_s:.2f}s")
+    
+    exact_fit = {r['rows']: r['fit_s'] for r in results if r['variant'] == 'exact'}
+    print(f"\n{'rows':>9} {'backend':<22} {'fit (s)':>9} {'speedup':>8} {'predict (s)':>12} {'test R²':>8} "
+          f"{'iterations':>10} {'categorical':>11}")
+    for r in results:
+        print(f"{r['rows']:>9,} {r['variant']:<22} {r['fit_s']:>9.3f} {exact_fit[r['rows']] / r['fit_s']:>7.1f}x "
+              f"{r['predict_s']:>12.4f} {r['test_r2']:>8.4f} {r['iterations']:>10} {r['categorical_columns']:>11}")
+    return results
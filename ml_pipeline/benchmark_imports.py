@@ -0,0 +1,67 @@
+
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+# Modules the serving path must not pull in at import time
+HEAVY_MODULES = ['pandas', 'matplotlib', 'seaborn', 'sklearn', 'scipy']
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy} if m in sys.modules]}}))
+"""
+
+def parse_importtime(stderr, top_n=10):
+    """Return the slowest direct imports of the probed module from `-X importtime` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        
+        # Each nesting level adds two spaces; direct imports of the probed module sit at level 1
+        if len(name) - len(name.lstrip()) == 3:
+            rows.append((name.strip(), int(cumulative_us) / 1000.0))
+    
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top_n]
+
+def bench_import_time(modules, repeats=5, top_n=10):
+    """Measure cold import time of API modules in fresh interpreters"""
+    pipeline_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    
+    for module in modules:
+        probe = IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+        timings = []
+        loaded = []
+        for _ in range(repeats):
+            output = subprocess.run([sys.executable, '-c', probe], cwd=pipeline_dir,
+                                    capture_output=True, text=True, check=True)
+            sample = json.loads(output.stdout.strip().splitlines()[-1])
+            timings.append(sample['seconds'])
+            loaded = sample['loaded']
+        
+        # One more run with -X importtime to show where the time goes
+        output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=pipeline_dir, capture_output=True, text=True, check=True)
+        
+        results.append({
+            'module': module,
+            'median_ms': float(np.median(timings) * 1000),
+            'min_ms': float(np.min(timings) * 1000),
+            'heavy_modules_loaded': loaded,
+            'slowest_imports': parse_importtime(output.stderr, top_n)
+        })
+    
+    for r in results:
+        print(f"\n{r['module']}: median {r['median_ms']:.0f} ms, min {r['min_ms']:.0f} ms")
+        print(f"  heavy modules loaded: {', '.join(r['heavy_modules_loaded']) or 'none'}")
+        for name, cumulative_ms in r['slowest_imports']:
+            print(f"  {name:<30} {cumulative_ms:>8.1f} ms")
+    
+    return results
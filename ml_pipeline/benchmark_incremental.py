@@ -0,0 +1,92 @@
+
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from config import config
+
+def synthetic_salary_rows(n_rows, seed, new_category_rate=0.01, data_path=None):
+    """Raw salary records resampled from the dataset, with jittered values and some new companies"""
+    df = pd.read_csv(data_path or config.data.raw_data_path)
+    rng = np.random.default_rng(seed)
+    
+    rows = df.sample(n_rows, replace=True, random_state=seed).reset_index(drop=True)
+    rows['experience_years'] = np.clip(rows['experience_years'] + rng.integers(-1, 2, n_rows), 0, None)
+    rows[config.data.target_column] = (rows[config.data.target_column] * rng.lognormal(0, 0.1, n_rows)).round()
+    
+    new_company = rng.random(n_rows) < new_category_rate
+    rows.loc[new_company, 'company_name'] = [f'Company {seed}-{i}' for i in range(int(new_company.sum()))]
+    return rows
+
+def run_pipeline(mode):
+    """Run data processing and training in the current directory; return timings and test R²"""
+    import contextlib
+    import io
+    import data_processing
+    import model_training
+    
+    config.data.processing_mode = 'incremental' if mode == 'incremental' else 'batch'
+    config.model.training_mode = mode
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        data_processing.main()
+        processing_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        model_training.main()
+        training_s = time.perf_counter() - start
+    
+    history = pd.read_csv(os.path.join(config.data.models_dir, 'training_history.csv')).set_index('model_name')
+    return {
+        'processing_s': processing_s,
+        'training_s': training_s,
+        'forest_fit_s': history.loc['random_forest', 'training_time'],
+        'boosting_fit_s': history.loc['gradient_boosting', 'training_time'],
+        'forest_r2': history.loc['random_forest', 'test_r2'],
+        'boosting_r2': history.loc['gradient_boosting', 'test_r2']
+    }
+
+def bench_incremental(base_rows=5000, step_rows=1000, steps=4):
+    """Incremental vs full retrain time as the raw dataset grows"""
+    source_path = os.path.abspath(config.data.raw_data_path)
+    modes = ('full', 'incremental')
+    saved_modes = (config.data.processing_mode, config.model.training_mode)
+    cwd = os.getcwd()
+    results = []
+    
+    with tempfile.TemporaryDirectory() as root:
+        base = synthetic_salary_rows(base_rows, 0, data_path=source_path)
+        for mode in modes:
+            os.makedirs(os.path.join(root, mode, 'data'))
+            base.to_csv(os.path.join(root, mode, config.data.raw_data_path), index=False)
+        
+        try:
+            # Both directories start from the same full run
+            for mode in modes:
+                os.chdir(os.path.join(root, mode))
+                run_pipeline('full')
+            
+            for step in range(1, steps + 1):
+                delta = synthetic_salary_rows(step_rows, step, data_path=source_path)
+                for mode in modes:
+                    os.chdir(os.path.join(root, mode))
+                    delta.to_csv(config.data.raw_data_path, mode='a', header=False, index=False)
+                    
+                    stats = run_pipeline(mode)
+                    stats.update({'mode': mode, 'rows': base_rows + step * step_rows})
+                    results.append(stats)
+        finally:
+            os.chdir(cwd)
+            config.data.processing_mode, config.model.training_mode = saved_modes
+    
+    print(f"\n{base_rows:,} base rows, {step_rows:,} rows appended per step")
+    print(f"{'rows':>8} {'mode':<12} {'process (s)':>12} {'train (s)':>10} {'forest fit (s)':>15} "
+          f"{'boosting fit (s)':>17} {'forest R²':>10} {'boosting R²':>12}")
+    for r in results:
+        print(f"{r['rows']:>8,} {r['mode']:<12} {r['processing_s']:>12.2f} {r['training_s']:>10.2f} "
+              f"{r['forest_fit_s']:>15.2f} {r['boosting_fit_s']:>17.2f} {r['forest_r2']:>10.4f} "
+              f"{r['boosting_r2']:>12.4f}")
+    
+    return results
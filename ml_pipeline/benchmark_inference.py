@@ -0,0 +1,45 @@
+
+import pandas as pd
+from benchmark_utils import load_sample_records, summarize_latencies, time_calls
+from cache import PredictionCache
+from config import config
+
+def pandas_predict(predictor, record):
+    """Reference single-row path the lean modes replace: DataFrame, label encoders, scaler, predict"""
+    bundle = predictor.bundle
+    df = pd.DataFrame([record])
+    for col, encoder in bundle.label_encoders.items():
+        try:
+            df[col] = encoder.transform(df[col])
+        except ValueError:
+            df[col] = config.api.unknown_category_code
+    X = bundle.scaler.transform(df[bundle.feature_columns])
+    return bundle.model.predict(X)[0]
+
+def bench_inference(model_names, n_requests=2000):
+    """Compare single-row latency of the pandas baseline with the standard, lean and compiled paths"""
+    from prediction_api import SalaryPredictor
+    
+    records = load_sample_records(n_requests)
+    results = []
+    
+    for model_name in model_names:
+        for mode in ('pandas', 'standard', 'lean', 'compiled'):
+            predictor = SalaryPredictor(inference_mode='standard' if mode == 'pandas' else mode)
+            # The cache would answer repeated records without running either path
+            predictor.cache = PredictionCache(max_size=0)
+            if not predictor.load_model(model_name):
+                continue
+            
+            if mode == 'pandas':
+                stats = summarize_latencies(time_calls(lambda record: pandas_predict(predictor, record), records))
+            else:
+                stats = summarize_latencies(time_calls(predictor.predict_salary, records))
+            stats.update({'model': model_name, 'mode': mode})
+            results.append(stats)
+    
+    print(f"\n{'model':<20} {'mode':<10} {'p50 (us)':>10} {'p99 (us)':>10} {'mean (us)':>10}")
+    for r in results:
+        print(f"{r['model']:<20} {r['mode']:<10} {r['p50_us']:>10.1f} {r['p99_us']:>10.1f} {r['mean_us']:>10.1f}")
+    
+    return results
@@ -0,0 +1,151 @@
+
+import json
+import os
+import subprocess
+import sys
+import time
+from benchmark_utils import load_sample_records, summarize_latencies
+
+# Flask started the way a threaded production-like run would, without the debug reloader
+FLASK_SERVER = """
+import prediction_api
+prediction_api.predictor.load_model({model!r})
+prediction_api.app.run(host='127.0.0.1', port={port}, threaded=True)
+"""
+
+def start_server(server, model_name, port):
+    """Start the Flask or ASGI API in a subprocess serving from the current directory"""
+    pipeline_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    # The prediction cache is disabled so every request reaches the model
+    env = dict(os.environ, PYTHONPATH=pipeline_dir, MODEL_RELOAD_INTERVAL='0', PREDICTION_CACHE_SIZE='0')
+    if server == 'flask':
+        command = [sys.executable, '-c', FLASK_SERVER.format(model=model_name, port=port)]
+    else:
+        command = [sys.executable, os.path.join(pipeline_dir, 'async_api.py'),
+                   '--host', '127.0.0.1', '--port', str(port), '--model', model_name]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_for_server(port, process, timeout=60.0):
+    """Poll /health until the server answers"""
+    from urllib.request import urlopen
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with urlopen(f'http://127.0.0.1:{port}/health', timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server on port {port} did not start within {timeout}s")
+
+async def http_post(connection, port, path, payload):
+    """POST JSON over a keep-alive connection, reconnecting if the server closed it"""
+    import asyncio
+    
+    if connection.get('writer') is None:
+        connection['reader'], connection['writer'] = await asyncio.open_connection('127.0.0.1', port)
+    
+    body = json.dumps(payload).encode('utf-8')
+    connection['writer'].write(
+        f'POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n'.encode('ascii') + body
+    )
+    await connection['writer'].drain()
+    
+    head = await connection['reader'].readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+    
+    if 'content-length' in headers:
+        await connection['reader'].readexactly(int(headers['content-length']))
+    else:
+        await connection['reader'].read()
+    
+    # HTTP/1.0 servers (the Werkzeug default) close after every response
+    if lines[0].startswith('HTTP/1.0') or headers.get('connection') == 'close' \
+            or 'content-length' not in headers:
+        connection['writer'].close()
+        connection['writer'] = None
+    return status
+
+async def generate_load(port, records, concurrency):
+    """Send each record to /predict once from `concurrency` concurrent clients"""
+    import asyncio
+    
+    latencies = []
+    errors = 0
+    next_index = 0
+    
+    async def client():
+        nonlocal next_index, errors
+        connection = {}
+        while next_index < len(records):
+            record = records[next_index]
+            next_index += 1
+            
+            start = time.perf_counter_ns()
+            try:
+                status = await http_post(connection, port, '/predict', record)
+            except (OSError, asyncio.IncompleteReadError):
+                status = None
+                connection['writer'] = None
+            latencies.append(time.perf_counter_ns() - start)
+            if status != 200:
+                errors += 1
+        if connection.get('writer') is not None:
+            connection['writer'].close()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+def bench_serving(model_name, n_requests=5000, concurrency=(1, 16, 64), servers=('flask', 'asgi'),
+                  port=5055):
+    """Compare /predict throughput and tail latency of the Flask and micro-batched ASGI servers"""
+    import asyncio
+    from urllib.request import urlopen
+    
+    records = [{key: (value.item() if hasattr(value, 'item') else value) for key, value in record.items()}
+               for record in load_sample_records(n_requests)]
+    results = []
+    
+    for server in servers:
+        process = start_server(server, model_name, port)
+        try:
+            wait_for_server(port, process)
+            
+            for clients in concurrency:
+                # Warm up connections and the model before timing
+                asyncio.run(generate_load(port, records[:min(200, n_requests)], clients))
+                latencies, errors, wall_time = asyncio.run(generate_load(port, records, clients))
+                
+                stats = summarize_latencies(latencies)
+                stats.update({
+                    'server': server,
+                    'concurrency': clients,
+                    'throughput_rps': len(latencies) / wall_time,
+                    'errors': errors
+                })
+                results.append(stats)
+            
+            if server == 'asgi':
+                with urlopen(f'http://127.0.0.1:{port}/model-info', timeout=5) as response:
+                    batching = json.loads(response.read())['micro_batching']
+                print(f"ASGI micro-batching: {batching['batches']:,} batches, "
+                      f"mean size {batching['mean_batch_size']:.1f}, largest {batching['largest_batch']}")
+        finally:
+            process.terminate()
+            process.wait()
+    
+    print(f"\n{n_requests:,} /predict requests per run, model {model_name}")
+    print(f"{'server':<8} {'clients':>8} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'errors':>8}")
+    for r in results:
+        print(f"{r['server']:<8} {r['concurrency']:>8} {r['throughput_rps']:>10.0f} "
+              f"{r['p50_us'] / 1000:>10.2f} {r['p99_us'] / 1000:>10.2f} {r['errors']:>8}")
+    
+    return results
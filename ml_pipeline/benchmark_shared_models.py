@@ -0,0 +1,91 @@
+
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+from config import config
+
+def load_model_worker(path, shared, X, barrier, queue):
+    """Load a model in a fresh process, predict once and report memory while all workers are up"""
+    import joblib
+    # The model families the pipeline trains, imported first so the baseline excludes library code
+    import sklearn.ensemble, sklearn.linear_model, sklearn.svm
+    from shared_models import load_shared_model, process_memory
+    
+    baseline = process_memory()
+    start = time.perf_counter()
+    model = load_shared_model(path) if shared else joblib.load(path)
+    load_time = time.perf_counter() - start
+    model.predict(X)
+    
+    # Measure only once every worker holds the model, so PSS splits shared pages fairly
+    barrier.wait()
+    memory = process_memory()
+    queue.put({
+        'load_s': load_time,
+        'rss_mb': memory['rss_mb'],
+        'pss_mb': memory['pss_mb'],
+        'private_mb': memory['private_mb'],
+        'model_private_mb': (memory['private_mb'] or 0.0) - (baseline['private_mb'] or 0.0)
+    })
+    barrier.wait()
+
+def bench_shared_models(model_name, n_workers=4, model_dir=None):
+    """Per-worker memory of pickled vs memory-mapped models, with a prediction equality check"""
+    import joblib
+    from split_storage import get_split_storage
+    from shared_models import load_shared_model, predictions_identical, save_shared_model
+    
+    model_dir = model_dir or config.api.model_dir
+    if model_name == 'best':
+        model_name = joblib.load(os.path.join(model_dir, 'best_model_info.pkl'))['best_model']
+    pickle_path = os.path.join(model_dir, f'{model_name}_model.pkl')
+    X_test = get_split_storage().load_array('X_test_processed')
+    
+    results = []
+    context = multiprocessing.get_context('spawn')
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Export from the pickle so the comparison does not depend on training having written it
+        shared_path = save_shared_model(joblib.load(pickle_path), os.path.join(tmp_dir, f'{model_name}_model.shared'))
+        
+        pickled, shared = joblib.load(pickle_path), load_shared_model(shared_path)
+        # Parallel forests sum tree outputs in thread completion order, so compare serially
+        for model in (pickled, shared):
+            if hasattr(model, 'n_jobs'):
+                model.n_jobs = 1
+        identical = predictions_identical(pickled, shared, X_test)
+        del pickled, shared
+        
+        for mode, path in (('pickle', pickle_path), ('shared', shared_path)):
+            barrier = context.Barrier(n_workers)
+            queue = context.Queue()
+            workers = [context.Process(target=load_model_worker, args=(path, mode == 'shared', X_test[:256], barrier, queue))
+                       for _ in range(n_workers)]
+            for worker in workers:
+                worker.start()
+            stats = [queue.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+            
+            results.append({
+                'mode': mode,
+                'workers': n_workers,
+                'file_mb': os.path.getsize(path) / 1024**2,
+                'load_s': float(np.mean([s['load_s'] for s in stats])),
+                'rss_mb': float(np.mean([s['rss_mb'] for s in stats])),
+                'pss_mb': float(np.mean([s['pss_mb'] for s in stats])),
+                'model_private_mb': float(np.mean([s['model_private_mb'] for s in stats])),
+                'total_pss_mb': float(np.sum([s['pss_mb'] for s in stats]))
+            })
+    
+    print(f"\nModel {model_name}, {n_workers} workers; predictions byte-identical on "
+          f"{len(X_test):,} test rows: {identical}")
+    print(f"{'mode':<8} {'file (MB)':>10} {'load (s)':>9} {'RSS (MB)':>9} {'PSS (MB)':>9} "
+          f"{'model private (MB)':>19} {'total PSS (MB)':>15}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['file_mb']:>10.1f} {r['load_s']:>9.3f} {r['rss_mb']:>9.1f} {r['pss_mb']:>9.1f} "
+              f"{r['model_private_mb']:>19.1f} {r['total_pss_mb']:>15.1f}")
+    
+    return {'identical': identical, 'results': results}
@@ -0,0 +1,77 @@
+
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmark_utils import peak_rss_mb
+from config import config
+
+def load_split_worker(split_format, data_dir, queue):
+    """Load X/y splits in a fresh process and report load time and memory"""
+    from split_storage import get_split_storage
+    
+    storage = get_split_storage(split_format, data_dir)
+    baseline_rss = peak_rss_mb()
+    
+    start = time.perf_counter()
+    X = storage.load_array('X_train_processed')
+    y = storage.load_array('y_train').ravel()
+    load_time = time.perf_counter() - start
+    
+    # Touch every value so lazily mapped formats pay their page-in cost too
+    checksum = float(X.sum() + y.sum())
+    first_pass_time = time.perf_counter() - start
+    
+    queue.put({
+        'load_s': load_time,
+        'load_and_scan_s': first_pass_time,
+        'rss_delta_mb': peak_rss_mb() - baseline_rss,
+        'checksum': checksum
+    })
+
+def bench_split_storage(n_rows=1_000_000, formats=('csv', 'npy', 'parquet')):
+    """Compare split load time and memory across storage formats"""
+    from split_storage import get_split_storage
+    
+    rng = np.random.default_rng(config.model.random_state)
+    feature_columns = ['experience_years', 'education_level', 'remote_ratio', 
+                       'company_size', 'employment_type', 'work_year', 'company_name', 
+                       'job_title', 'job_location']
+    X = pd.DataFrame(rng.standard_normal((n_rows, len(feature_columns))), columns=feature_columns)
+    y = pd.Series(rng.uniform(2e5, 5e6, n_rows), name=config.data.target_column)
+    
+    results = []
+    context = multiprocessing.get_context('spawn')
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        for split_format in formats:
+            storage = get_split_storage(split_format, data_dir)
+            try:
+                start = time.perf_counter()
+                storage.save('X_train_processed', X)
+                storage.save('y_train', y)
+                save_time = time.perf_counter() - start
+            except ImportError as e:
+                print(f"Skipping {split_format}: {e}")
+                continue
+            
+            queue = context.Queue()
+            worker = context.Process(target=load_split_worker, args=(split_format, data_dir, queue))
+            worker.start()
+            stats = queue.get()
+            worker.join()
+            
+            size_mb = sum(os.path.getsize(os.path.join(data_dir, f)) for f in os.listdir(data_dir)
+                          if f.endswith(storage.extension)) / 1024**2
+            stats.update({'format': split_format, 'save_s': save_time, 'size_mb': size_mb})
+            results.append(stats)
+    
+    print(f"\n{n_rows:,} rows")
+    print(f"{'format':<10} {'size (MB)':>10} {'save (s)':>10} {'load (s)':>10} {'load+scan (s)':>14} {'RSS delta (MB)':>15}")
+    for r in results:
+        print(f"{r['format']:<10} {r['size_mb']:>10.1f} {r['save_s']:>10.3f} {r['load_s']:>10.3f} "
+              f"{r['load_and_scan_s']:>14.3f} {r['rss_delta_mb']:>15.1f}")
+    
+    return results
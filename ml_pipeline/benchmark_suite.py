@@ -0,0 +1,247 @@
+
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmark_incremental import run_pipeline
+from benchmark_inference import pandas_predict
+from benchmark_utils import generate_salary_dataset, summarize_latencies, time_calls
+from cache import PredictionCache
+from config import config
+
+# Models too slow to fit beyond this many rows are left out of larger suite sizes
+FIT_ROW_LIMITS = {'support_vector': 20_000}
+
+# Differences below these are treated as timer noise when comparing with a baseline
+NOISE_FLOORS = {'s': 0.002, 'us': 20.0}
+
+# Reference results committed with the code, compared against by default
+REFERENCE_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+def suite_result(benchmark, rows, value, unit, **extra):
+    """One machine-readable measurement; lower values are better"""
+    return dict(benchmark=benchmark, rows=int(rows), value=float(value), unit=unit, **extra)
+
+def bench_processing_stages(df, repeats=3):
+    """Best-of-repeats time of each DataProcessor stage; also returns the processed split"""
+    import contextlib
+    import io
+    from data_processing import DataProcessor
+    
+    best = {}
+    for _ in range(repeats):
+        processor = DataProcessor()
+        timings = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            data = processor.clean_data(df)
+            timings['clean_data'] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            data = processor.encode_categorical_features(data.copy())
+            timings['encode_categorical_features'] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            data = processor.create_features(data)
+            X, y = processor.prepare_features(data)
+            timings['create_features'] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            X_train, X_test, y_train, y_test = processor.split_data(X, y)
+            timings['split_data'] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            X_train, X_test = processor.scale_features(X_train, X_test)
+            timings['scale_features'] = time.perf_counter() - start
+        
+        for stage, seconds in timings.items():
+            best[stage] = min(best.get(stage, np.inf), seconds)
+    
+    results = [suite_result(f'processing.{stage}', len(df), seconds, 's', rows_per_s=len(df) / seconds)
+               for stage, seconds in best.items()]
+    return results, (X_train, X_test, y_train.to_numpy(), y_test.to_numpy())
+
+def bench_model_fits(split, model_names=None, repeats=1):
+    """Fit and batch-predict time of each model on a processed split"""
+    from sklearn.base import clone
+    from model_training import ModelTrainer
+    
+    X_train, X_test, y_train, _ = split
+    trainer = ModelTrainer()
+    trainer.initialize_models(use_tuned_params=False)
+    
+    results = []
+    for model_name, model in trainer.models.items():
+        if model_names and model_name not in model_names:
+            continue
+        if len(X_train) > FIT_ROW_LIMITS.get(model_name, np.inf):
+            print(f"  skipping {model_name}: more than {FIT_ROW_LIMITS[model_name]:,} training rows")
+            continue
+        
+        fit_s = predict_s = np.inf
+        for _ in range(repeats):
+            fitted = clone(model)
+            start = time.perf_counter()
+            fitted.fit(X_train, y_train)
+            fit_s = min(fit_s, time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            fitted.predict(X_test)
+            predict_s = min(predict_s, time.perf_counter() - start)
+        
+        results.append(suite_result(f'model.{model_name}.fit', len(X_train), fit_s, 's'))
+        results.append(suite_result(f'model.{model_name}.predict', len(X_test), predict_s, 's',
+                                    rows_per_s=len(X_test) / predict_s))
+    return results
+
+def bench_api_paths(df, n_requests=500, batch_size=100):
+    """Latency of SalaryPredictor and of /predict and /predict-batch through Flask's test client.
+    
+    The models are trained on df in a temporary directory. The prediction
+    cache is disabled so every call measures the full prediction path.
+    """
+    saved_modes = (config.data.processing_mode, config.model.training_mode)
+    cwd = os.getcwd()
+    records = df.drop(columns=[config.data.target_column]).to_dict('records')
+    records = [records[i % len(records)] for i in range(n_requests)]
+    batches = [records[i:i + batch_size] for i in range(0, n_requests, batch_size)]
+    
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, 'data'))
+        df.to_csv(os.path.join(root, config.data.raw_data_path), index=False)
+        try:
+            os.chdir(root)
+            run_pipeline('full')
+            
+            import prediction_api
+            predictor = prediction_api.predictor
+            if not predictor.load_model():
+                raise RuntimeError("Could not load the models trained for the API benchmark")
+            predictor.cache = PredictionCache(max_size=0)
+            client = prediction_api.app.test_client()
+            
+            def post(path, payload):
+                response = client.post(path, json=payload)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path} returned {response.status_code}: {response.get_json()}")
+            
+            timings = {
+                'predictor.pandas_baseline': (time_calls(lambda record: pandas_predict(predictor, record),
+                                                         records), 1),
+                'predictor.preprocess_input': (time_calls(predictor.preprocess_input, records), 1),
+                'predictor.predict_salary': (time_calls(predictor.predict_salary, records), 1),
+                'api./predict': (time_calls(lambda record: post('/predict', record), records), 1),
+                'api./predict-batch': (time_calls(lambda batch: post('/predict-batch', batch), batches, warmup=5),
+                                       batch_size)
+            }
+        finally:
+            os.chdir(cwd)
+            config.data.processing_mode, config.model.training_mode = saved_modes
+    
+    results = []
+    for benchmark, (latencies, rows) in timings.items():
+        stats = summarize_latencies(latencies)
+        results.append(suite_result(benchmark, rows, stats['p50_us'], 'us', p99_us=stats['p99_us'],
+                                    mean_us=stats['mean_us'], calls=stats['calls'],
+                                    model=predictor.model_name))
+    return results
+
+def compare_with_baseline(results, baseline, tolerance=0.2):
+    """Match results to a baseline by (benchmark, rows) and flag slowdowns beyond the tolerance"""
+    reference = {(r['benchmark'], r['rows']): r for r in baseline['results']}
+    comparisons = []
+    for r in results:
+        base = reference.get((r['benchmark'], r['rows']))
+        if base is None or base['unit'] != r['unit']:
+            comparisons.append(dict(r, baseline=None, ratio=None, status='new'))
+            continue
+        
+        ratio = r['value'] / base['value'] if base['value'] > 0 else np.inf
+        significant = abs(r['value'] - base['value']) > NOISE_FLOORS.get(r['unit'], 0.0)
+        if significant and ratio > 1 + tolerance:
+            status = 'regression'
+        elif significant and ratio < 1 / (1 + tolerance):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        comparisons.append(dict(r, baseline=base['value'], ratio=ratio, status=status))
+    return comparisons
+
+def load_baseline(baseline_path):
+    """Read a baseline report; in CI a missing baseline is an error rather than written"""
+    if not os.path.exists(baseline_path):
+        raise FileNotFoundError(f"No benchmark baseline at {baseline_path}; create it with "
+                                f"`benchmarks.py suite --update-baseline` and commit it")
+    with open(baseline_path, 'r') as f:
+        return json.load(f)
+
+def bench_suite(sizes=None, model_names=None, n_requests=500, batch_size=100, repeats=3, output=None,
+                baseline_path=REFERENCE_BASELINE, tolerance=0.2, update_baseline=False, ci=False):
+    """Processing, model and API benchmarks on synthetic data, saved as JSON and checked against a baseline.
+    
+    In CI mode the baseline must exist and is never written; the sizes
+    default to the baseline's and a run that matches none of its
+    benchmarks fails.
+    """
+    import platform
+    import sklearn
+    
+    baseline = load_baseline(baseline_path) if ci else None
+    sizes = sizes or (baseline['meta']['sizes'] if baseline else (1_000, 10_000, 100_000))
+    
+    results = []
+    for n_rows in sizes:
+        print(f"Benchmarking {n_rows:,} synthetic rows...")
+        df = generate_salary_dataset(n_rows, seed=config.model.random_state)
+        processing, split = bench_processing_stages(df, repeats)
+        results += processing
+        results += bench_model_fits(split, model_names)
+    
+    print("Benchmarking the prediction API...")
+    results += bench_api_paths(generate_salary_dataset(min(sizes), seed=config.model.random_state),
+                               n_requests, batch_size)
+    
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'sizes': list(sizes)
+        },
+        'results': results
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {output}")
+    
+    rows = results
+    if baseline is None and baseline_path and os.path.exists(baseline_path) and not update_baseline:
+        baseline = load_baseline(baseline_path)
+    if baseline is not None:
+        rows = compare_with_baseline(results, baseline, tolerance)
+        if ci and all(r['status'] == 'new' for r in rows):
+            raise ValueError(f"None of the benchmarks run are in {baseline_path}; update the baseline")
+    
+    print(f"\n{'benchmark':<40} {'rows':>10} {'value':>12} {'baseline':>12} {'ratio':>7}  status")
+    for r in rows:
+        baseline = f"{r['baseline']:>12.4g}" if r.get('baseline') is not None else f"{'-':>12}"
+        ratio = f"{r['ratio']:>7.2f}" if r.get('ratio') is not None else f"{'-':>7}"
+        print(f"{r['benchmark']:<40} {r['rows']:>10,} {r['value']:>10.4g} {r['unit']:<2}{baseline}{ratio}  "
+              f"{r.get('status', '')}")
+    
+    if baseline_path and not ci and (update_baseline or not os.path.exists(baseline_path)):
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+    
+    regressions = [r for r in rows if r.get('status') == 'regression']
+    if regressions:
+        print(f"\n{len(regressions)} regressions beyond {tolerance:.0%}")
+    return report, regressions
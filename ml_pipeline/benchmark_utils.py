@@ -0,0 +1,112 @@
+
+import resource
+import time
+import numpy as np
+import pandas as pd
+from config import config
+
+def summarize_latencies(latencies_ns):
+    """Summarize per-call latencies (nanoseconds) in microseconds"""
+    latencies_us = np.asarray(latencies_ns, dtype=np.float64) / 1000.0
+    return {
+        'calls': len(latencies_us),
+        'mean_us': float(np.mean(latencies_us)),
+        'p50_us': float(np.percentile(latencies_us, 50)),
+        'p99_us': float(np.percentile(latencies_us, 99))
+    }
+
+def time_calls(func, inputs, warmup=50):
+    """Time func(x) for each input, returning per-call latencies in nanoseconds"""
+    for x in inputs[:warmup]:
+        func(x)
+    
+    latencies = []
+    for x in inputs:
+        start = time.perf_counter_ns()
+        func(x)
+        latencies.append(time.perf_counter_ns() - start)
+    return latencies
+
+def load_sample_records(n_records, data_path=None):
+    """Draw raw prediction records from the salary dataset"""
+    df = pd.read_csv(data_path or config.data.raw_data_path)
+    df = df.drop(columns=[config.data.target_column])
+    records = df.to_dict('records')
+    return [records[i % len(records)] for i in range(n_records)]
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    # ru_maxrss survives fork/exec on Linux, so prefer the per-address-space high-water mark
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+# Synthetic generator: salary multiplier and frequency of each fixed category
+EDUCATION_LEVELS = {'High School': (0.7, 0.05), 'Bachelor': (1.0, 0.6), 'Master': (1.2, 0.3), 'PhD': (1.4, 0.05)}
+COMPANY_SIZES = {'Small': (0.85, 0.25), 'Medium': (1.0, 0.35), 'Large': (1.15, 0.4)}
+EMPLOYMENT_TYPES = {'Full-time': (1.0, 0.9), 'Contract': (0.9, 0.07), 'Part-time': (0.5, 0.03)}
+
+def category_pool(real_values, n_unique, prefix):
+    """n_unique category names, starting with the real dataset's values"""
+    real = list(dict.fromkeys(real_values))[:n_unique]
+    return np.array(real + [f'{prefix} {i}' for i in range(len(real), n_unique)], dtype=object)
+
+def zipf_choice(rng, n_categories, n_rows, exponent=1.1):
+    """Category indices with long-tailed (Zipf-like) frequencies"""
+    weights = 1.0 / np.arange(1, n_categories + 1) ** exponent
+    return rng.choice(n_categories, size=n_rows, p=weights / weights.sum())
+
+def fixed_choice(rng, categories, n_rows):
+    """Values and salary multipliers drawn from a {category: (multiplier, frequency)} table"""
+    names = np.array(list(categories), dtype=object)
+    multipliers, frequencies = map(np.array, zip(*categories.values()))
+    index = rng.choice(len(names), size=n_rows, p=frequencies / frequencies.sum())
+    return names[index], multipliers[index]
+
+def generate_salary_dataset(n_rows, seed=0, data_path=None):
+    """Synthetic raw rows with the salary dataset's schema, at any scale.
+    
+    Cardinalities grow sublinearly from those of the real dataset (about
+    50 companies and 90 job titles in 114 rows) and frequencies are
+    long-tailed, as in real job data. Salaries combine multiplicative
+    effects of experience, education, company, location, size and
+    employment type with log-normal noise.
+    """
+    real = pd.read_csv(data_path or config.data.raw_data_path)
+    rng = np.random.default_rng(seed)
+    scale = max(n_rows / len(real), 1.0)
+    
+    companies = category_pool(real['company_name'], min(int(real['company_name'].nunique() * scale ** 0.5), 50_000), 'Company')
+    titles = category_pool(real['job_title'], min(int(real['job_title'].nunique() * scale ** 0.25), 2_000), 'Job Title')
+    locations = category_pool(real['job_location'], min(int(real['job_location'].nunique() * scale ** 0.15), 100), 'City')
+    
+    company = zipf_choice(rng, len(companies), n_rows)
+    title = zipf_choice(rng, len(titles), n_rows)
+    location = zipf_choice(rng, len(locations), n_rows, exponent=0.8)
+    education, education_effect = fixed_choice(rng, EDUCATION_LEVELS, n_rows)
+    company_size, size_effect = fixed_choice(rng, COMPANY_SIZES, n_rows)
+    employment_type, employment_effect = fixed_choice(rng, EMPLOYMENT_TYPES, n_rows)
+    experience = np.minimum(rng.gamma(2.0, 3.0, n_rows).round(), 40).astype(np.int64)
+    
+    salary = (3e5 * np.exp(0.12 * np.minimum(experience, 20)) * education_effect * size_effect
+              * employment_effect * rng.lognormal(0, 0.3, len(companies))[company]
+              * rng.lognormal(0, 0.2, len(titles))[title] * rng.lognormal(0, 0.15, len(locations))[location]
+              * rng.lognormal(0, 0.2, n_rows))
+    
+    return pd.DataFrame({
+        'company_name': companies[company],
+        'job_title': titles[title],
+        'job_location': locations[location],
+        'experience_years': experience,
+        'education_level': education,
+        'remote_ratio': rng.choice([0, 25, 50, 75, 100], size=n_rows, p=[0.4, 0.1, 0.3, 0.05, 0.15]),
+        'company_size': company_size,
+        'employment_type': employment_type,
+        'work_year': rng.integers(2020, 2025, n_rows),
+        config.data.target_column: (salary / 1000).round() * 1000
+    }, columns=real.columns)
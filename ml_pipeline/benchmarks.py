@@ -0,0 +1,111 @@
+
+import argparse
+import sys
+from config import config
+
+# Each benchmark lives in its own module; they are re-exported here for the command line and tests
+from benchmark_utils import (generate_salary_dataset, load_sample_records, peak_rss_mb, summarize_latencies,
+                             time_calls)
+from benchmark_inference import bench_inference, pandas_predict
+from benchmark_split_storage import bench_split_storage
+from benchmark_imports import HEAVY_MODULES, bench_import_time, parse_importtime
+from benchmark_serving import bench_serving
+from benchmark_shared_models import bench_shared_models
+from benchmark_incremental import bench_incremental, run_pipeline, synthetic_salary_rows
+from benchmark_boosting import bench_boosting
+from benchmark_suite import REFERENCE_BASELINE, bench_suite, compare_with_baseline
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for the ML pipeline and prediction API')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    inference = subparsers.add_parser('inference', help='single-row /predict latency by inference mode')
+    inference.add_argument('--model', action='append', dest='models',
+                           help='trained model name (repeatable)')
+    inference.add_argument('--requests', type=int, default=2000)
+    
+    storage = subparsers.add_parser('split-storage', help='processed split load time and RSS by format')
+    storage.add_argument('--rows', type=int, default=1_000_000)
+    storage.add_argument('--format', action='append', dest='formats',
+                         help='split format to include (repeatable)')
+    
+    imports = subparsers.add_parser('import-time', help='cold import time of the serving modules')
+    imports.add_argument('--module', action='append', dest='modules',
+                         help='module to import (repeatable, default: prediction_api)')
+    imports.add_argument('--repeats', type=int, default=5)
+    
+    serving = subparsers.add_parser('serving', help='/predict throughput and tail latency, Flask vs ASGI')
+    serving.add_argument('--model', default=config.api.default_model)
+    serving.add_argument('--requests', type=int, default=5000)
+    serving.add_argument('--concurrency', type=int, action='append',
+                         help='concurrent clients (repeatable, default: 1, 16, 64)')
+    serving.add_argument('--server', action='append', dest='servers', choices=['flask', 'asgi'],
+                         help='server to include (repeatable)')
+    serving.add_argument('--port', type=int, default=5055)
+    
+    shared = subparsers.add_parser('shared-models', help='per-worker memory of pickled vs memory-mapped models')
+    shared.add_argument('--model', default=config.api.default_model)
+    shared.add_argument('--workers', type=int, default=4)
+    
+    incremental = subparsers.add_parser('incremental', help='incremental vs full retrain time as data grows')
+    incremental.add_argument('--base-rows', type=int, default=5000)
+    incremental.add_argument('--step-rows', type=int, default=1000)
+    incremental.add_argument('--steps', type=int, default=4)
+    
+    boosting = subparsers.add_parser('boosting', help='exact vs histogram gradient boosting as data grows')
+    boosting.add_argument('--size', type=int, action='append', dest='sizes',
+                          help='synthetic dataset rows (repeatable, default: 1000, 10000, 100000)')
+    boosting.add_argument('--repeats', type=int, default=1)
+    
+    suite = subparsers.add_parser('suite', help='processing, model and API benchmarks with a baseline check')
+    suite.add_argument('--size', type=int, action='append', dest='sizes',
+                       help='synthetic dataset rows (repeatable, default: the baseline\'s sizes with --ci, '
+                            'else 1000, 10000, 100000)')
+    suite.add_argument('--model', action='append', dest='models', help='model to include (repeatable)')
+    suite.add_argument('--requests', type=int, default=500)
+    suite.add_argument('--batch-size', type=int, default=100)
+    suite.add_argument('--repeats', type=int, default=3)
+    suite.add_argument('--output', default='benchmark_results.json')
+    suite.add_argument('--baseline', default=REFERENCE_BASELINE,
+                       help='results to compare with (default: the committed reference; written if missing)')
+    suite.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before a regression')
+    baseline_mode = suite.add_mutually_exclusive_group()
+    baseline_mode.add_argument('--update-baseline', action='store_true', help='replace the baseline with these results')
+    baseline_mode.add_argument('--ci', action='store_true',
+                               help='fail instead of writing the baseline when it is missing')
+    
+    args = parser.parse_args()
+    
+    if args.benchmark == 'inference':
+        bench_inference(args.models or [config.api.default_model], args.requests)
+    elif args.benchmark == 'split-storage':
+        bench_split_storage(args.rows, args.formats or ('csv', 'npy', 'parquet'))
+    elif args.benchmark == 'serving':
+        bench_serving(args.model, args.requests, args.concurrency or (1, 16, 64),
+                      args.servers or ('flask', 'asgi'), args.port)
+    elif args.benchmark == 'shared-models':
+        if not bench_shared_models(args.model, args.workers)['identical']:
+            sys.exit(1)
+    elif args.benchmark == 'incremental':
+        bench_incremental(args.base_rows, args.step_rows, args.steps)
+    elif args.benchmark == 'boosting':
+        bench_boosting(args.sizes or (1_000, 10_000, 100_000), args.repeats)
+    elif args.benchmark == 'suite':
+        try:
+            _, regressions = bench_suite(args.sizes, args.models, args.requests, args.batch_size, args.repeats,
+                                         args.output, args.baseline, args.tolerance, args.update_baseline,
+                                         args.ci)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if regressions:
+            sys.exit(1)
+    elif args.benchmark == 'import-time':
+        results = bench_import_time(args.modules or ['prediction_api'], args.repeats)
+        
+        # Fail when the serving path pulls in analysis libraries
+        if any(r['heavy_modules_loaded'] for r in results):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+
+import numpy as np
+
+class CompiledTreeEnsemble:
+    """Flat-array inference engine for random forest and gradient boosting regressors.
+    
+    Every tree of the ensemble is packed into one struct-of-arrays layout
+    (feature, threshold, children, value) with global node indices. Leaves
+    point to themselves, so a batch walks all trees in lockstep: each
+    level is a handful of NumPy gathers over an (n_rows, n_trees) array of
+    node indices, with no per-tree Python calls or input validation.
+    
+    Features are compared as float32 against float64 thresholds, and NaNs
+    follow each node's missing-value direction, exactly as sklearn does, so
+    every tree reaches the same leaf. Averages can differ from sklearn's in
+    the last bits because the tree outputs are summed in a different order.
+    
+    For bagged ensembles the per-tree leaf values are already at hand after
+    the traversal, so the prediction and its spread come from the same pass.
+    """
+    
+    def __init__(self, feature, threshold, children, value, missing_left, roots,
+                 max_depth, n_features, kind='bagged', base=0.0,
+                 method='normal', z=1.96, quantiles=(0.025, 0.975)):
+        if method not in ('normal', 'quantile'):
+            raise ValueError("Method must be 'normal' or 'quantile'")
+        
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+        self.kind = str(kind)
+        self.base = float(base)
+        
+        self.method = method
+        self.z = z
+        self.quantiles = quantiles
+    
+    @property
+    def n_trees(self):
+        return len(self.roots)
+    
+    @property
+    def bagged(self):
+        """Whether the per-tree spread measures predictive uncertainty"""
+        return self.kind == 'bagged'
+    
+    @staticmethod
+    def supports(model):
+        """Check whether a model is a single-output forest or least-squares-style boosting"""
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None or len(estimators) == 0:
+            return False
+        
+        if isinstance(estimators, np.ndarray):
+            # Gradient boosting: one regression tree per stage and a constant initial prediction
+            init = getattr(model, 'init_', None)
+            return (estimators.shape[1] == 1 and hasattr(model, 'learning_rate')
+                    and (init == 'zero' or hasattr(init, 'constant_')))
+        
+        return all(hasattr(e, 'tree_') and e.tree_.n_outputs == 1 for e in estimators)
+    
+    @classmethod
+    def from_model(cls, model, **interval_options):
+        """Pack a fitted ensemble into flat arrays"""
+        if not cls.supports(model):
+            raise ValueError(f"Cannot compile {type(model).__name__}")
+        
+        if isinstance(model.estimators_, np.ndarray):
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            # Fold the learning rate into the leaves so a prediction is base + sum of leaves
+            scale = model.learning_rate
+            base = 0.0 if model.init_ == 'zero' else float(np.ravel(model.init_.constant_)[0])
+            kind = 'boosted'
+        else:
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            scale = 1.0
+            base = 0.0
+            kind = 'bagged'
+        
+        node_counts = np.array([tree.node_count for tree in trees], dtype=np.intp)
+        roots = np.concatenate([[0], np.cumsum(node_counts)[:-1]]).astype(np.intp)
+        n_nodes = int(node_counts.sum())
+        
+        feature = np.zeros(n_nodes, dtype=np.intp)
+        threshold = np.zeros(n_nodes, dtype=np.float64)
+        children = np.zeros((n_nodes, 2), dtype=np.intp)
+        value = np.zeros(n_nodes, dtype=np.float64)
+        missing_left = np.ones(n_nodes, dtype=bool)
+        
+        for tree, root in zip(trees, roots):
+            nodes = slice(root, root + tree.node_count)
+            own = np.arange(root, root + tree.node_count)
+            leaf = tree.children_left == -1
+            
+            # Leaves loop back to themselves and test feature 0, so extra levels are no-ops
+            feature[nodes] = np.where(leaf, 0, tree.feature)
+            threshold[nodes] = tree.threshold
+            children[nodes, 0] = np.where(leaf, own, tree.children_left + root)
+            children[nodes, 1] = np.where(leaf, own, tree.children_right + root)
+            value[nodes] = tree.value[:, 0, 0] * scale
+            
+            state_nodes = tree.__getstate__()['nodes']
+            if 'missing_go_to_left' in state_nodes.dtype.names:
+                missing_left[nodes] = state_nodes['missing_go_to_left'][:tree.node_count] != 0
+        
+        return cls(feature, threshold, children, value, missing_left, roots,
+                   max(tree.max_depth for tree in trees), model.n_features_in_,
+                   kind, base, **interval_options)
+    
+    def save(self, path, source_digest=''):
+        """Write the flat arrays to an uncompressed .npz file.
+        
+        `source_digest` identifies the pickled model the arrays were
+        compiled from, so a loader can tell when they are out of date.
+        """
+        np.savez(path, feature=self.feature, threshold=self.threshold, children=self.children,
+                 value=self.value, missing_left=self.missing_left, roots=self.roots,
+                 max_depth=self.max_depth, n_features=self.n_features_in_,
+                 kind=self.kind, base=self.base, source=source_digest)
+        return path
+    
+    @classmethod
+    def load(cls, path, **interval_options):
+        """Load an ensemble written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        return cls(arrays['feature'], arrays['threshold'], arrays['children'], arrays['value'],
+                   arrays['missing_left'], arrays['roots'], arrays['max_depth'],
+                   arrays['n_features'], arrays['kind'], arrays['base'], **interval_options)
+    
+    def apply(self, X):
+        """Leaf index of every (row, tree) pair, shape (n_rows, n_trees)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        if n_features != self.n_features_in_:
+            raise ValueError(f"X has {n_features} features, but the model expects {self.n_features_in_}")
+        
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        has_missing = np.isnan(flat_X).any()
+        
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_offsets + self.feature.take(nodes))
+            go_right = ~(x <= self.threshold.take(nodes))
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.missing_left.take(nodes), go_right)
+            
+            step = self.children.take(nodes * 2 + go_right)
+            if np.array_equal(step, nodes):
+                # Every row has reached a leaf in every tree
+                break
+            nodes = step
+        return nodes
+    
+    def tree_predictions(self, X):
+        """Output of every tree for every row, shape (n_rows, n_trees)"""
+        return self.value.take(self.apply(X))
+    
+    def combine(self, tree_predictions):
+        """Ensemble prediction from per-tree outputs"""
+        if self.bagged:
+            return tree_predictions.mean(axis=1)
+        return self.base + tree_predictions.sum(axis=1)
+    
+    def predict(self, X):
+        return self.combine(self.tree_predictions(X))
+    
+    def spread_intervals(self, tree_predictions, predictions):
+        """(lower, upper) from the per-tree outputs of a bagged ensemble"""
+        if self.method == 'quantile':
+            lower, upper = np.quantile(tree_predictions, self.quantiles, axis=1)
+            return lower, upper
+        
+        std_dev = np.std(tree_predictions, axis=1)
+        return predictions - self.z * std_dev, predictions + self.z * std_dev
+    
+    def intervals(self, X, predictions):
+        """Return (lower, upper) interval arrays for each row of X"""
+        return self.spread_intervals(self.tree_predictions(X), predictions)
+    
+    def predict_with_intervals(self, X):
+        """Predictions and (lower, upper) intervals from one traversal.
+        
+        The intervals are None for boosted ensembles, whose stages fit
+        residuals rather than independent estimates.
+        """
+        tree_predictions = self.tree_predictions(X)
+        predictions = self.combine(tree_predictions)
+        if not self.bagged:
+            return predictions, None
+        return predictions, self.spread_intervals(tree_predictions, predictions)
+
+def export_compiled_model(model, path, source_digest=''):
+    """Write the flat-array form of a tree ensemble, if the model is one"""
+    if not CompiledTreeEnsemble.supports(model):
+        return None
+    return CompiledTreeEnsemble.from_model(model).save(path, source_digest)
+
+def compiled_source_digest(path):
+    """Digest of the pickled model a saved ensemble was compiled from ('' if not recorded)"""
+    with np.load(path, allow_pickle=False) as data:
+        return str(data['source']) if 'source' in data.files else ''
@@ -1,7 +1,7 @@
 
 import os
 from dataclasses import dataclass
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple, Optional
 
 @dataclass
 class ModelConfig:
@@ -12,9 +12,73 @@ class ModelConfig:
     # Gradient Boosting Configuration
     gradient_boosting_params: Dict[str, Any] = None
     
+    # Gradient boosting backend: 'exact' (GradientBoostingRegressor) or 'histogram'
+    # (HistGradientBoostingRegressor on binned features, with early stopping; label-encoded
+    # columns with at most max_bins categories are split as categories when hist_native_categorical)
+    gradient_boosting_backend: str = 'exact'
+    hist_gradient_boosting_params: Dict[str, Any] = None
+    hist_native_categorical: bool = True
+    
     # Linear Models Configuration
     linear_models_params: Dict[str, Any] = None
     
+    # Support Vector Regression Configuration
+    support_vector_params: Dict[str, Any] = None
+    
+    # Hyperparameter search: candidate values per model parameter (see hyperparameter_search.py)
+    search_spaces: Dict[str, Dict[str, List[Any]]] = None
+    
+    # Search strategy ('halving' or 'hyperband'), halving rate and CV folds per evaluation
+    search_method: str = 'halving'
+    search_candidates: int = 27
+    search_eta: int = 3
+    search_cv_folds: int = 3
+    search_n_jobs: int = -1
+    
+    # Smallest budget a candidate is evaluated with: trees for ensembles,
+    # training-data fraction for the other models
+    search_min_estimators: int = 10
+    search_min_fraction: float = 0.1
+    
+    # Apply the best parameters found by the search (models/tuned_params.json) when training
+    use_tuned_params: bool = True
+    
+    # Model selection: 'holdout' (test R² of the single train/test split) or 'cv'
+    # (mean R² of K-fold cross-validation on the training rows, see cross_validation.py)
+    selection_method: str = 'holdout'
+    cv_folds: int = 5
+    cv_repeats: int = 1
+    cv_group_column: Optional[str] = None
+    cv_n_jobs: int = -1
+    
+    # Training mode: 'full' (refit every model) or 'incremental' (grow the saved tree
+    # ensembles on the rows added by incremental processing, refit the rest)
+    training_mode: str = 'full'
+    incremental_boosting_stages: int = 20
+    
+    # Parallel training: models fitted concurrently (1 = sequential, -1 = all cores)
+    # on a joblib backend ('loky' processes or 'threading')
+    training_n_jobs: int = 1
+    training_backend: str = 'loky'
+    
+    # Linear models: 'sklearn' fits each on the full matrix; opt-in 'gram' solves OLS, ridge
+    # and lasso from one chunked pass of XᵀX and Xᵀy (see linear_engine.py). Alpha selection
+    # 'path' picks the ridge alpha by GCV and the lasso alpha by BIC among the search-space alphas
+    linear_engine: str = 'sklearn'
+    linear_alpha_selection: str = 'fixed'
+    
+    # Evaluation: models evaluated concurrently on threads, and whether/how
+    # many processes render the evaluation figures
+    evaluation_n_jobs: int = -1
+    evaluation_plots: bool = True
+    plot_n_jobs: int = 1
+    
+    # Also save each model in the memory-mappable format of shared_models.py
+    export_shared_models: bool = True
+    
+    # Also save tree ensembles as flat arrays for the 'compiled' inference mode
+    export_compiled_models: bool = True
+    
     # Data Processing Configuration
     test_size: float = 0.2
     random_state: int = 42
@@ -38,11 +102,65 @@ class ModelConfig:
                 'random_state': self.random_state
             }
         
+        if self.hist_gradient_boosting_params is None:
+            self.hist_gradient_boosting_params = {
+                'max_iter': 500,
+                'learning_rate': 0.1,
+                'max_leaf_nodes': 31,
+                'min_samples_leaf': 20,
+                'l2_regularization': 0.0,
+                'max_bins': 255,
+                'early_stopping': True,
+                'validation_fraction': 0.1,
+                'n_iter_no_change': 10,
+                'random_state': self.random_state
+            }
+        
         if self.linear_models_params is None:
             self.linear_models_params = {
                 'ridge_alpha': 1.0,
                 'lasso_alpha': 1.0
             }
+        
+        if self.support_vector_params is None:
+            self.support_vector_params = {
+                'kernel': 'rbf',
+                'C': 100,
+                'gamma': 'scale'
+            }
+        
+        if self.search_spaces is None:
+            self.search_spaces = {
+                'random_forest': {
+                    'max_depth': [8, 15, 25, None],
+                    'min_samples_split': [2, 5, 10],
+                    'min_samples_leaf': [1, 2, 4],
+                    'max_features': [1.0, 0.6, 'sqrt']
+                },
+                'gradient_boosting': {
+                    'learning_rate': [0.03, 0.1, 0.2],
+                    'max_depth': [3, 4, 6],
+                    'subsample': [0.7, 1.0],
+                    'min_samples_leaf': [1, 5, 20]
+                },
+                'hist_gradient_boosting': {
+                    'learning_rate': [0.03, 0.1, 0.2],
+                    'max_leaf_nodes': [15, 31, 63],
+                    'min_samples_leaf': [5, 20, 50],
+                    'l2_regularization': [0.0, 0.1, 1.0]
+                },
+                'ridge_regression': {
+                    'alpha': [0.01, 0.1, 1.0, 10.0, 100.0]
+                },
+                'lasso_regression': {
+                    'alpha': [0.01, 0.1, 1.0, 10.0, 100.0, 1000.0]
+                },
+                'support_vector': {
+                    'C': [10, 100, 1000],
+                    'gamma': ['scale', 0.01, 0.1, 1.0],
+                    'epsilon': [0.01, 0.1]
+                }
+            }
 
 @dataclass
 class DataConfig:
@@ -52,11 +170,26 @@ class DataConfig:
     processed_data_dir: str = 'data'
     models_dir: str = 'models'
     
+    # Storage format for processed splits: 'csv' (the original text files), or opt-in
+    # binary 'npy' (memory-mapped) or 'parquet'
+    split_format: str = 'csv'
+    
     # Feature columns
     categorical_features: List[str] = None
     numerical_features: List[str] = None
     target_column: str = 'salary'
     
+    # Processing mode: 'batch' (whole file in memory), 'streaming' (chunked, out-of-core)
+    # or 'incremental' (only rows appended since the last run, see incremental_processing.py)
+    processing_mode: str = 'batch'
+    chunk_size: int = 100_000
+    sketch_size: int = 1000
+    
+    # Content-addressed cache of pipeline stage results (see pipeline_dag.py);
+    # least recently used entries are evicted beyond the size limit (0 = unlimited)
+    stage_cache_dir: str = '.stage_cache'
+    stage_cache_max_mb: float = 2048.0
+    
     # Data cleaning parameters
     outlier_method: str = 'iqr'  # 'iqr' or 'zscore'
     outlier_threshold: float = 1.5
@@ -80,10 +213,57 @@ class APIConfig:
     port: int = 5000
     debug: bool = True
     
-    # Model settings
-    default_model: str = 'random_forest'
+    # Model settings ('best' serves the best model of the active training run)
+    default_model: str = 'best'
     model_dir: str = 'models'
     
+    # Memory budget for lazily loaded models; idle models beyond it are evicted (0 = unlimited)
+    model_memory_budget_mb: float = 1024.0
+    
+    # Load models from their memory-mapped *_model.shared files so pre-forked
+    # workers share one physical copy of the large arrays
+    shared_model_loading: bool = False
+    
+    # Code assigned to categories not seen during training
+    unknown_category_code: int = 0
+    
+    # Inference path: 'standard' (sklearn predict), 'lean' (model arrays where possible),
+    # 'compiled' (flat-array tree ensembles, see compiled_trees.py)
+    # or 'materialized' (precomputed lookup table, see materialized.py)
+    inference_mode: str = 'standard'
+    
+    # Lookup table resolution for the materialized mode; requests outside the
+    # table's experience / remote ratio range get an error instead of a prediction
+    lookup_experience_step: float = 1.0
+    lookup_remote_step: float = 25.0
+    
+    # Confidence intervals for bagged tree ensembles: 'normal' (z * std) or 'quantile'
+    interval_method: str = 'normal'
+    interval_z: float = 1.96
+    interval_quantiles: Tuple[float, float] = (0.025, 0.975)
+    
+    # Prediction cache (size 0 disables it; ttl None keeps entries until evicted)
+    prediction_cache_size: int = 1024
+    prediction_cache_ttl: Optional[float] = 3600.0
+    
+    # Micro-batching for the ASGI server (async_api.py): concurrent /predict calls are
+    # grouped into one model call of at most this many rows, waiting at most this long
+    max_batch_size: int = 64
+    max_batch_wait_us: int = 500
+    
+    # Seconds between checks for a newly activated artifact bundle (0 disables hot reload)
+    reload_interval: float = 10.0
+    
+    # Per-stage latency histograms and request counters, served on /metrics in the
+    # Prometheus text format (off: no timing at all, and /metrics returns 404)
+    metrics_enabled: bool = True
+    
+    # Sampling profiler at /debug/profile?seconds=N (see profiling.py): off by default,
+    # and when enabled it requires this token in an X-Profile-Token header
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None
+    profiling_max_seconds: float = 60.0
+    
     # API rate limiting
     rate_limit: str = '100/hour'
     
@@ -107,6 +287,28 @@ class Config:
         # Data paths
         self.data.raw_data_path = os.getenv('RAW_DATA_PATH', self.data.raw_data_path)
         self.data.models_dir = os.getenv('MODELS_DIR', self.data.models_dir)
+        self.data.split_format = os.getenv('SPLIT_FORMAT', self.data.split_format)
+        self.data.processing_mode = os.getenv('PROCESSING_MODE', self.data.processing_mode)
+        self.data.chunk_size = int(os.getenv('CHUNK_SIZE', self.data.chunk_size))
+        self.data.stage_cache_dir = os.getenv('STAGE_CACHE_DIR', self.data.stage_cache_dir)
+        self.data.stage_cache_max_mb = float(os.getenv('STAGE_CACHE_MAX_MB', self.data.stage_cache_max_mb))
+        
+        # Training settings
+        self.model.training_n_jobs = int(os.getenv('TRAINING_N_JOBS', self.model.training_n_jobs))
+        self.model.training_backend = os.getenv('TRAINING_BACKEND', self.model.training_backend)
+        self.model.training_mode = os.getenv('TRAINING_MODE', self.model.training_mode)
+        self.model.gradient_boosting_backend = os.getenv('GRADIENT_BOOSTING_BACKEND',
+                                                         self.model.gradient_boosting_backend)
+        self.model.linear_engine = os.getenv('LINEAR_ENGINE', self.model.linear_engine)
+        self.model.linear_alpha_selection = os.getenv('LINEAR_ALPHA_SELECTION', self.model.linear_alpha_selection)
+        self.model.search_method = os.getenv('SEARCH_METHOD', self.model.search_method)
+        self.model.search_n_jobs = int(os.getenv('SEARCH_N_JOBS', self.model.search_n_jobs))
+        self.model.selection_method = os.getenv('SELECTION_METHOD', self.model.selection_method)
+        self.model.cv_folds = int(os.getenv('CV_FOLDS', self.model.cv_folds))
+        self.model.cv_repeats = int(os.getenv('CV_REPEATS', self.model.cv_repeats))
+        self.model.cv_group_column = os.getenv('CV_GROUP_COLUMN', self.model.cv_group_column)
+        self.model.cv_n_jobs = int(os.getenv('CV_N_JOBS', self.model.cv_n_jobs))
+        self.model.use_tuned_params = os.getenv('USE_TUNED_PARAMS', str(self.model.use_tuned_params)).lower() == 'true'
         
         # API settings
         self.api.host = os.getenv('API_HOST', self.api.host)
@@ -115,16 +317,35 @@ class Config:
         
         # Model settings
         self.api.default_model = os.getenv('DEFAULT_MODEL', self.api.default_model)
+        self.api.model_memory_budget_mb = float(os.getenv('MODEL_MEMORY_BUDGET_MB', self.api.model_memory_budget_mb))
+        self.api.shared_model_loading = os.getenv('SHARED_MODEL_LOADING', str(self.api.shared_model_loading)).lower() == 'true'
+        self.api.inference_mode = os.getenv('INFERENCE_MODE', self.api.inference_mode)
+        self.api.interval_method = os.getenv('INTERVAL_METHOD', self.api.interval_method)
+        self.api.prediction_cache_size = int(os.getenv('PREDICTION_CACHE_SIZE', self.api.prediction_cache_size))
+        self.api.max_batch_size = int(os.getenv('MAX_BATCH_SIZE', self.api.max_batch_size))
+        self.api.max_batch_wait_us = int(os.getenv('MAX_BATCH_WAIT_US', self.api.max_batch_wait_us))
+        self.api.metrics_enabled = os.getenv('METRICS_ENABLED', str(self.api.metrics_enabled)).lower() == 'true'
+        self.api.profiling_enabled = os.getenv('PROFILING_ENABLED', str(self.api.profiling_enabled)).lower() == 'true'
+        self.api.profiling_token = os.getenv('PROFILING_TOKEN', self.api.profiling_token)
+        self.api.reload_interval = float(os.getenv('MODEL_RELOAD_INTERVAL', self.api.reload_interval))
     
     def get_model_params(self, model_name: str) -> Dict[str, Any]:
         """Get parameters for a specific model"""
         param_map = {
             'random_forest': self.model.random_forest_params,
             'gradient_boosting': self.model.gradient_boosting_params,
-            'linear_models': self.model.linear_models_params
+            'hist_gradient_boosting': self.model.hist_gradient_boosting_params,
+            'linear_models': self.model.linear_models_params,
+            'support_vector': self.model.support_vector_params
         }
         return param_map.get(model_name, {})
     
+    def get_search_space(self, model_name: str) -> Optional[Dict[str, List[Any]]]:
+        """Search space for a model; histogram gradient boosting has its own"""
+        if model_name == 'gradient_boosting' and self.model.gradient_boosting_backend == 'histogram':
+            model_name = 'hist_gradient_boosting'
+        return self.model.search_spaces.get(model_name)
+    
     def create_directories(self):
         """Create necessary directories"""
         directories = [
@@ -143,12 +364,57 @@ class Config:
             print(f"Warning: Raw data file not found: {self.data.raw_data_path}")
             return False
         
+        # Validate data processing settings
+        if self.data.split_format not in ('csv', 'npy', 'parquet'):
+            print(f"Error: Invalid split_format: {self.data.split_format}")
+            return False
+        
+        if self.data.processing_mode not in ('batch', 'streaming', 'incremental'):
+            print(f"Error: Invalid processing_mode: {self.data.processing_mode}")
+            return False
+        
         # Validate model parameters
         if self.model.test_size <= 0 or self.model.test_size >= 1:
             print(f"Error: Invalid test_size: {self.model.test_size}")
             return False
         
+        if self.model.training_mode not in ('full', 'incremental'):
+            print(f"Error: Invalid training_mode: {self.model.training_mode}")
+            return False
+        
+        if self.model.gradient_boosting_backend not in ('exact', 'histogram'):
+            print(f"Error: Invalid gradient_boosting_backend: {self.model.gradient_boosting_backend}")
+            return False
+        
+        if self.model.linear_engine not in ('gram', 'sklearn'):
+            print(f"Error: Invalid linear_engine: {self.model.linear_engine}")
+            return False
+        
+        if self.model.linear_alpha_selection not in ('fixed', 'path'):
+            print(f"Error: Invalid linear_alpha_selection: {self.model.linear_alpha_selection}")
+            return False
+        
+        if self.model.selection_method not in ('holdout', 'cv'):
+            print(f"Error: Invalid selection_method: {self.model.selection_method}")
+            return False
+        
+        if self.model.search_method not in ('halving', 'hyperband'):
+            print(f"Error: Invalid search_method: {self.model.search_method}")
+            return False
+        
         # Validate API settings
+        if self.api.inference_mode not in ('standard', 'lean', 'compiled', 'materialized'):
+            print(f"Error: Invalid inference_mode: {self.api.inference_mode}")
+            return False
+        
+        if self.api.interval_method not in ('normal', 'quantile'):
+            print(f"Error: Invalid interval_method: {self.api.interval_method}")
+            return False
+        
+        if self.api.profiling_enabled and not self.api.profiling_token:
+            print("Error: Invalid profiling_token: required when profiling is enabled")
+            return False
+        
         if self.api.port < 1024 or self.api.port > 65535:
             print(f"Error: Invalid port number: {self.api.port}")
             return False
@@ -0,0 +1,217 @@
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, cpu_count, effective_n_jobs, parallel_config
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
+from sklearn.model_selection import KFold
+from data_processing import DataProcessor, load_train_rows
+from encoders import CompiledEncoder
+from model_training import ModelTrainer
+from profiling import profile_from_argv
+from config import config
+
+CV_RESULTS_FILE = 'cv_results.csv'
+
+def prepare_fold(df, train_idx, valid_idx):
+    """Encode and scale one fold, fitting the preprocessors on its training rows only"""
+    start_time = time.perf_counter()
+    processor = DataProcessor()
+    train = processor.encode_categorical_features(df.iloc[train_idx].copy())
+    
+    # Categories that only occur in the validation rows get the unknown code, as at inference
+    encoder = CompiledEncoder.from_label_encoders(processor.label_encoders, config.api.unknown_category_code)
+    valid = df.iloc[valid_idx].copy()
+    for col in encoder.columns:
+        valid[col] = encoder.encode_array(col, valid[col].tolist())
+    
+    X_train, y_train = processor.prepare_features(processor.create_features(train))
+    X_valid, y_valid = processor.prepare_features(processor.create_features(valid))
+    X_train, X_valid = processor.scale_features(X_train, X_valid)
+    
+    return {
+        'X_train': X_train,
+        'X_valid': X_valid,
+        'y_train': y_train.to_numpy(),
+        'y_valid': y_valid.to_numpy(),
+        'prep_time': time.perf_counter() - start_time
+    }
+
+def evaluate_fold(model_name, model, fold):
+    """Fit a fresh copy of a model on one prepared fold and score it"""
+    try:
+        model = clone(model)
+        start_time = time.perf_counter()
+        model.fit(fold['X_train'], fold['y_train'])
+        fit_time = time.perf_counter() - start_time
+        
+        y_pred = model.predict(fold['X_valid'])
+        return {
+            'r2': r2_score(fold['y_valid'], y_pred),
+            'rmse': np.sqrt(mean_squared_error(fold['y_valid'], y_pred)),
+            'mae': mean_absolute_error(fold['y_valid'], y_pred),
+            'fit_time': fit_time
+        }, None
+    except Exception as e:
+        return None, str(e)
+
+class CrossValidator:
+    """K-fold cross-validation of every model, run as parallel (model x fold) jobs.
+    
+    Folds are optionally repeated with different shuffles and grouped by a
+    column, so that all rows of a group (e.g. one company) are held out
+    together. Each fold is encoded and scaled once, in its own job, and
+    the prepared arrays are shared by all the models scored on it.
+    """
+    
+    def __init__(self, n_splits=None, n_repeats=None, group_column=None, n_jobs=None, random_state=None):
+        self.n_splits = n_splits or config.model.cv_folds
+        self.n_repeats = n_repeats or config.model.cv_repeats
+        self.group_column = group_column if group_column is not None else config.model.cv_group_column
+        self.n_jobs = n_jobs if n_jobs is not None else config.model.cv_n_jobs
+        self.random_state = random_state if random_state is not None else config.model.random_state
+        self.fold_records = []
+    
+    def make_folds(self, df):
+        """(repeat, train indices, validation indices) of every fold"""
+        folds = []
+        for repeat in range(self.n_repeats):
+            seed = self.random_state + repeat
+            if self.group_column:
+                # Shuffled groups dealt into n_splits folds; a group never spans two folds
+                groups = df[self.group_column].to_numpy()
+                unique_groups = np.random.default_rng(seed).permutation(pd.unique(groups))
+                if len(unique_groups) < self.n_splits:
+                    raise ValueError(f"{len(unique_groups)} groups in {self.group_column} "
+                                     f"cannot fill {self.n_splits} folds")
+                for fold_groups in np.array_split(unique_groups, self.n_splits):
+                    valid = np.isin(groups, fold_groups)
+                    folds.append((repeat, np.flatnonzero(~valid), np.flatnonzero(valid)))
+            else:
+                kfold = KFold(n_splits=self.n_splits, shuffle=True, random_state=seed)
+                folds += [(repeat, train_idx, valid_idx) for train_idx, valid_idx in kfold.split(df)]
+        return folds
+    
+    def run(self, df, models):
+        """Cross-validate {name: estimator} on cleaned, unencoded rows; return a summary per model"""
+        folds = self.make_folds(df)
+        n_workers = min(effective_n_jobs(self.n_jobs), len(folds) * len(models))
+        
+        # Split cores between workers so models with their own n_jobs don't oversubscribe
+        models = {name: clone(model) for name, model in models.items()}
+        for model in models.values():
+            if 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=max(1, cpu_count() // n_workers))
+        
+        print(f"Cross-validating {len(models)} models on {len(folds)} folds "
+              f"({self.n_repeats} x {self.n_splits}{', grouped by ' + self.group_column if self.group_column else ''}) "
+              f"with {n_workers} workers...")
+        
+        with parallel_config(backend=config.model.training_backend):
+            prepared = Parallel(n_jobs=min(n_workers, len(folds)))(
+                delayed(prepare_fold)(df, train_idx, valid_idx) for _, train_idx, valid_idx in folds
+            )
+            outputs = Parallel(n_jobs=n_workers)(
+                delayed(evaluate_fold)(model_name, model, fold)
+                for model_name, model in models.items() for fold in prepared
+            )
+        
+        jobs = [(model_name, index) for model_name in models for index in range(len(folds))]
+        self.fold_records = []
+        for (model_name, index), (record, error) in zip(jobs, outputs):
+            if error is not None:
+                print(f"Error cross-validating {model_name} on fold {index}: {error}")
+                continue
+            repeat, train_idx, valid_idx = folds[index]
+            self.fold_records.append(dict(record, model_name=model_name, fold=index, repeat=repeat,
+                                          train_rows=len(train_idx), valid_rows=len(valid_idx),
+                                          prep_time=prepared[index]['prep_time']))
+        return self.summarize()
+    
+    def summarize(self):
+        """Aggregate the fold records into the metrics added to the training history"""
+        summary = {}
+        records = pd.DataFrame(self.fold_records)
+        if records.empty:
+            return summary
+        
+        for model_name, group in records.groupby('model_name', sort=False):
+            summary[model_name] = {
+                'cv_r2_mean': group['r2'].mean(),
+                'cv_r2_std': group['r2'].std(ddof=0),
+                'cv_rmse_mean': group['rmse'].mean(),
+                'cv_mae_mean': group['mae'].mean(),
+                'cv_folds': len(group),
+                'cv_fit_time_mean': group['fit_time'].mean(),
+                'cv_fit_times': [round(t, 6) for t in group['fit_time']]
+            }
+        return summary
+    
+    def save_fold_records(self, model_dir='models'):
+        """Write one row per (model, fold) next to the training history"""
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, CV_RESULTS_FILE)
+        pd.DataFrame(self.fold_records).to_csv(path, index=False)
+        return path
+
+def load_training_rows(file_path=None):
+    """Cleaned raw rows of the training split written by data processing"""
+    processor = DataProcessor()
+    df = processor.load_data(file_path or config.data.raw_data_path)
+    if df is None:
+        return None
+    
+    # Select the rows recorded by the processing run, whichever mode wrote the split
+    positions = load_train_rows()
+    if positions is not None and (len(positions) == 0 or positions.max() < len(df)):
+        return df.iloc[positions].reset_index(drop=True)
+    
+    print("Warning: no training split recorded for this dataset; re-splitting it as batch processing does")
+    df = processor.clean_data(df)
+    train, _, _, _ = processor.split_data(df, df[config.data.target_column])
+    return train.reset_index(drop=True)
+
+def cross_validate_models(models, file_path=None, model_dir='models'):
+    """Cross-validate the given models on the training rows and save the fold records"""
+    df = load_training_rows(file_path)
+    if df is None:
+        return {}
+    
+    validator = CrossValidator()
+    summary = validator.run(df, models)
+    validator.save_fold_records(model_dir)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validate every model on the training rows')
+    parser.add_argument('--folds', type=int, default=None)
+    parser.add_argument('--repeats', type=int, default=None)
+    parser.add_argument('--group-by', default=None, help='keep the rows of each value of this column in one fold')
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+    
+    df = load_training_rows()
+    if df is None:
+        return
+    
+    trainer = ModelTrainer()
+    trainer.initialize_models()
+    validator = CrossValidator(args.folds, args.repeats, args.group_by, args.n_jobs)
+    
+    start_time = time.perf_counter()
+    summary = validator.run(df, trainer.models)
+    path = validator.save_fold_records(config.data.models_dir)
+    
+    print(f"\n{'model':<20} {'CV R²':>8} {'± std':>7} {'CV RMSE':>12} {'fit (s)':>8}")
+    for model_name, metrics in sorted(summary.items(), key=lambda item: -item[1]['cv_r2_mean']):
+        print(f"{model_name:<20} {metrics['cv_r2_mean']:>8.4f} {metrics['cv_r2_std']:>7.4f} "
+              f"{metrics['cv_rmse_mean']:>12.2f} {metrics['cv_fit_time_mean']:>8.3f}")
+    print(f"\n{len(validator.fold_records)} fold fits in {time.perf_counter() - start_time:.2f}s; "
+          f"fold results saved to {path}")
+
+if __name__ == "__main__":
+    with profile_from_argv('cross_validation'):
+        main()
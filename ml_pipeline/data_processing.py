@@ -4,14 +4,80 @@ import numpy as np
 from sklearn.preprocessing import LabelEncoder, StandardScaler, MinMaxScaler
 from sklearn.model_selection import train_test_split
 import joblib
+import json
 import os
+from encoders import CompiledEncoder
+from split_storage import get_split_storage
+from profiling import profile_from_argv
+from config import config
+
+# Progress of the raw dataset, so incremental runs only process appended rows
+PROCESSING_STATE_FILE = 'processing_state.json'
+ROW_DIGESTS_FILE = 'row_digests.npy'
+
+# Raw row positions of the training split, in split order, so later steps select the same rows
+TRAIN_ROWS_FILE = 'train_rows.npy'
+
+def row_digests(df):
+    """64-bit digest of each raw row, used to drop duplicates across runs.
+    
+    Hashes depend on dtypes, so categorical and text columns are hashed as
+    strings and numeric columns as float64: a row gets the same digest whether
+    the CSV reader inferred int64 (batch and incremental reads) or was
+    told float64 (streaming chunks).
+    """
+    categorical = set(config.data.categorical_features)
+    normalized = df.astype({col: str if col in categorical or not pd.api.types.is_numeric_dtype(dtype)
+                            else 'float64' for col, dtype in df.dtypes.items()})
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+def load_processing_state(data_dir=None):
+    """Return the saved processing state and raw row digests, or (None, None)"""
+    data_dir = data_dir or config.data.processed_data_dir
+    path = os.path.join(data_dir, PROCESSING_STATE_FILE)
+    if not os.path.exists(path):
+        return None, None
+    with open(path, 'r') as f:
+        state = json.load(f)
+    return state, np.load(os.path.join(data_dir, ROW_DIGESTS_FILE))
+
+def save_processing_state(state, digests, data_dir=None):
+    """Save how much of the raw dataset has been processed"""
+    data_dir = data_dir or config.data.processed_data_dir
+    os.makedirs(data_dir, exist_ok=True)
+    np.save(os.path.join(data_dir, ROW_DIGESTS_FILE), np.asarray(digests, dtype=np.uint64))
+    with open(os.path.join(data_dir, PROCESSING_STATE_FILE), 'w') as f:
+        json.dump(state, f, indent=2)
+
+def train_rows_path(data_dir=None):
+    return os.path.join(data_dir or config.data.processed_data_dir, TRAIN_ROWS_FILE)
+
+def save_train_rows(positions, data_dir=None):
+    """Save the raw row positions of the training split"""
+    os.makedirs(data_dir or config.data.processed_data_dir, exist_ok=True)
+    np.save(train_rows_path(data_dir), np.asarray(positions, dtype=np.int64))
+
+def load_train_rows(data_dir=None):
+    """Return the raw row positions of the training split, or None if they were not saved"""
+    path = train_rows_path(data_dir)
+    if not os.path.exists(path):
+        return None
+    return np.load(path)
+
+def clear_pending_increment(data_dir=None):
+    """Mark the processed increment as consumed by training"""
+    state, digests = load_processing_state(data_dir)
+    if state is not None and state.get('pending'):
+        state['pending'] = None
+        save_processing_state(state, digests, data_dir)
 
 class DataProcessor:
     def __init__(self):
         self.label_encoders = {}
         self.scaler = StandardScaler()
         self.feature_columns = []
-        
+        self.salary_bounds = None
+    
     def load_data(self, file_path):
         """Load salary dataset from CSV file"""
         try:
@@ -35,6 +101,7 @@ class DataProcessor:
         Q3 = df['salary'].quantile(0.75)
         IQR = Q3 - Q1
         df = df[~((df['salary'] < (Q1 - 1.5 * IQR)) | (df['salary'] > (Q3 + 1.5 * IQR)))]
+        self.salary_bounds = (float(Q1 - 1.5 * IQR), float(Q3 + 1.5 * IQR))
         
         print(f"Data cleaned. Final shape: {df.shape}")
         return df
@@ -107,6 +174,13 @@ class DataProcessor:
         joblib.dump(self.label_encoders, f'{model_dir}/label_encoders.pkl')
         joblib.dump(self.scaler, f'{model_dir}/scaler.pkl')
         joblib.dump(self.feature_columns, f'{model_dir}/feature_columns.pkl')
+        
+        # Save lookup tables used for fast encoding at inference
+        self.compile_encoders().save(f'{model_dir}/compiled_encoders.pkl')
+    
+    def compile_encoders(self):
+        """Lookup tables for the fitted label encoders"""
+        return CompiledEncoder.from_label_encoders(self.label_encoders)
     
     def load_preprocessors(self, model_dir='models'):
         """Load saved preprocessors"""
@@ -114,13 +188,28 @@ class DataProcessor:
         self.scaler = joblib.load(f'{model_dir}/scaler.pkl')
         self.feature_columns = joblib.load(f'{model_dir}/feature_columns.pkl')
 
-def main():
+def main(file_path=None):
+    if config.data.processing_mode == 'streaming':
+        from streaming_processing import main as streaming_main
+        return streaming_main(file_path)
+    if config.data.processing_mode == 'incremental':
+        from incremental_processing import main as incremental_main
+        return incremental_main(file_path)
+    return process_batch(file_path)
+
+def process_batch(file_path=None):
+    """Process the whole raw dataset in memory"""
     # Initialize processor
     processor = DataProcessor()
     
     # Load and process data
-    df = processor.load_data('data/salary_dataset.csv')
+    file_path = file_path or config.data.raw_data_path
+    df = processor.load_data(file_path)
     if df is not None:
+        n_raw_rows = len(df)
+        n_raw_bytes = os.path.getsize(file_path)
+        digests = row_digests(df)
+        
         df = processor.clean_data(df)
         df = processor.encode_categorical_features(df)
         df = processor.create_features(df)
@@ -131,17 +220,29 @@ def main():
         # Scale features
         X_train_scaled, X_test_scaled = processor.scale_features(X_train, X_test)
         
-        # Save processed data
-        os.makedirs('data', exist_ok=True)
-        pd.DataFrame(X_train_scaled).to_csv('data/X_train_processed.csv', index=False)
-        pd.DataFrame(X_test_scaled).to_csv('data/X_test_processed.csv', index=False)
-        pd.DataFrame(y_train).to_csv('data/y_train.csv', index=False)
-        pd.DataFrame(y_test).to_csv('data/y_test.csv', index=False)
+        # Save processed data with feature names
+        storage = get_split_storage()
+        storage.save('X_train_processed', pd.DataFrame(X_train_scaled, columns=processor.feature_columns))
+        storage.save('X_test_processed', pd.DataFrame(X_test_scaled, columns=processor.feature_columns))
+        storage.save('y_train', y_train)
+        storage.save('y_test', y_test)
         
         # Save preprocessors
         processor.save_preprocessors()
         
+        # The cleaned rows keep the raw reader's index, i.e. their raw row positions
+        save_train_rows(X_train.index)
+        
+        # Later incremental runs start after these rows
+        save_processing_state({
+            'rows_processed': n_raw_rows,
+            'bytes_processed': n_raw_bytes,
+            'salary_bounds': processor.salary_bounds,
+            'pending': None
+        }, digests)
+        
         print("Data processing completed successfully!")
 
 if __name__ == "__main__":
-    main()
+    with profile_from_argv('data_processing'):
+        main()
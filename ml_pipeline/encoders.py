@@ -0,0 +1,51 @@
+
+import numpy as np
+
+class CompiledEncoder:
+    """Dictionary-based categorical encoder compiled from fitted LabelEncoders.
+    
+    Each column is a plain hash map from category to integer code, so encoding
+    is an O(1) lookup and unknown categories fall back to `unknown_value`
+    without raising.
+    """
+    
+    def __init__(self, mappings, unknown_value=0):
+        self.mappings = mappings
+        self.unknown_value = unknown_value
+    
+    @classmethod
+    def from_label_encoders(cls, label_encoders, unknown_value=0):
+        """Compile a {column: LabelEncoder} dict into lookup tables"""
+        mappings = {
+            col: {category: code for code, category in enumerate(encoder.classes_.tolist())}
+            for col, encoder in label_encoders.items()
+        }
+        return cls(mappings, unknown_value)
+    
+    @property
+    def columns(self):
+        """Columns this encoder knows how to encode"""
+        return list(self.mappings.keys())
+    
+    def encode(self, col, value):
+        """Encode a single category value"""
+        return self.mappings[col].get(value, self.unknown_value)
+    
+    def encode_array(self, col, values):
+        """Encode a sequence of category values into an int64 array"""
+        lookup = self.mappings[col].get
+        unknown_value = self.unknown_value
+        return np.fromiter((lookup(value, unknown_value) for value in values),
+                           dtype=np.int64, count=len(values))
+    
+    def save(self, file_path):
+        """Save lookup tables as plain Python objects"""
+        import joblib
+        joblib.dump({'mappings': self.mappings, 'unknown_value': self.unknown_value}, file_path)
+    
+    @classmethod
+    def load(cls, file_path):
+        """Load lookup tables saved with `save`"""
+        import joblib
+        state = joblib.load(file_path)
+        return cls(state['mappings'], state['unknown_value'])
@@ -0,0 +1,276 @@
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from datetime import datetime
+import numpy as np
+from joblib import Parallel, delayed, cpu_count, effective_n_jobs, parallel_config
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterGrid, ParameterSampler
+from model_training import ModelTrainer, TUNED_PARAMS_FILE, data_fingerprint, load_processed_data, load_tuned_params
+from profiling import profile_from_argv
+from config import config
+
+def write_json_atomic(path, payload):
+    """Write a JSON file so readers never see it half written"""
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+def budget_parameter(estimator):
+    """Ensembles are budgeted by their number of trees, other models by training rows"""
+    return 'n_estimators' if 'n_estimators' in estimator.get_params() else 'fraction'
+
+def evaluate_fold(estimator, params, budget_name, budget, X, y, train_idx, valid_idx, cache_path):
+    """Fit one candidate on one fold at a given budget and cache its validation R²"""
+    model = clone(estimator).set_params(**params)
+    if budget_name == 'n_estimators':
+        model.set_params(n_estimators=budget)
+    else:
+        # Leading rows of a shuffled fold, so a larger budget sees a superset of the data
+        train_idx = train_idx[:max(2, int(math.ceil(budget * len(train_idx))))]
+    
+    start_time = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    record = {
+        'score': float(r2_score(y[valid_idx], model.predict(X[valid_idx]))),
+        'fit_time': time.perf_counter() - start_time
+    }
+    
+    write_json_atomic(cache_path, record)
+    return record
+
+class HyperparameterSearch:
+    """Successive halving and Hyperband over the search spaces in ModelConfig.
+    
+    Candidates are first scored by K-fold cross-validation on a small
+    budget (few trees, or a fraction of the training rows); only the best
+    1/eta of them move on to the next rung with eta times the budget, until
+    the survivors are scored at the full budget. Hyperband runs several
+    such brackets that trade the number of candidates against the starting
+    budget.
+    
+    Every (candidate, budget, fold) evaluation runs as its own task on a
+    joblib process pool and is cached as a small JSON file keyed by the
+    model, parameters, budget, fold and data, so an interrupted search
+    resumes where it stopped.
+    """
+    
+    def __init__(self, method=None, n_candidates=None, eta=None, cv_folds=None, n_jobs=None,
+                 cache_dir=None, random_state=None):
+        self.method = method or config.model.search_method
+        if self.method not in ('halving', 'hyperband'):
+            raise ValueError("Method must be 'halving' or 'hyperband'")
+        
+        self.n_candidates = n_candidates or config.model.search_candidates
+        self.eta = eta or config.model.search_eta
+        self.cv_folds = cv_folds or config.model.search_cv_folds
+        self.n_jobs = n_jobs if n_jobs is not None else config.model.search_n_jobs
+        self.cache_dir = cache_dir or os.path.join(config.data.models_dir, 'search_cache')
+        self.random_state = random_state if random_state is not None else config.model.random_state
+        
+        self.fingerprint = None
+        self.evaluations = 0
+        self.cache_hits = 0
+    
+    def make_folds(self, X):
+        """Fixed K-fold splits; training indices are shuffled once for data-fraction budgets"""
+        kfold = KFold(n_splits=self.cv_folds, shuffle=True, random_state=self.random_state)
+        rng = np.random.default_rng(self.random_state)
+        return [(rng.permutation(train_idx), valid_idx) for train_idx, valid_idx in kfold.split(X)]
+    
+    def sample_candidates(self, space, n_candidates, seed):
+        """The whole grid when it is small enough, otherwise a random sample of it"""
+        grid = ParameterGrid(space)
+        if len(grid) <= n_candidates:
+            return list(grid)
+        return list(ParameterSampler(space, n_candidates, random_state=seed))
+    
+    def budget_range(self, estimator):
+        """Smallest and full budget for an estimator"""
+        if budget_parameter(estimator) == 'n_estimators':
+            max_budget = estimator.get_params()['n_estimators']
+            return min(config.model.search_min_estimators, max_budget), max_budget
+        return config.model.search_min_fraction, 1.0
+    
+    def rung_budgets(self, min_budget, max_budget, n_rungs):
+        """Budgets growing by eta per rung and ending at the full budget"""
+        budgets = [max_budget / self.eta ** (n_rungs - 1 - rung) for rung in range(n_rungs)]
+        budgets = [max(min_budget, budget) for budget in budgets]
+        budgets[-1] = max_budget
+        return budgets
+    
+    def cache_path(self, model_name, estimator, params, budget, fold):
+        """Cache file of one evaluation"""
+        key = json.dumps({
+            'model': model_name,
+            'estimator': type(estimator).__name__,
+            'base_params': estimator.get_params(),
+            'params': params,
+            'budget': budget,
+            'fold': fold,
+            'cv_folds': self.cv_folds,
+            'random_state': self.random_state,
+            'data': self.fingerprint
+        }, sort_keys=True, default=str)
+        return os.path.join(self.cache_dir, model_name, hashlib.sha256(key.encode()).hexdigest()[:24] + '.json')
+    
+    def evaluate(self, model_name, estimator, candidates, budget, X, y, folds):
+        """Mean cross-validated R² of each candidate at one budget"""
+        budget_name = budget_parameter(estimator)
+        if budget_name == 'n_estimators':
+            budget = int(round(budget))
+        
+        os.makedirs(os.path.join(self.cache_dir, model_name), exist_ok=True)
+        records = {}
+        tasks = []
+        for index, params in enumerate(candidates):
+            for fold, (train_idx, valid_idx) in enumerate(folds):
+                path = self.cache_path(model_name, estimator, params, budget, fold)
+                if os.path.exists(path):
+                    with open(path, 'r') as f:
+                        records[index, fold] = json.load(f)
+                    self.cache_hits += 1
+                else:
+                    tasks.append((index, fold, params, train_idx, valid_idx, path))
+        
+        if tasks:
+            n_workers = min(effective_n_jobs(self.n_jobs), len(tasks))
+            
+            # Split cores between workers so models with their own n_jobs don't oversubscribe
+            worker_estimator = clone(estimator)
+            if 'n_jobs' in worker_estimator.get_params():
+                worker_estimator.set_params(n_jobs=max(1, cpu_count() // n_workers))
+            
+            with parallel_config(backend=config.model.training_backend):
+                outputs = Parallel(n_jobs=n_workers)(
+                    delayed(evaluate_fold)(worker_estimator, params, budget_name, budget,
+                                           X, y, train_idx, valid_idx, path)
+                    for _, _, params, train_idx, valid_idx, path in tasks
+                )
+            for (index, fold, _, _, _, _), record in zip(tasks, outputs):
+                records[index, fold] = record
+            self.evaluations += len(tasks)
+        
+        trials = []
+        for index, params in enumerate(candidates):
+            fold_scores = [records[index, fold]['score'] for fold in range(len(folds))]
+            trials.append({
+                'params': params,
+                'budget': {budget_name: budget},
+                'score': float(np.mean(fold_scores)),
+                'fold_scores': fold_scores
+            })
+        return trials
+    
+    def successive_halving(self, model_name, estimator, candidates, budgets, X, y, folds):
+        """Keep the best 1/eta of the candidates at each rung; return every trial"""
+        history = []
+        for rung, budget in enumerate(budgets):
+            trials = self.evaluate(model_name, estimator, candidates, budget, X, y, folds)
+            for trial in trials:
+                trial['full_budget'] = rung == len(budgets) - 1
+            history += trials
+            print(f"  rung {rung}: {len(candidates)} candidates at {trials[0]['budget']}, "
+                  f"best CV R² {max(trial['score'] for trial in trials):.4f}")
+            
+            if rung < len(budgets) - 1:
+                ranked = sorted(trials, key=lambda trial: trial['score'], reverse=True)
+                candidates = [trial['params'] for trial in ranked[:max(1, len(candidates) // self.eta)]]
+        return history
+    
+    def search(self, model_name, estimator, X, y):
+        """Search one model's space and return its best full-budget trial and all trials"""
+        space = config.get_search_space(model_name)
+        folds = self.make_folds(X)
+        min_budget, max_budget = self.budget_range(estimator)
+        s_max = max(0, int(math.floor(math.log(max_budget / min_budget, self.eta) + 1e-9)))
+        
+        history = []
+        if self.method == 'halving':
+            candidates = self.sample_candidates(space, self.n_candidates, self.random_state)
+            budgets = self.rung_budgets(min_budget, max_budget, s_max + 1)
+            history += self.successive_halving(model_name, estimator, candidates, budgets, X, y, folds)
+        else:
+            # Brackets from many candidates on a small budget to few candidates on the full budget
+            for s in range(s_max, -1, -1):
+                n_candidates = int(math.ceil((s_max + 1) / (s + 1) * self.eta ** s))
+                candidates = self.sample_candidates(space, n_candidates, self.random_state + s)
+                print(f" bracket s={s}")
+                budgets = self.rung_budgets(min_budget, max_budget, s + 1)
+                history += self.successive_halving(model_name, estimator, candidates, budgets, X, y, folds)
+        
+        best = max((trial for trial in history if trial['full_budget']), key=lambda trial: trial['score'])
+        return best, history
+    
+    def run(self, X, y, model_names=None):
+        """Search every model with a search space and return the best trial per model"""
+        trainer = ModelTrainer()
+        trainer.initialize_models(use_tuned_params=False)
+        model_names = model_names or [name for name in trainer.models if config.get_search_space(name)]
+        
+        self.fingerprint = data_fingerprint(X, y)
+        results = {}
+        for model_name in model_names:
+            if not config.get_search_space(model_name):
+                print(f"No search space configured for {model_name}; skipping")
+                continue
+            
+            print(f"Searching {model_name} ({self.method}, eta={self.eta}, {self.cv_folds}-fold CV)...")
+            start_time = time.perf_counter()
+            best, history = self.search(model_name, trainer.models[model_name], X, y)
+            results[model_name] = {
+                'estimator': type(trainer.models[model_name]).__name__,
+                'params': best['params'],
+                'cv_r2': best['score'],
+                'budget': best['budget'],
+                'method': self.method,
+                'trials': len(history),
+                'search_time': time.perf_counter() - start_time,
+                'data_fingerprint': self.fingerprint,
+                'timestamp': datetime.now().isoformat()
+            }
+            print(f"{model_name} - best CV R²: {best['score']:.4f} with {best['params']}")
+        return results
+
+def save_tuned_params(results, model_dir='models'):
+    """Merge search results into the tuned parameters used by ModelTrainer"""
+    os.makedirs(model_dir, exist_ok=True)
+    tuned = load_tuned_params(model_dir)
+    tuned.update(results)
+    path = os.path.join(model_dir, TUNED_PARAMS_FILE)
+    write_json_atomic(path, tuned)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune model hyperparameters with successive halving or Hyperband')
+    parser.add_argument('--model', action='append', dest='models',
+                        help='model to tune (repeatable, default: every model with a search space)')
+    parser.add_argument('--method', choices=['halving', 'hyperband'], default=None)
+    parser.add_argument('--candidates', type=int, default=None)
+    parser.add_argument('--eta', type=int, default=None)
+    parser.add_argument('--cv-folds', type=int, default=None)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+    
+    X_train, _, y_train, _ = load_processed_data()
+    if X_train is None:
+        print("Please run data_processing.py first to prepare the data.")
+        return
+    
+    # Only the training split is searched; the test split stays held out for model_training.py
+    search = HyperparameterSearch(args.method, args.candidates, args.eta, args.cv_folds, args.n_jobs)
+    results = search.run(np.asarray(X_train), np.asarray(y_train), args.models)
+    
+    path = save_tuned_params(results, config.data.models_dir)
+    print(f"\n{search.evaluations} fold evaluations run, {search.cache_hits} reused from {search.cache_dir}")
+    print(f"Tuned parameters saved to {path}; model_training.py will use them")
+
+if __name__ == "__main__":
+    with profile_from_argv('hyperparameter_search'):
+        main()
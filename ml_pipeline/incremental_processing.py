@@ -0,0 +1,192 @@
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from data_processing import (DataProcessor, load_processing_state, load_train_rows, process_batch,
+                             row_digests, save_processing_state, save_train_rows)
+from encoders import CompiledEncoder
+from split_storage import get_split_storage
+from profiling import profile_from_argv
+from config import config
+
+class IncrementalDataProcessor(DataProcessor):
+    """Process only the raw rows appended since the last processing run.
+    
+    The saved compiled encoder is extended with new categories, which get
+    the next free codes so existing codes never change. The LabelEncoders
+    are left as fitted: their classes_ must stay sorted, so they cannot
+    hold codes assigned in arrival order. The scaler is updated with
+    `partial_fit` on the new training rows. The stored splits are brought
+    onto the updated scale with one affine pass, without re-encoding, and
+    the new rows are appended.
+    
+    Outlier bounds stay those of the full run, so earlier rows never move
+    in or out of the data. The scaler the models were last trained with is
+    kept as a pending increment until incremental training consumes it.
+    """
+    
+    def __init__(self, test_size=None, random_state=None, model_dir='models'):
+        super().__init__()
+        self.test_size = test_size if test_size is not None else config.model.test_size
+        self.random_state = random_state if random_state is not None else config.model.random_state
+        self.model_dir = model_dir
+        self.categorical_columns = config.data.categorical_features
+        self.target_column = config.data.target_column
+    
+    def read_new_rows(self, file_path, bytes_processed):
+        """Read the raw rows appended after the first bytes_processed bytes"""
+        if os.path.getsize(file_path) < bytes_processed:
+            raise ValueError(f"{file_path} is smaller than when it was last processed; "
+                             f"run full processing instead")
+        
+        columns = pd.read_csv(file_path, nrows=0).columns
+        with open(file_path, 'rb') as f:
+            f.seek(bytes_processed)
+            return pd.read_csv(f, header=None, names=columns)
+    
+    def clean_new_rows(self, df, seen_digests):
+        """Drop rows seen before, incomplete rows and rows outside the saved salary bounds"""
+        digests = row_digests(df)
+        keep = ~pd.Series(digests).duplicated().to_numpy() & ~np.isin(digests, seen_digests)
+        df = df[keep].dropna()
+        
+        lower, upper = self.salary_bounds
+        salary = df[self.target_column]
+        return df[~((salary < lower) | (salary > upper))]
+    
+    def load_preprocessors(self, model_dir='models'):
+        """Load saved preprocessors and the compiled encoder holding every assigned code"""
+        super().load_preprocessors(model_dir)
+        encoder_path = f'{model_dir}/compiled_encoders.pkl'
+        if os.path.exists(encoder_path):
+            self.encoder = CompiledEncoder.load(encoder_path)
+        else:
+            self.encoder = CompiledEncoder.from_label_encoders(self.label_encoders)
+    
+    def compile_encoders(self):
+        """The extended lookup tables, not a recompilation of the LabelEncoders"""
+        return self.encoder
+    
+    def extend_encoders(self, df):
+        """Give unseen categories the next free codes; return the number added per column"""
+        added = {}
+        for col in self.categorical_columns:
+            if col not in df.columns or col not in self.encoder.mappings:
+                continue
+            
+            mapping = self.encoder.mappings[col]
+            new_categories = sorted(set(df[col].astype(str)) - set(mapping))
+            next_code = max(mapping.values(), default=-1) + 1
+            for code, category in enumerate(new_categories, next_code):
+                mapping[category] = code
+            if new_categories:
+                added[col] = len(new_categories)
+        return added
+    
+    def encode_categorical_features(self, df):
+        """Encode with the saved (extended) lookup tables instead of refitting the encoders"""
+        df = df.copy()
+        for col in self.encoder.columns:
+            if col in df.columns:
+                df[col] = self.encoder.encode_array(col, df[col].astype(str).tolist())
+        return df
+    
+    def split_new_rows(self, X, y):
+        """Train/test split of the new rows (all train when there are too few)"""
+        if len(X) * (1 - self.test_size) < 1 or len(X) * self.test_size < 1:
+            return X, X.iloc[:0], y, y.iloc[:0]
+        return self.split_data(X, y, self.test_size, self.random_state)
+    
+    def rescale(self, X, old_mean, old_scale):
+        """Move rows scaled with the old scaler onto the current one"""
+        return (X * old_scale + old_mean - self.scaler.mean_) / self.scaler.scale_
+    
+    def process(self, file_path, storage=None):
+        """Process the appended rows; returns None when there is no saved state to extend"""
+        storage = storage or get_split_storage()
+        state, seen_digests = load_processing_state()
+        if state is None:
+            return None
+        
+        self.load_preprocessors(self.model_dir)
+        self.salary_bounds = tuple(state['salary_bounds'])
+        
+        raw = self.read_new_rows(file_path, state['bytes_processed'])
+        summary = {'raw_rows': len(raw), 'train_rows': 0, 'test_rows': 0, 'new_categories': {}}
+        if raw.empty:
+            return summary
+        
+        df = self.clean_new_rows(raw, seen_digests)
+        first_position = state['rows_processed']
+        state['rows_processed'] += len(raw)
+        state['bytes_processed'] = os.path.getsize(file_path)
+        seen_digests = np.concatenate([seen_digests, row_digests(raw)])
+        
+        if not df.empty:
+            summary['new_categories'] = self.extend_encoders(df)
+            df = self.encode_categorical_features(df)
+            df = self.create_features(df)
+            X, y = self.prepare_features(df)
+            X_train, X_test, y_train, y_test = self.split_new_rows(X, y)
+            
+            X_train_old = storage.load_frame('X_train_processed')
+            X_test_old = storage.load_frame('X_test_processed')
+            old_mean, old_scale = self.scaler.mean_.copy(), self.scaler.scale_.copy()
+            if len(X_train):
+                self.scaler.partial_fit(X_train)
+            
+            # Training resumes from the scaler and row count of the last training run
+            pending = state.get('pending') or {
+                'train_start': len(X_train_old),
+                'previous_mean': old_mean.tolist(),
+                'previous_scale': old_scale.tolist()
+            }
+            state['pending'] = pending
+            
+            for name, old, new in (('X_train_processed', X_train_old, X_train),
+                                   ('X_test_processed', X_test_old, X_test)):
+                frames = [self.rescale(old, old_mean, old_scale)]
+                if len(new):
+                    frames.append(pd.DataFrame(self.scaler.transform(new), columns=self.feature_columns))
+                storage.save(name, pd.concat(frames, ignore_index=True))
+            
+            for name, new in (('y_train', y_train), ('y_test', y_test)):
+                if len(new):
+                    old = storage.load_frame(name)
+                    storage.save(name, pd.concat([old, new.to_frame(old.columns[0])], ignore_index=True))
+            
+            # The new rows are indexed from the first appended raw row
+            train_rows = load_train_rows()
+            if train_rows is not None:
+                save_train_rows(np.concatenate([train_rows, first_position + X_train.index.to_numpy()]))
+            
+            summary['train_rows'] = len(X_train)
+            summary['test_rows'] = len(X_test)
+        
+        self.save_preprocessors(self.model_dir)
+        save_processing_state(state, seen_digests)
+        return summary
+
+def main(file_path=None):
+    processor = IncrementalDataProcessor()
+    summary = processor.process(file_path or config.data.raw_data_path)
+    
+    if summary is None:
+        # Nothing to extend yet: run the full pipeline once
+        print("No processing state found; running full data processing")
+        return process_batch(file_path)
+    
+    print(f"Incremental processing: {summary['raw_rows']:,} new raw rows, "
+          f"{summary['train_rows']:,} train and {summary['test_rows']:,} test rows added")
+    for col, count in summary['new_categories'].items():
+        print(f"  {col}: {count} new categories")
+    return summary
+
+if __name__ == "__main__":
+    with profile_from_argv('incremental_processing'):
+        parser = argparse.ArgumentParser(description='Process only the rows appended to the raw dataset')
+        parser.add_argument('--input', default=None, help='raw CSV path (default: DataConfig.raw_data_path)')
+        args = parser.parse_args()
+        
+        main(args.input)
@@ -0,0 +1,204 @@
+
+import threading
+import time
+from bisect import bisect_left
+from config import config
+
+# Histogram bucket upper bounds: stage and request latency in seconds, batch sizes in records
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+class MetricFamily:
+    """A counter or histogram with labels that threads update without locks.
+    
+    Every thread writes to its own shard (a dict of label values to
+    series), so an update is a dict lookup and one or two in-place
+    additions that no other thread touches. A scrape adds the shards up.
+    The lock is only taken when a thread creates its shard, and on a
+    scrape, to fold the shards of finished threads into one.
+    """
+    
+    def __init__(self, name, help_text, kind, label_names, bounds=None):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.label_names = label_names
+        self.bounds = tuple(bounds or ())
+        
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+    
+    def new_series(self):
+        if self.kind == 'histogram':
+            return [[0] * (len(self.bounds) + 1), 0.0]
+        return [0]
+    
+    def merge(self, into, shard):
+        """Add a shard's series into another {labels: series} dict"""
+        for labels, series in list(shard.items()):
+            total = into.setdefault(labels, self.new_series())
+            if self.kind == 'histogram':
+                counts, value_sum = series
+                total[0] = [a + b for a, b in zip(total[0], counts)]
+                total[1] += value_sum
+            else:
+                total[0] += series[0]
+    
+    def retire_finished(self):
+        """Fold the shards of threads that have exited (lock held)"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self.merge(self._retired, shard)
+        self._shards = live
+    
+    def shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                # Thread-per-request servers would otherwise accumulate shards between scrapes
+                self.retire_finished()
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+    
+    def inc(self, labels, amount=1):
+        shard = self.shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = self.new_series()
+        series[0] += amount
+    
+    def observe(self, labels, value):
+        shard = self.shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = self.new_series()
+        series[0][bisect_left(self.bounds, value)] += 1
+        series[1] += value
+    
+    def collect(self):
+        """Totals per label set across all threads"""
+        with self._lock:
+            self.retire_finished()
+            totals = {}
+            self.merge(totals, self._retired)
+            for _, shard in self._shards:
+                self.merge(totals, shard)
+        return totals
+    
+    def render(self):
+        """Lines of the Prometheus text exposition format"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        for labels, series in sorted(self.collect().items()):
+            label_text = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            if self.kind != 'histogram':
+                lines.append(f'{self.name}{{{label_text}}} {series[0]}')
+                continue
+            
+            counts, value_sum = series
+            separator = ',' if label_text else ''
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text}{separator}le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {value_sum!r}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+class Span:
+    """Time a block with the monotonic clock into a histogram"""
+    
+    __slots__ = ('family', 'labels', 'start')
+    
+    def __init__(self, family, labels):
+        self.family = family
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.family.observe(self.labels, time.perf_counter() - self.start)
+        return False
+
+class NullSpan:
+    """Shared no-op span used when instrumentation is off"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Instrumentation:
+    """Per-stage latency, request, batch-size and error metrics of the prediction API.
+    
+    When disabled, span() returns a shared no-op object and the record
+    methods return at once, so nothing is timed, allocated or stored.
+    Metrics are kept per process: each pre-forked worker reports its own.
+    """
+    
+    def __init__(self, enabled=None):
+        self.enabled = enabled if enabled is not None else config.api.metrics_enabled
+        self.stage_seconds = MetricFamily('salary_api_stage_seconds', 'Time spent in each prediction stage.',
+                                          'histogram', ('stage',), LATENCY_BUCKETS)
+        self.request_seconds = MetricFamily('salary_api_request_seconds', 'Request latency by endpoint.',
+                                            'histogram', ('endpoint',), LATENCY_BUCKETS)
+        self.requests = MetricFamily('salary_api_requests_total', 'Requests by endpoint and status code.',
+                                     'counter', ('endpoint', 'status'))
+        self.errors = MetricFamily('salary_api_errors_total',
+                                   'Errors by endpoint and kind (client, server or per-record).',
+                                   'counter', ('endpoint', 'kind'))
+        self.batch_sizes = MetricFamily('salary_api_batch_size', 'Records per prediction batch by source.',
+                                        'histogram', ('source',), BATCH_BUCKETS)
+        self.families = [self.stage_seconds, self.request_seconds, self.requests, self.errors, self.batch_sizes]
+    
+    def span(self, stage):
+        """Context manager timing one stage of a prediction"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self.stage_seconds, (stage,))
+    
+    def record_request(self, endpoint, status, seconds):
+        if not self.enabled:
+            return
+        self.requests.inc((endpoint, str(status)))
+        self.request_seconds.observe((endpoint,), seconds)
+        if status >= 500:
+            self.errors.inc((endpoint, 'server'))
+        elif status >= 400:
+            self.errors.inc((endpoint, 'client'))
+    
+    def record_batch(self, source, results):
+        """Record a batch's size and its per-record errors"""
+        if not self.enabled:
+            return
+        self.batch_sizes.observe((source,), len(results))
+        failed = sum(1 for result in results if 'error' in result)
+        if failed:
+            self.errors.inc((source, 'record'), failed)
+    
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for family in self.families:
+            lines += family.render()
+        return '\n'.join(lines) + '\n'
+
+# Content type of the text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+instrumentation = Instrumentation()
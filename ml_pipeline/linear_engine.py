@@ -0,0 +1,329 @@
+
+import argparse
+import time
+import numpy as np
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression, Ridge, Lasso
+from sklearn.metrics import r2_score
+from split_storage import get_split_storage
+from profiling import profile_from_argv
+from config import config
+
+class GramStatistics:
+    """Row count, means and centered cross-products of (X, y), accumulated chunk by chunk.
+    
+    Each chunk is centered on its own means and merged with the pairwise
+    update of Chan et al., so the statistics stay accurate for features far
+    from zero and statistics of separate chunks or workers can be merged.
+    Only one chunk of X is in memory at a time.
+    """
+    
+    def __init__(self, n_features):
+        self.n = 0
+        self.x_mean = np.zeros(n_features)
+        self.y_mean = 0.0
+        self.xx = np.zeros((n_features, n_features))
+        self.xy = np.zeros(n_features)
+        self.yy = 0.0
+    
+    def merge(self, other):
+        """Add another set of statistics to this one"""
+        if other.n == 0:
+            return self
+        
+        n = self.n + other.n
+        dx = other.x_mean - self.x_mean
+        dy = other.y_mean - self.y_mean
+        weight = self.n * other.n / n
+        self.xx += other.xx + weight * np.outer(dx, dx)
+        self.xy += other.xy + weight * dx * dy
+        self.yy += other.yy + weight * dy * dy
+        self.x_mean += dx * other.n / n
+        self.y_mean += dy * other.n / n
+        self.n = n
+        return self
+    
+    def update(self, X, y):
+        """Add a chunk of rows"""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if len(X) == 0:
+            return self
+        
+        chunk = GramStatistics(X.shape[1])
+        chunk.n = len(X)
+        chunk.x_mean = X.mean(axis=0)
+        chunk.y_mean = y.mean()
+        X = X - chunk.x_mean
+        y = y - chunk.y_mean
+        chunk.xx = X.T @ X
+        chunk.xy = X.T @ y
+        chunk.yy = y @ y
+        return self.merge(chunk)
+    
+    @classmethod
+    def from_arrays(cls, X, y, chunk_size=None):
+        """Statistics of (possibly memory-mapped) arrays, read chunk_size rows at a time"""
+        chunk_size = chunk_size or config.data.chunk_size
+        stats = cls(X.shape[1])
+        for start in range(0, len(X), chunk_size):
+            stats.update(X[start:start + chunk_size], y[start:start + chunk_size])
+        return stats
+    
+    def gram(self, fit_intercept=True):
+        """(XᵀX, Xᵀy, yᵀy), centered when the model fits an intercept"""
+        if fit_intercept:
+            return self.xx, self.xy, self.yy
+        return (self.xx + self.n * np.outer(self.x_mean, self.x_mean),
+                self.xy + self.n * self.x_mean * self.y_mean,
+                self.yy + self.n * self.y_mean ** 2)
+
+class GramLinearEngine:
+    """Least squares, ridge and lasso solutions from one set of sufficient statistics.
+    
+    OLS and the whole ridge path come from a single eigendecomposition
+    XᵀX = V diag(λ) Vᵀ: the ridge solution for any alpha is
+    V diag(1 / (λ + alpha)) Vᵀ Xᵀy. Lasso runs coordinate descent on the
+    Gram matrix, warm-started from one alpha to the next along a
+    decreasing path. The objectives match sklearn's LinearRegression,
+    Ridge and Lasso, so the solutions agree to solver tolerance.
+    """
+    
+    def __init__(self, stats, fit_intercept=True):
+        self.stats = stats
+        self.fit_intercept = fit_intercept
+        self.gram, self.xty, self.yty = stats.gram(fit_intercept)
+        
+        eigenvalues, self.eigenvectors = np.linalg.eigh(self.gram)
+        self.eigenvalues = np.clip(eigenvalues, 0, None)
+        self.projected = self.eigenvectors.T @ self.xty
+        # Same cutoff as numpy's lstsq: smaller directions are treated as rank deficiency
+        self.cutoff = self.eigenvalues.max(initial=0) * len(self.xty) * np.finfo(np.float64).eps
+    
+    def intercept(self, coef):
+        return self.stats.y_mean - self.stats.x_mean @ coef if self.fit_intercept else 0.0
+    
+    def rss(self, coef):
+        """Residual sum of squares, from the statistics alone"""
+        return max(self.yty - 2 * coef @ self.xty + coef @ self.gram @ coef, 0.0)
+    
+    def ols(self):
+        """Minimum-norm least-squares coefficients"""
+        kept = self.eigenvalues > self.cutoff
+        inverse = np.zeros_like(self.eigenvalues)
+        inverse[kept] = 1 / self.eigenvalues[kept]
+        return self.eigenvectors @ (inverse * self.projected)
+    
+    def ridge_path(self, alphas):
+        """Ridge coefficients for each alpha, one row per alpha"""
+        alphas = np.asarray(alphas, dtype=np.float64).reshape(-1, 1)
+        return (self.projected / (self.eigenvalues + alphas)) @ self.eigenvectors.T
+    
+    def ridge_gcv(self, alphas, coefs):
+        """Generalized cross-validation error of each ridge solution"""
+        n = self.stats.n
+        scores = []
+        for alpha, coef in zip(alphas, coefs):
+            df = np.sum(self.eigenvalues / (self.eigenvalues + alpha)) + self.fit_intercept
+            scores.append(self.rss(coef) / n / max(1 - df / n, 1e-12) ** 2)
+        return np.array(scores)
+    
+    def lasso(self, alpha, coef=None, tol=1e-4, max_iter=1000, positive=False):
+        """Cyclic coordinate descent for one alpha; return (coef, iterations, duality gap).
+        
+        Minimizes ||y - Xw||² / (2n) + alpha ||w||₁ using only XᵀX and Xᵀy,
+        and stops, like sklearn, when the duality gap is below tol * yᵀy.
+        """
+        threshold = alpha * self.stats.n
+        coef = np.zeros(len(self.xty)) if coef is None else coef.copy()
+        fitted = self.gram @ coef
+        diagonal = np.diag(self.gram)
+        tol = tol * self.yty
+        gap = np.inf
+        
+        for iteration in range(1, max_iter + 1):
+            max_change = 0.0
+            for j in range(len(coef)):
+                if diagonal[j] == 0:
+                    continue
+                old = coef[j]
+                rho = self.xty[j] - fitted[j] + diagonal[j] * old
+                if positive and rho < 0:
+                    new = 0.0
+                else:
+                    new = np.sign(rho) * max(abs(rho) - threshold, 0.0) / diagonal[j]
+                if new != old:
+                    fitted += self.gram[:, j] * (new - old)
+                    coef[j] = new
+                    max_change = max(max_change, abs(new - old))
+            
+            # Only compute the gap once the coefficients have (nearly) stopped moving
+            max_coef = np.abs(coef).max(initial=0)
+            if max_coef == 0 or max_change / max_coef < 1e-4 or iteration == max_iter:
+                gap = self.duality_gap(coef, fitted, threshold, positive)
+                if gap < tol:
+                    break
+        return coef, iteration, gap
+    
+    def duality_gap(self, coef, fitted, threshold, positive=False):
+        """Lasso duality gap (scaled by n), as in sklearn's coordinate descent"""
+        residual_norm2 = max(self.yty - 2 * coef @ self.xty + coef @ fitted, 0.0)
+        correlation = self.xty - fitted
+        dual_norm = correlation.max(initial=0) if positive else np.abs(correlation).max(initial=0)
+        
+        if dual_norm > threshold:
+            const = threshold / dual_norm
+            gap = 0.5 * residual_norm2 * (1 + const ** 2)
+        else:
+            const = 1.0
+            gap = residual_norm2
+        return gap + threshold * np.abs(coef).sum() - const * (self.yty - coef @ self.xty)
+    
+    def lasso_path(self, alphas, tol=1e-4, max_iter=1000, positive=False):
+        """Lasso solutions along the path, warm-started from the largest alpha down.
+        
+        Returns (coefs, iterations, gaps) in the order of `alphas`.
+        """
+        coefs = np.zeros((len(alphas), len(self.xty)))
+        iterations = np.zeros(len(alphas), dtype=int)
+        gaps = np.zeros(len(alphas))
+        coef = None
+        for index in np.argsort(alphas)[::-1]:
+            coef, iterations[index], gaps[index] = self.lasso(alphas[index], coef, tol, max_iter, positive)
+            coefs[index] = coef
+        return coefs, iterations, gaps
+    
+    def lasso_bic(self, coefs):
+        """Bayesian information criterion of each lasso solution (non-zeros as degrees of freedom)"""
+        n = self.stats.n
+        return np.array([n * np.log(max(self.rss(coef), 1e-300) / n) + np.log(n) * np.count_nonzero(coef)
+                         for coef in coefs])
+
+def gram_solvable(model):
+    """Whether the engine can fit this estimator with the same objective"""
+    if isinstance(model, Ridge):
+        return not model.positive and np.ndim(model.alpha) == 0
+    if isinstance(model, LinearRegression):
+        return not model.positive
+    return isinstance(model, Lasso)
+
+def alpha_path(model_name, alpha):
+    """Alphas searched for a model: its search space plus its current alpha, ascending"""
+    candidates = config.model.search_spaces.get(model_name, {}).get('alpha', [])
+    return sorted({float(a) for a in candidates} | {float(alpha)})
+
+def fitted_estimator(template, engine, coef, **attributes):
+    """An unfitted sklearn estimator carrying the engine's solution as its fitted state"""
+    model = clone(template)
+    model.coef_ = coef
+    model.intercept_ = engine.intercept(coef)
+    model.n_features_in_ = len(coef)
+    for name, value in attributes.items():
+        setattr(model, name, value)
+    return model
+
+def solve(engine, model_name, template, select_alpha=False):
+    """Fit one linear model from the engine; return (fitted model, selected alpha or None)"""
+    if isinstance(template, LinearRegression):
+        singular = np.sqrt(np.sort(engine.eigenvalues)[::-1])
+        return fitted_estimator(template, engine, engine.ols(), singular_=singular,
+                                rank_=int(np.sum(engine.eigenvalues > engine.cutoff))), None
+    
+    alphas = alpha_path(model_name, template.alpha) if select_alpha else [float(template.alpha)]
+    if isinstance(template, Ridge):
+        coefs = engine.ridge_path(alphas)
+        best = int(np.argmin(engine.ridge_gcv(alphas, coefs)))
+        model = fitted_estimator(template.set_params(alpha=alphas[best]), engine, coefs[best], n_iter_=None)
+    else:
+        coefs, iterations, gaps = engine.lasso_path(alphas, template.tol, template.max_iter, template.positive)
+        best = int(np.argmin(engine.lasso_bic(coefs)))
+        model = fitted_estimator(template.set_params(alpha=alphas[best]), engine, coefs[best],
+                                 n_iter_=int(iterations[best]), dual_gap_=gaps[best] / engine.stats.n)
+    return model, (alphas[best] if select_alpha else None)
+
+def fit_linear_models(models, X, y, chunk_size=None, select_alpha=None):
+    """Fit every Gram-solvable model of {name: estimator} from one pass over (X, y).
+    
+    The statistics and the eigendecomposition are computed once per
+    fit_intercept setting and their time is split evenly between the
+    models that share them. With `select_alpha`, ridge and lasso pick
+    their alpha along the path by GCV and BIC respectively.
+    Returns {name: (model, training time, CPU time, selected alpha)}.
+    """
+    if select_alpha is None:
+        select_alpha = config.model.linear_alpha_selection == 'path'
+    linear = {name: model for name, model in models.items() if gram_solvable(model)}
+    if not linear:
+        return {}
+    
+    start_time, start_cpu = time.perf_counter(), time.process_time()
+    stats = GramStatistics.from_arrays(X, y, chunk_size)
+    engines = {fit_intercept: GramLinearEngine(stats, fit_intercept)
+               for fit_intercept in {model.fit_intercept for model in linear.values()}}
+    shared_time = (time.perf_counter() - start_time) / len(linear)
+    shared_cpu = (time.process_time() - start_cpu) / len(linear)
+    
+    results = {}
+    for model_name, template in linear.items():
+        start_time, start_cpu = time.perf_counter(), time.process_time()
+        model, alpha = solve(engines[template.fit_intercept], model_name, clone(template), select_alpha)
+        results[model_name] = (model,
+                               time.perf_counter() - start_time + shared_time,
+                               time.process_time() - start_cpu + shared_cpu,
+                               alpha)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit the linear models from chunked sufficient statistics')
+    parser.add_argument('--chunk-size', type=int, default=None)
+    parser.add_argument('--compare', action='store_true', help='also fit with sklearn and compare')
+    args = parser.parse_args()
+    
+    storage = get_split_storage()
+    X_train = storage.load_array('X_train_processed')
+    X_test = storage.load_array('X_test_processed')
+    y_train = storage.load_array('y_train').ravel()
+    y_test = storage.load_array('y_test').ravel()
+    
+    start_time = time.perf_counter()
+    stats = GramStatistics.from_arrays(X_train, y_train, args.chunk_size)
+    stats_time = time.perf_counter() - start_time
+    engine = GramLinearEngine(stats)
+    print(f"Sufficient statistics of {stats.n:,} rows x {len(stats.xy)} features in {stats_time:.3f}s "
+          f"(condition number {engine.eigenvalues.max() / max(engine.eigenvalues.min(), 1e-300):.3g})")
+    
+    def test_r2(coef):
+        return r2_score(y_test, X_test @ coef + engine.intercept(coef))
+    
+    ridge_alphas = alpha_path('ridge_regression', config.model.linear_models_params['ridge_alpha'])
+    ridge_coefs = engine.ridge_path(ridge_alphas)
+    print(f"\nOLS test R²: {test_r2(engine.ols()):.4f}")
+    print(f"\n{'ridge alpha':>12} {'GCV':>14} {'test R²':>8}")
+    for alpha, coef, score in zip(ridge_alphas, ridge_coefs, engine.ridge_gcv(ridge_alphas, ridge_coefs)):
+        print(f"{alpha:>12g} {score:>14.6g} {test_r2(coef):>8.4f}")
+    
+    lasso_alphas = alpha_path('lasso_regression', config.model.linear_models_params['lasso_alpha'])
+    lasso_coefs, iterations, _ = engine.lasso_path(lasso_alphas)
+    print(f"\n{'lasso alpha':>12} {'BIC':>14} {'test R²':>8} {'non-zero':>8} {'iter':>5}")
+    for alpha, coef, bic, n_iter in zip(lasso_alphas, lasso_coefs, engine.lasso_bic(lasso_coefs), iterations):
+        print(f"{alpha:>12g} {bic:>14.6g} {test_r2(coef):>8.4f} {np.count_nonzero(coef):>8} {n_iter:>5}")
+    
+    if args.compare:
+        models = {
+            'linear_regression': LinearRegression(),
+            'ridge_regression': Ridge(alpha=config.model.linear_models_params['ridge_alpha']),
+            'lasso_regression': Lasso(alpha=config.model.linear_models_params['lasso_alpha'])
+        }
+        fitted = fit_linear_models(models, X_train, y_train, args.chunk_size, select_alpha=False)
+        print(f"\n{'model':<20} {'gram (s)':>9} {'sklearn (s)':>11} {'max |Δcoef|':>12}")
+        for model_name, model in models.items():
+            start_time = time.perf_counter()
+            model.fit(X_train, y_train)
+            sklearn_time = time.perf_counter() - start_time
+            gram_model, gram_time, _, _ = fitted[model_name]
+            print(f"{model_name:<20} {gram_time:>9.3f} {sklearn_time:>11.3f} "
+                  f"{np.abs(gram_model.coef_ - model.coef_).max():>12.3g}")
+
+if __name__ == "__main__":
+    with profile_from_argv('linear_engine'):
+        main()
@@ -0,0 +1,281 @@
+
+import argparse
+import json
+import os
+import time
+import numpy as np
+from encoders import CompiledEncoder
+from profiling import profile_from_argv
+from config import config
+
+# Continuous features interpolated on the grid; every other feature is a discrete axis
+EXPERIENCE_FEATURE = 'experience_years'
+REMOTE_FEATURE = 'remote_ratio'
+YEAR_FEATURE = 'work_year'
+
+def bracket(grid, values):
+    """Find the lower grid index and interpolation weight for each value"""
+    values = np.clip(values, grid[0], grid[-1])
+    lower = np.clip(np.searchsorted(grid, values, side='right') - 1, 0, len(grid) - 2)
+    weight = (values - grid[lower]) / (grid[lower + 1] - grid[lower])
+    return lower, weight
+
+class MaterializedPredictor:
+    """Serve predictions from a precomputed table over the categorical grid.
+    
+    The table holds one prediction per combination of known categories and
+    work years, sampled on an experience x remote-ratio grid. Lookups are
+    array indexing plus bilinear interpolation over the two continuous axes,
+    so serving needs NumPy and the compiled encoder but not sklearn. The
+    table cannot extrapolate: records whose experience or remote ratio lie
+    outside the grid are reported as errors (see range_error), not clamped.
+    """
+    
+    def __init__(self, table, metadata, encoder):
+        self.table = table
+        self.metadata = metadata
+        self.encoder = encoder
+        
+        self.feature_columns = metadata['feature_columns']
+        self.categorical_axes = metadata['categorical_axes']
+        self.work_years = np.asarray(metadata['work_years'], dtype=np.float64)
+        self.experience_grid = np.asarray(metadata['experience_grid'], dtype=np.float64)
+        self.remote_grid = np.asarray(metadata['remote_grid'], dtype=np.float64)
+        
+        # View the table as (category block, experience, remote)
+        self.blocks = table.reshape(-1, len(self.experience_grid), len(self.remote_grid))
+        
+        for col, size in zip(self.categorical_axes, table.shape):
+            if not 0 <= encoder.unknown_value < size:
+                raise ValueError(f"Unknown category code {encoder.unknown_value} is outside the grid for {col}")
+    
+    @classmethod
+    def load(cls, path_prefix, encoder_path=None, unknown_value=None):
+        """Memory-map a table written by build_lookup_table.
+        
+        The compiled encoder is read from the table's directory unless
+        `encoder_path` is given; `unknown_value` overrides its code for
+        unseen categories.
+        """
+        if encoder_path is None:
+            encoder_path = os.path.join(os.path.dirname(path_prefix), 'compiled_encoders.pkl')
+        table = np.load(f'{path_prefix}.npy', mmap_mode='r')
+        with open(f'{path_prefix}.json', 'r') as f:
+            metadata = json.load(f)
+        encoder = CompiledEncoder.load(encoder_path)
+        if unknown_value is not None:
+            encoder.unknown_value = unknown_value
+        return cls(table, metadata, encoder)
+    
+    def range_error(self, record):
+        """Error message for a record outside the continuous axes of the grid, or None"""
+        for col, grid in ((EXPERIENCE_FEATURE, self.experience_grid), (REMOTE_FEATURE, self.remote_grid)):
+            value = float(record[col])
+            if not grid[0] <= value <= grid[-1]:
+                return f"{col} {value:g} is outside the lookup table range [{grid[0]:g}, {grid[-1]:g}]"
+        return None
+    
+    def block_index(self, codes, year_index):
+        """Combine per-axis category codes and work year index into a block index"""
+        index = np.zeros(len(year_index), dtype=np.intp)
+        for col, size in zip(self.categorical_axes, self.table.shape):
+            index = index * size + codes[col]
+        return index * len(self.work_years) + year_index
+    
+    def lookup(self, block, experience, remote):
+        """Bilinearly interpolate predictions inside each category block"""
+        i, w = bracket(self.experience_grid, experience)
+        j, v = bracket(self.remote_grid, remote)
+        blocks = self.blocks
+        return ((1 - w) * (1 - v) * blocks[block, i, j] +
+                w * (1 - v) * blocks[block, i + 1, j] +
+                (1 - w) * v * blocks[block, i, j + 1] +
+                w * v * blocks[block, i + 1, j + 1])
+    
+    def predict_records(self, records):
+        """Predict salaries for a list of raw input records"""
+        n_rows = len(records)
+        codes = {
+            col: self.encoder.encode_array(col, [str(record[col]) for record in records])
+            for col in self.categorical_axes
+        }
+        
+        # Snap each work year to the nearest year seen in training
+        years = np.fromiter((float(record[YEAR_FEATURE]) for record in records),
+                            dtype=np.float64, count=n_rows)
+        year_index = np.abs(years[:, None] - self.work_years[None, :]).argmin(axis=1)
+        
+        experience = np.fromiter((float(record[EXPERIENCE_FEATURE]) for record in records),
+                                 dtype=np.float64, count=n_rows)
+        remote = np.fromiter((float(record[REMOTE_FEATURE]) for record in records),
+                             dtype=np.float64, count=n_rows)
+        
+        return self.lookup(self.block_index(codes, year_index), experience, remote)
+
+def build_lookup_table(predictor, work_years, experience_grid, remote_grid, path_prefix,
+                       chunk_size=1_000_000, source=None):
+    """Evaluate a loaded SalaryPredictor over the full grid and write it to disk.
+    
+    `source` describes the model the table was built from (model name,
+    bundle version and pickle digest) and is stored in the metadata.
+    """
+    encoder = predictor.encoder
+    categorical_axes = [col for col in predictor.feature_columns if col in encoder.mappings]
+    numeric = set(predictor.feature_columns) - set(categorical_axes)
+    if numeric != {EXPERIENCE_FEATURE, REMOTE_FEATURE, YEAR_FEATURE}:
+        raise ValueError(f"Unsupported numeric features for materialization: {sorted(numeric)}")
+    if len(experience_grid) < 2 or len(remote_grid) < 2:
+        raise ValueError("Experience and remote grids need at least two points")
+    
+    # Axis order: categorical features, work year, experience, remote
+    axis_values = [np.arange(len(encoder.mappings[col]), dtype=np.float64) for col in categorical_axes]
+    axis_values += [np.asarray(work_years, dtype=np.float64),
+                    np.asarray(experience_grid, dtype=np.float64),
+                    np.asarray(remote_grid, dtype=np.float64)]
+    axis_names = categorical_axes + [YEAR_FEATURE, EXPERIENCE_FEATURE, REMOTE_FEATURE]
+    shape = tuple(len(values) for values in axis_values)
+    column_index = {col: predictor.feature_columns.index(col) for col in axis_names}
+    
+    table = np.lib.format.open_memmap(f'{path_prefix}.npy', mode='w+', dtype=np.float32, shape=shape)
+    flat_table = table.reshape(-1)
+    
+    # Fill the table in chunks so memory stays bounded by chunk_size rows
+    for start in range(0, flat_table.size, chunk_size):
+        stop = min(start + chunk_size, flat_table.size)
+        axis_indices = np.unravel_index(np.arange(start, stop), shape)
+        
+        X = np.empty((stop - start, len(predictor.feature_columns)), dtype=np.float64)
+        for name, values, indices in zip(axis_names, axis_values, axis_indices):
+            X[:, column_index[name]] = values[indices]
+        X -= predictor.scaler_mean
+        X /= predictor.scaler_scale
+        
+        flat_table[start:stop] = predictor.model.predict(X)
+    
+    table.flush()
+    
+    metadata = {
+        'feature_columns': predictor.feature_columns,
+        'categorical_axes': categorical_axes,
+        'work_years': [float(year) for year in work_years],
+        'experience_grid': [float(x) for x in experience_grid],
+        'remote_grid': [float(x) for x in remote_grid],
+        'shape': list(shape),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    metadata.update(source or {})
+    with open(f'{path_prefix}.json', 'w') as f:
+        json.dump(metadata, f, indent=2)
+    
+    return table, metadata
+
+def interpolation_error(predictor, materialized, n_samples=10000, random_state=42):
+    """Compare table lookups with the live model at random off-grid points"""
+    rng = np.random.default_rng(random_state)
+    
+    codes = {
+        col: rng.integers(0, size, n_samples)
+        for col, size in zip(materialized.categorical_axes, materialized.table.shape)
+    }
+    year_index = rng.integers(0, len(materialized.work_years), n_samples)
+    experience = rng.uniform(materialized.experience_grid[0], materialized.experience_grid[-1], n_samples)
+    remote = rng.uniform(materialized.remote_grid[0], materialized.remote_grid[-1], n_samples)
+    
+    X = np.empty((n_samples, len(predictor.feature_columns)), dtype=np.float64)
+    for col, values in codes.items():
+        X[:, predictor.feature_columns.index(col)] = values
+    X[:, predictor.feature_columns.index(YEAR_FEATURE)] = materialized.work_years[year_index]
+    X[:, predictor.feature_columns.index(EXPERIENCE_FEATURE)] = experience
+    X[:, predictor.feature_columns.index(REMOTE_FEATURE)] = remote
+    X -= predictor.scaler_mean
+    X /= predictor.scaler_scale
+    
+    live = predictor.model.predict(X)
+    looked_up = materialized.lookup(materialized.block_index(codes, year_index), experience, remote)
+    errors = np.abs(looked_up - live)
+    
+    return {
+        'samples': n_samples,
+        'max_abs_error': float(errors.max()),
+        'mean_abs_error': float(errors.mean()),
+        'max_rel_error': float((errors / np.maximum(np.abs(live), 1.0)).max())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Materialize model predictions over the categorical grid')
+    parser.add_argument('--model', default=config.api.default_model)
+    parser.add_argument('--experience-step', type=float, default=config.api.lookup_experience_step)
+    parser.add_argument('--remote-step', type=float, default=config.api.lookup_remote_step)
+    parser.add_argument('--max-experience', type=float, default=None,
+                        help='upper end of the experience grid (default: max in the raw dataset)')
+    parser.add_argument('--samples', type=int, default=10000,
+                        help='random points used to measure interpolation error')
+    args = parser.parse_args()
+    
+    import shutil
+    import tempfile
+    import pandas as pd
+    from prediction_api import SalaryPredictor
+    from artifacts import bundle_path, extend_bundle, file_digest
+    
+    predictor = SalaryPredictor(inference_mode='lean')
+    if not predictor.load_model(args.model):
+        print("Please train the model first.")
+        return
+    
+    df = pd.read_csv(config.data.raw_data_path)
+    work_years = sorted(df[YEAR_FEATURE].unique())
+    max_experience = args.max_experience if args.max_experience is not None else df[EXPERIENCE_FEATURE].max()
+    experience_grid = np.arange(0, max_experience + args.experience_step, args.experience_step)
+    remote_grid = np.arange(0, 100 + args.remote_step, args.remote_step)
+    remote_grid = remote_grid[remote_grid <= 100]
+    
+    # Name the table after the resolved model ('best' becomes e.g. random_forest)
+    model_name = predictor.model_name
+    source = {
+        'model_name': model_name,
+        'bundle_version': predictor.version,
+        'model_digest': file_digest(predictor.bundle.path(f'{model_name}_model.pkl'))
+    }
+    
+    # Published bundles are immutable: build the table aside and publish it in
+    # a new bundle with the same model, so it never outlives that model
+    versioned = predictor.version != 'unversioned'
+    build_dir = tempfile.mkdtemp(dir=config.api.model_dir) if versioned else config.api.model_dir
+    try:
+        path_prefix = os.path.join(build_dir, f'{model_name}_lookup')
+        start_time = time.perf_counter()
+        table, metadata = build_lookup_table(predictor, work_years, experience_grid, remote_grid,
+                                             path_prefix, source=source)
+        build_time = time.perf_counter() - start_time
+        
+        if versioned:
+            version = extend_bundle(predictor.version, [f'{path_prefix}.npy', f'{path_prefix}.json'],
+                                    config.api.model_dir)
+            path_prefix = os.path.join(bundle_path(version, config.api.model_dir), f'{model_name}_lookup')
+        else:
+            version = predictor.version
+        
+        materialized = MaterializedPredictor.load(
+            path_prefix, encoder_path=predictor.bundle.path('compiled_encoders.pkl'))
+        error = interpolation_error(predictor, materialized, n_samples=args.samples)
+    finally:
+        if versioned:
+            shutil.rmtree(build_dir, ignore_errors=True)
+    
+    print("\n" + "="*50)
+    print("LOOKUP TABLE SUMMARY")
+    print("="*50)
+    print(f"Model: {model_name}")
+    print(f"Bundle: {version} (built from {source['bundle_version']})")
+    print(f"Grid shape: {tuple(metadata['shape'])}")
+    print(f"Grid points: {table.size:,}")
+    print(f"Table size: {table.nbytes / 1024**2:.1f} MB")
+    print(f"Build time: {build_time:.2f}s")
+    print(f"Max interpolation error: {error['max_abs_error']:,.2f} "
+          f"({error['max_rel_error']:.2%} relative, {error['samples']} samples)")
+    print(f"Mean interpolation error: {error['mean_abs_error']:,.2f}")
+
+if __name__ == "__main__":
+    with profile_from_argv('materialized'):
+        main()
@@ -5,14 +5,54 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import joblib
+from joblib import Parallel, delayed
+import argparse
 import os
 from datetime import datetime
+from split_storage import get_split_storage
+from profiling import profile_from_argv
+from config import config
+
+def evaluate_model_file(model_name, X_test, y_test):
+    """Load one saved model and evaluate it on the shared test data"""
+    try:
+        model = joblib.load(f'models/{model_name}_model.pkl')
+        metrics = ModelEvaluator().evaluate_model(model, X_test, y_test)
+        importances = getattr(model, 'feature_importances_', None)
+        return model_name, metrics, importances, None
+    except Exception as e:
+        return model_name, None, None, str(e)
+
+def render_model_plots(model_name, y_test, metrics, feature_importance_df, feature_columns):
+    """Render all evaluation figures for one model"""
+    evaluator = ModelEvaluator()
+    evaluator.feature_columns = feature_columns
+    evaluator.plot_actual_vs_predicted(y_test, metrics['predictions'], model_name)
+    evaluator.plot_residuals(metrics['residuals'], model_name)
+    if feature_importance_df is not None:
+        evaluator.plot_feature_importance_frame(feature_importance_df, model_name)
+    return model_name
 
 class ModelEvaluator:
     def __init__(self):
         self.evaluation_results = {}
         self.feature_columns = []
+        self.test_data = None
+        
+    def load_test_data(self):
+        """Load test data and feature columns once and reuse them for every model"""
+        if self.test_data is None:
+            storage = get_split_storage()
+            X_test = storage.load_array('X_test_processed')
+            y_test = storage.load_array('y_test').ravel()
+            
+            # Load feature columns
+            self.feature_columns = joblib.load('models/feature_columns.pkl')
+            
+            self.test_data = (X_test, y_test)
         
+        return self.test_data
+    
     def load_model_and_data(self, model_name='random_forest'):
         """Load trained model and test data"""
         try:
@@ -20,11 +60,7 @@ class ModelEvaluator:
             model = joblib.load(f'models/{model_name}_model.pkl')
             
             # Load test data
-            X_test = pd.read_csv('data/X_test_processed.csv').values
-            y_test = pd.read_csv('data/y_test.csv').values.ravel()
-            
-            # Load feature columns
-            self.feature_columns = joblib.load('models/feature_columns.pkl')
+            X_test, y_test = self.load_test_data()
             
             return model, X_test, y_test
         except Exception as e:
@@ -113,26 +149,35 @@ class ModelEvaluator:
         plt.savefig(f'models/{model_name}_residuals.png', dpi=300, bbox_inches='tight')
         plt.close()
     
+    def feature_importance_frame(self, importance):
+        """Build a sorted feature importance dataframe, or None without importances"""
+        if importance is None:
+            return None
+        
+        return pd.DataFrame({
+            'feature': self.feature_columns,
+            'importance': importance
+        }).sort_values('importance', ascending=False)
+    
+    def plot_feature_importance_frame(self, feature_importance_df, model_name):
+        """Plot a feature importance dataframe"""
+        plt.figure(figsize=(10, 8))
+        sns.barplot(data=feature_importance_df, x='importance', y='feature', palette='viridis')
+        plt.title(f'Feature Importance - {model_name}')
+        plt.xlabel('Importance')
+        plt.ylabel('Features')
+        plt.tight_layout()
+        plt.savefig(f'models/{model_name}_feature_importance.png', dpi=300, bbox_inches='tight')
+        plt.close()
+    
     def plot_feature_importance(self, model, model_name):
         """Plot feature importance for tree-based models"""
         if hasattr(model, 'feature_importances_'):
-            importance = model.feature_importances_
-            
             # Create feature importance dataframe
-            feature_importance_df = pd.DataFrame({
-                'feature': self.feature_columns,
-                'importance': importance
-            }).sort_values('importance', ascending=False)
+            feature_importance_df = self.feature_importance_frame(model.feature_importances_)
             
             # Plot
-            plt.figure(figsize=(10, 8))
-            sns.barplot(data=feature_importance_df, x='importance', y='feature', palette='viridis')
-            plt.title(f'Feature Importance - {model_name}')
-            plt.xlabel('Importance')
-            plt.ylabel('Features')
-            plt.tight_layout()
-            plt.savefig(f'models/{model_name}_feature_importance.png', dpi=300, bbox_inches='tight')
-            plt.close()
+            self.plot_feature_importance_frame(feature_importance_df, model_name)
             
             return feature_importance_df
         
@@ -171,7 +216,7 @@ class ModelEvaluator:
             for idx, row in feature_importance_df.head().iterrows():
                 report += f"- **{row['feature']}**: {row['importance']:.4f}\n"
         
-        report += f"\n## Evaluation Date
+        report += f"""\n## Evaluation Date
 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
         
@@ -181,44 +226,85 @@ class ModelEvaluator:
         
         return report
     
-    def evaluate_all_models(self):
-        """Evaluate all trained models"""
-        model_files = [f for f in os.listdir('models') if f.endswith('_model.pkl')]
+    def evaluate_all_models(self, n_jobs=None, plots=None, plot_n_jobs=None):
+        """Evaluate all trained models against test data loaded once"""
+        n_jobs = n_jobs if n_jobs is not None else config.model.evaluation_n_jobs
+        plots = plots if plots is not None else config.model.evaluation_plots
+        
+        model_names = sorted(f.replace('_model.pkl', '') for f in os.listdir('models') 
+                             if f.endswith('_model.pkl'))
+        
+        try:
+            X_test, y_test = self.load_test_data()
+        except Exception as e:
+            print(f"Error loading test data: {e}")
+            return {}
+        
+        # Models share the in-memory test matrix, so threads avoid copying it per worker
+        print(f"Evaluating {len(model_names)} models...")
+        outputs = Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(evaluate_model_file)(model_name, X_test, y_test) for model_name in model_names
+        )
         
         results = {}
         
-        for model_file in model_files:
-            model_name = model_file.replace('_model.pkl', '')
-            print(f"Evaluating {model_name}...")
+        for model_name, metrics, importances, error in outputs:
+            if error is not None:
+                print(f"Error evaluating {model_name}: {error}")
+                continue
             
-            model, X_test, y_test = self.load_model_and_data(model_name)
+            feature_importance_df = self.feature_importance_frame(importances)
             
-            if model is not None:
-                metrics = self.evaluate_model(model, X_test, y_test)
-                
-                # Generate visualizations
-                self.plot_actual_vs_predicted(y_test, metrics['predictions'], model_name)
-                self.plot_residuals(metrics['residuals'], model_name)
-                feature_importance_df = self.plot_feature_importance(model, model_name)
-                
-                # Generate report
-                report = self.generate_evaluation_report(model_name, metrics, feature_importance_df)
-                
-                results[model_name] = {
-                    'metrics': metrics,
-                    'report': report
-                }
-                
-                print(f"  R² Score: {metrics['r2_score']:.4f}")
-                print(f"  RMSE: ${metrics['rmse']:,.2f}")
+            # Generate report
+            report = self.generate_evaluation_report(model_name, metrics, feature_importance_df)
+            
+            results[model_name] = {
+                'metrics': metrics,
+                'report': report,
+                'feature_importance': feature_importance_df
+            }
+            
+            print(f"{model_name}")
+            print(f"  R² Score: {metrics['r2_score']:.4f}")
+            print(f"  RMSE: ${metrics['rmse']:,.2f}")
+        
+        self.evaluation_results = results
+        
+        if plots:
+            self.render_plots(results, y_test, plot_n_jobs)
         
         return results
+    
+    def render_plots(self, results, y_test, n_jobs=None):
+        """Render evaluation figures for every model, optionally across processes"""
+        n_jobs = n_jobs if n_jobs is not None else config.model.plot_n_jobs
+        
+        print(f"Rendering plots for {len(results)} models...")
+        
+        # pyplot keeps global state, so parallel rendering uses processes rather than threads
+        Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(render_model_plots)(model_name, y_test, result['metrics'], 
+                                        result['feature_importance'], self.feature_columns)
+            for model_name, result in results.items()
+        )
 
 def main():
+    parser = argparse.ArgumentParser(description='Evaluate all trained models')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='models evaluated concurrently (default: ModelConfig.evaluation_n_jobs)')
+    parser.add_argument('--no-plots', action='store_true', help='skip rendering evaluation figures')
+    parser.add_argument('--plot-jobs', type=int, default=None,
+                        help='processes used to render figures (default: ModelConfig.plot_n_jobs)')
+    args = parser.parse_args()
+    
     evaluator = ModelEvaluator()
     
     # Evaluate all models
-    results = evaluator.evaluate_all_models()
+    results = evaluator.evaluate_all_models(
+        n_jobs=args.n_jobs,
+        plots=False if args.no_plots else None,
+        plot_n_jobs=args.plot_jobs
+    )
     
     # Create comparison summary
     print("\n" + "="*60)
@@ -247,4 +333,5 @@ def main():
     print(f"\nEvaluation completed! Check the 'models' directory for detailed reports and visualizations.")
 
 if __name__ == "__main__":
-    main()
+    with profile_from_argv('model_evaluation'):
+        main()
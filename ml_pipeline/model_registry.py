@@ -0,0 +1,201 @@
+
+import csv
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+from uncertainty import TreeUncertainty
+from shared_models import load_shared_model
+from compiled_trees import CompiledTreeEnsemble, compiled_source_digest
+from artifacts import file_digest
+from config import config
+
+MODEL_SUFFIX = '_model.pkl'
+SHARED_SUFFIX = '_model.shared'
+COMPILED_SUFFIX = '_compiled.npz'
+
+class LoadedModel:
+    """A trained model plus what is needed to serve it"""
+    
+    def __init__(self, name, model, size_bytes, uncertainty=None, score=None, shared=False, compiled=False):
+        self.name = name
+        self.model = model
+        self.size_bytes = size_bytes
+        self.shared = shared
+        self.compiled = compiled
+        self.uncertainty = uncertainty
+        self.score = score
+        self.loaded_at = time.time()
+
+class ModelRegistry:
+    """Lazily load the trained models of one artifact bundle.
+    
+    Each model is loaded once, the first time it is requested, and the
+    same object is shared by every request and ensemble that uses it.
+    Loaded models are kept in least-recently-used order. When their total
+    size goes over the memory budget, the idle models used longest ago are
+    evicted. Pinned models, such as the default model, are never evicted.
+    Requests that already hold an evicted model keep it until they finish.
+    """
+    
+    def __init__(self, artifact_dir, memory_budget_mb=None, scores=None, shared_loading=None, compiled=None):
+        self.artifact_dir = artifact_dir
+        self.shared_loading = (shared_loading if shared_loading is not None
+                               else config.api.shared_model_loading)
+        # Serve tree ensembles through the flat-array engine
+        self.compiled = compiled if compiled is not None else config.api.inference_mode == 'compiled'
+        self.interval_options = {
+            'method': config.api.interval_method,
+            'z': config.api.interval_z,
+            'quantiles': config.api.interval_quantiles
+        }
+        budget = memory_budget_mb if memory_budget_mb is not None else config.api.model_memory_budget_mb
+        self.memory_budget = budget * 1024**2
+        self.scores = scores if scores is not None else read_model_scores(artifact_dir)
+        
+        # Bundles are immutable, so the model list is read once. When the
+        # training history is known, only the models it lists are served.
+        paths = glob.glob(os.path.join(artifact_dir, f'*{MODEL_SUFFIX}'))
+        names = (os.path.basename(path)[:-len(MODEL_SUFFIX)] for path in paths)
+        self.names = sorted(name for name in names if not self.scores or name in self.scores)
+        
+        self._models = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        
+        self.loads = 0
+        self.evictions = 0
+    
+    def available(self):
+        """Names of the trained models in the bundle"""
+        return list(self.names)
+    
+    def model_path(self, name):
+        return os.path.join(self.artifact_dir, f'{name}{MODEL_SUFFIX}')
+    
+    def get(self, name, pin=False):
+        """Return a loaded model, loading it on first use"""
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                self._models.move_to_end(name)
+                if pin:
+                    self._pinned.add(name)
+                return entry
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        
+        # Load outside the registry lock so other models stay available; concurrent
+        # requests for the same model wait for a single load
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(name)
+            if entry is None:
+                entry = self.load(name)
+            
+            with self._lock:
+                self._models[name] = entry
+                self._models.move_to_end(name)
+                if pin:
+                    self._pinned.add(name)
+                self.evict()
+        return entry
+    
+    def load(self, name):
+        """Load one model and build its uncertainty engine"""
+        # Imported here so the API module starts without joblib
+        import joblib
+        
+        path = self.model_path(name)
+        if not os.path.exists(path):
+            raise KeyError(f"Unknown model: {name}. Available: {self.available()}")
+        
+        if self.compiled:
+            entry = self.load_compiled(name, path)
+            if entry is not None:
+                self.loads += 1
+                return entry
+        
+        # Prefer the memory-mapped copy so worker processes share its pages
+        shared_path = os.path.join(self.artifact_dir, f'{name}{SHARED_SUFFIX}')
+        shared = self.shared_loading and os.path.exists(shared_path)
+        if shared:
+            model = load_shared_model(shared_path)
+        else:
+            model = joblib.load(path)
+        
+        uncertainty = None
+        if TreeUncertainty.supports(model):
+            uncertainty = TreeUncertainty(model, **self.interval_options)
+        
+        self.loads += 1
+        # The uncompressed pickle size is a close estimate of the in-memory size
+        return LoadedModel(name, model, os.path.getsize(path), uncertainty, self.scores.get(name), shared)
+    
+    def load_compiled(self, name, path):
+        """Load a tree ensemble into the flat-array engine, or None for other models"""
+        compiled_path = os.path.join(self.artifact_dir, f'{name}{COMPILED_SUFFIX}')
+        if (os.path.exists(compiled_path)
+                and compiled_source_digest(compiled_path) == file_digest(path)):
+            model = CompiledTreeEnsemble.load(compiled_path, **self.interval_options)
+        else:
+            # No exported arrays, or arrays compiled from another version of
+            # the pickle: compile the pickled model in memory
+            import joblib
+            
+            pickled = joblib.load(path)
+            if not CompiledTreeEnsemble.supports(pickled):
+                return None
+            model = CompiledTreeEnsemble.from_model(pickled, **self.interval_options)
+        
+        # Bagged ensembles carry their own intervals; boosted stages have none
+        uncertainty = model if model.bagged else None
+        return LoadedModel(name, model, os.path.getsize(path), uncertainty, self.scores.get(name),
+                           compiled=True)
+    
+    def memory_used(self):
+        return sum(entry.size_bytes for entry in self._models.values())
+    
+    def evict(self):
+        """Drop least recently used, unpinned models until under the budget (lock held)"""
+        if self.memory_budget <= 0:
+            return
+        
+        for name in list(self._models):
+            if self.memory_used() <= self.memory_budget:
+                break
+            if name in self._pinned:
+                continue
+            del self._models[name]
+            self.evictions += 1
+    
+    def stats(self):
+        """Return registry counters for monitoring"""
+        with self._lock:
+            return {
+                'available': self.available(),
+                'loaded': list(self._models),
+                'memory_mapped': [name for name, entry in self._models.items() if entry.shared],
+                'compiled': [name for name, entry in self._models.items() if entry.compiled],
+                'pinned': sorted(self._pinned),
+                'memory_used_mb': self.memory_used() / 1024**2,
+                'memory_budget_mb': self.memory_budget / 1024**2,
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+def read_model_scores(artifact_dir):
+    """Read each model's test R² from the training history, if present"""
+    path = os.path.join(artifact_dir, 'training_history.csv')
+    if not os.path.exists(path):
+        return {}
+    
+    scores = {}
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                scores[row['model_name']] = float(row['test_r2'])
+            except (KeyError, ValueError):
+                continue
+    return scores
@@ -1,114 +1,471 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.svm import SVR
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import joblib
+from joblib import Parallel, delayed, cpu_count, effective_n_jobs, parallel_config
 import os
+import json
+import hashlib
+import time
 from datetime import datetime
+from profiling import profile_from_argv
+from config import config
+from split_storage import get_split_storage
+from data_processing import clear_pending_increment, load_processing_state
+from artifacts import publish_bundle, file_digest
+from shared_models import save_shared_model
+from compiled_trees import export_compiled_model
+from linear_engine import fit_linear_models
+
+# Best parameters per model, written by hyperparameter_search.py
+TUNED_PARAMS_FILE = 'tuned_params.json'
+
+def data_fingerprint(X, y):
+    """Short digest identifying the data a search ran on"""
+    digest = hashlib.sha256()
+    for array in (X, y):
+        # Storage backends return different dtypes for the same values
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()[:16]
+
+def fit_and_evaluate(model_name, model, X_train, y_train, X_test, y_test, fit_rows=slice(None)):
+    """Fit a model (on fit_rows of the training data) and compute its train/test metrics"""
+    # Train the model
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+    model.fit(X_train[fit_rows], y_train[fit_rows])
+    training_time = time.perf_counter() - start_time
+    cpu_time = time.process_time() - start_cpu
+    
+    return model, evaluate_model(model_name, model, X_train, y_train, X_test, y_test, training_time, cpu_time)
+
+def evaluate_model(model_name, model, X_train, y_train, X_test, y_test, training_time, cpu_time):
+    """Train/test metrics of a fitted model"""
+    # Make predictions
+    y_pred_train = model.predict(X_train)
+    y_pred_test = model.predict(X_test)
+    
+    # Calculate metrics
+    train_r2 = r2_score(y_train, y_pred_train)
+    test_r2 = r2_score(y_test, y_pred_test)
+    train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
+    test_rmse = np.sqrt(mean_squared_error(y_test, y_pred_test))
+    train_mae = mean_absolute_error(y_train, y_pred_train)
+    test_mae = mean_absolute_error(y_test, y_pred_test)
+    
+    metrics = {
+        'model_name': model_name,
+        'train_r2': train_r2,
+        'test_r2': test_r2,
+        'train_rmse': train_rmse,
+        'test_rmse': test_rmse,
+        'train_mae': train_mae,
+        'test_mae': test_mae,
+        'training_time': training_time,
+        'cpu_time': cpu_time,
+        'timestamp': datetime.now().isoformat()
+    }
+    
+    # Boosting rounds actually run when early stopping ended training before max_iter
+    if getattr(model, 'do_early_stopping_', False):
+        metrics['boosting_iterations'] = model.n_iter_
+    
+    return metrics
+
+def categorical_feature_mask(feature_columns, label_encoders, max_bins=255):
+    """Feature columns that are label-encoded categories with at most max_bins levels"""
+    return [col in label_encoders and len(label_encoders[col].classes_) <= max_bins for col in feature_columns]
+
+def make_gradient_boosting(model_dir='models'):
+    """Gradient boosting estimator of the configured backend.
+    
+    The histogram backend splits label-encoded columns natively as
+    categories, using the encoders saved by data processing to find the
+    columns with few enough categories; without saved encoders every
+    column is binned as a number. The codes reach the estimator scaled, so
+    this relies on scikit-learn >= 1.4, which ordinal-encodes categorical
+    columns itself instead of requiring integer codes below max_bins.
+    """
+    if config.model.gradient_boosting_backend != 'histogram':
+        return GradientBoostingRegressor(**config.model.gradient_boosting_params)
+    
+    params = dict(config.model.hist_gradient_boosting_params)
+    if config.model.hist_native_categorical:
+        try:
+            feature_columns = joblib.load(f'{model_dir}/feature_columns.pkl')
+            label_encoders = joblib.load(f'{model_dir}/label_encoders.pkl')
+        except FileNotFoundError:
+            feature_columns, label_encoders = [], {}
+        mask = categorical_feature_mask(feature_columns, label_encoders, params.get('max_bins', 255))
+        if any(mask):
+            params['categorical_features'] = mask
+    return HistGradientBoostingRegressor(**params)
+
+def ensemble_trees(model):
+    """Fitted trees of a forest or gradient boosting model"""
+    return [estimator.tree_ for estimator in np.ravel(model.estimators_)]
+
+def rescale_tree_thresholds(model, old_mean, old_scale, new_mean, new_scale, X_reference):
+    """Move split thresholds from one standard scaling of the features to another.
+    
+    Trees compare float32 features, and sklearn may place a threshold within
+    one float32 step of a training value, so mapping thresholds through the
+    affine change of scale alone can flip rows across a split. Instead each
+    threshold moves to the midpoint between the new float32 images of the
+    reference values on either side of it. `X_reference` holds the rows the
+    model was trained on, already in the new scaling, and all of them reach
+    the same leaves as before.
+    
+    The thresholds are edited in place through sklearn's Tree arrays, which
+    is not a public API, so the result is checked: returns False when any
+    reference row now reaches another leaf, and the model must be refitted.
+    """
+    X_old = (X_reference * new_scale + new_mean - old_mean) / old_scale
+    expected_leaves = model.apply(X_old)
+    
+    sides = []
+    for f in range(X_reference.shape[1]):
+        new_values = np.unique(X_reference[:, f])
+        old_values = (new_values * new_scale[f] + new_mean[f] - old_mean[f]) / old_scale[f]
+        sides.append((old_values.astype(np.float32), new_values.astype(np.float32)))
+    
+    for tree in ensemble_trees(model):
+        threshold = tree.threshold
+        features = tree.feature
+        for f in np.unique(features[tree.children_left != -1]):
+            nodes = np.flatnonzero((tree.children_left != -1) & (features == f))
+            old_values, new_values = sides[f]
+            
+            # Outside the reference range, fall back to the plain affine map
+            moved = (threshold[nodes] * old_scale[f] + old_mean[f] - new_mean[f]) / new_scale[f]
+            right = np.searchsorted(old_values, threshold[nodes], side='right')
+            inside = (right > 0) & (right < len(old_values))
+            moved[inside] = (new_values[right[inside] - 1].astype(np.float64)
+                             + new_values[right[inside]].astype(np.float64)) / 2
+            threshold[nodes] = moved
+    
+    return np.array_equal(model.apply(X_reference), expected_leaves)
+
+def extend_ensemble(model, n_new_rows, n_old_rows):
+    """Enable warm start and raise n_estimators so the next fit only adds trees.
+    
+    Forests grow in proportion to the new data, so new trees carry the same
+    weight per row as the old ones; boosting continues with a fixed number
+    of stages that fit the residuals on the new rows.
+    """
+    if isinstance(model.estimators_, np.ndarray):
+        n_new = config.model.incremental_boosting_stages
+    else:
+        n_new = max(1, int(round(model.n_estimators * n_new_rows / max(n_old_rows, 1))))
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + n_new)
+    return n_new
+
+def safe_fit_and_evaluate(model_name, model, X_train, y_train, X_test, y_test):
+    """Run fit_and_evaluate in a worker, returning the error instead of raising"""
+    try:
+        model, metrics = fit_and_evaluate(model_name, model, X_train, y_train, X_test, y_test)
+        return model, metrics, None
+    except Exception as e:
+        return None, None, str(e)
 
 class ModelTrainer:
-    def __init__(self):
+    def __init__(self, n_jobs=None, backend=None):
         self.models = {}
         self.best_model = None
         self.best_score = -np.inf
         self.training_history = []
+        self.training_summary = {}
+        
+        # Per-model files written by this trainer, published as the run's bundle
+        self.saved_artifacts = []
         
-    def initialize_models(self):
-        """Initialize different ML models"""
+        # Number of models fitted concurrently (1 trains them one after another)
+        self.n_jobs = n_jobs if n_jobs is not None else config.model.training_n_jobs
+        self.backend = backend or config.model.training_backend
+    
+    def initialize_models(self, use_tuned_params=None, X_train=None, y_train=None):
+        """Initialize different ML models from the configured parameters.
+        
+        Tuned parameters are only applied when they were searched on the
+        training data (the given arrays, else the saved training split).
+        """
+        linear_params = config.model.linear_models_params
         self.models = {
             'linear_regression': LinearRegression(),
-            'ridge_regression': Ridge(alpha=1.0),
-            'lasso_regression': Lasso(alpha=1.0),
-            'random_forest': RandomForestRegressor(
-                n_estimators=100,
-                max_depth=15,
-                random_state=42,
-                n_jobs=-1
-            ),
-            'gradient_boosting': GradientBoostingRegressor(
-                n_estimators=100,
-                learning_rate=0.1,
-                max_depth=6,
-                random_state=42
-            ),
-            'support_vector': SVR(kernel='rbf', C=100, gamma='scale')
+            'ridge_regression': Ridge(alpha=linear_params['ridge_alpha']),
+            'lasso_regression': Lasso(alpha=linear_params['lasso_alpha']),
+            'random_forest': RandomForestRegressor(**config.model.random_forest_params),
+            'gradient_boosting': make_gradient_boosting(config.data.models_dir),
+            'support_vector': SVR(**config.model.support_vector_params)
         }
+        
+        # Parameters found by hyperparameter_search.py take precedence over the defaults
+        if use_tuned_params is None:
+            use_tuned_params = config.model.use_tuned_params
+        if use_tuned_params:
+            fingerprint = None
+            for model_name, tuned in load_tuned_params(config.data.models_dir).items():
+                model = self.models.get(model_name)
+                if model is None:
+                    continue
+                if tuned.get('data_fingerprint') is not None:
+                    if fingerprint is None:
+                        if X_train is None:
+                            X_train, _, y_train, _ = load_processed_data()
+                        fingerprint = data_fingerprint(X_train, y_train) if X_train is not None else ''
+                    if tuned['data_fingerprint'] != fingerprint:
+                        print(f"Warning: ignoring parameters tuned for {model_name} on other training data; "
+                              f"run hyperparameter_search.py again")
+                        continue
+                # Parameters tuned for another estimator (e.g. the other boosting backend) don't apply
+                if (tuned.get('estimator', type(model).__name__) != type(model).__name__
+                        or not set(tuned['params']) <= set(model.get_params())):
+                    print(f"Ignoring parameters tuned for another {model_name} estimator")
+                    continue
+                model.set_params(**tuned['params'])
+                print(f"Using tuned parameters for {model_name}: {tuned['params']}")
     
     def train_model(self, model_name, X_train, y_train, X_test, y_test):
         """Train a specific model and return performance metrics"""
         print(f"Training {model_name}...")
         
-        model = self.models[model_name]
-        
-        # Train the model
-        start_time = datetime.now()
-        model.fit(X_train, y_train)
-        training_time = (datetime.now() - start_time).total_seconds()
-        
-        # Make predictions
-        y_pred_train = model.predict(X_train)
-        y_pred_test = model.predict(X_test)
-        
-        # Calculate metrics
-        train_r2 = r2_score(y_train, y_pred_train)
-        test_r2 = r2_score(y_test, y_pred_test)
-        train_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
-        test_rmse = np.sqrt(mean_squared_error(y_test, y_pred_test))
-        train_mae = mean_absolute_error(y_train, y_pred_train)
-        test_mae = mean_absolute_error(y_test, y_pred_test)
-        
-        metrics = {
-            'model_name': model_name,
-            'train_r2': train_r2,
-            'test_r2': test_r2,
-            'train_rmse': train_rmse,
-            'test_rmse': test_rmse,
-            'train_mae': train_mae,
-            'test_mae': test_mae,
-            'training_time': training_time,
-            'timestamp': datetime.now().isoformat()
-        }
+        model, metrics = fit_and_evaluate(model_name, self.models[model_name], 
+                                          X_train, y_train, X_test, y_test)
+        self.record_result(model_name, model, metrics)
         
+        return model, metrics
+    
+    def record_result(self, model_name, model, metrics, model_dir='models'):
+        """Record and save a trained model; return whether it is the best so far"""
+        self.models[model_name] = model
         self.training_history.append(metrics)
         
+        # Every trained model is saved: the API serves all of them from the bundle
+        self.save_model(model, model_name, model_dir)
+        
         # Check if this is the best model
-        if test_r2 > self.best_score:
-            self.best_score = test_r2
+        best = metrics['test_r2'] > self.best_score
+        if best:
+            self.best_score = metrics['test_r2']
             self.best_model = model_name
-            self.save_model(model, model_name)
         
-        print(f"{model_name} - Test R²: {test_r2:.4f}, Test RMSE: {test_rmse:.2f}")
+        print(f"{model_name} - Test R²: {metrics['test_r2']:.4f}, Test RMSE: {metrics['test_rmse']:.2f}")
+        return best
+    
+    def train_incremental(self, X_train, y_train, X_test, y_test, increment, model_dir='models'):
+        """Update the saved models with the training rows added since they were fitted.
         
-        return model, metrics
+        `increment` is the pending increment of incremental processing: the
+        first new training row and the scaler the saved models were fitted
+        with. Saved forests and boosting models are moved onto the current
+        scaler and grown with warm start on the new rows only; other models,
+        and ensembles with no saved copy or whose moved trees fail the leaf
+        check of rescale_tree_thresholds, are refitted on all rows. Every
+        model is saved again, so none is left on the old scaling.
+        """
+        self.initialize_models(X_train=X_train, y_train=y_train)
+        train_start = increment['train_start']
+        new_rows = slice(train_start, None)
+        old_mean = np.asarray(increment['previous_mean'])
+        old_scale = np.asarray(increment['previous_scale'])
+        scaler = joblib.load(f'{model_dir}/scaler.pkl')
+        
+        start_time = time.perf_counter()
+        results = {}
+        for model_name, model in self.models.items():
+            model_path = f'{model_dir}/{model_name}_model.pkl'
+            saved = os.path.exists(model_path)
+            fit_rows = slice(None)
+            
+            try:
+                saved_model = None
+                if saved and hasattr(model, 'warm_start') and hasattr(model, 'n_estimators'):
+                    saved_model = joblib.load(model_path)
+                    if not rescale_tree_thresholds(saved_model, old_mean, old_scale, scaler.mean_,
+                                                   scaler.scale_, np.asarray(X_train[:train_start])):
+                        print(f"Rescaled {model_name} trees disagree with the saved model; refitting")
+                        saved_model = None
+                
+                if saved_model is not None:
+                    model = saved_model
+                    n_new = extend_ensemble(model, len(X_train) - train_start, train_start)
+                    fit_rows = new_rows
+                    print(f"Updating {model_name}: {n_new} new estimators on {len(X_train) - train_start:,} rows...")
+                else:
+                    print(f"Training {model_name}...")
+                
+                model, metrics = fit_and_evaluate(model_name, model, X_train, y_train, X_test, y_test, fit_rows)
+                if fit_rows != slice(None):
+                    # Later full fits must start from scratch
+                    model.set_params(warm_start=False)
+            except Exception as e:
+                print(f"Error training {model_name}: {e}")
+                continue
+            
+            metrics['incremental'] = fit_rows != slice(None)
+            self.record_result(model_name, model, metrics, model_dir)
+            results[model_name] = {
+                'model': model,
+                'metrics': metrics
+            }
+        
+        wall_time = time.perf_counter() - start_time
+        cpu_time = sum(result['metrics']['cpu_time'] for result in results.values())
+        self.training_summary = {
+            'n_jobs': 1,
+            'backend': 'incremental',
+            'wall_time': wall_time,
+            'cpu_time': cpu_time,
+            'parallel_speedup': cpu_time / wall_time if wall_time > 0 else 0.0
+        }
+        return results
     
     def train_all_models(self, X_train, y_train, X_test, y_test):
         """Train all models and compare performance"""
-        self.initialize_models()
+        self.initialize_models(X_train=X_train, y_train=y_train)
+        
+        start_time = time.perf_counter()
         
+        # Linear models share one pass of sufficient statistics instead of separate fits
         results = {}
+        if config.model.linear_engine == 'gram':
+            results = self.train_linear_models(X_train, y_train, X_test, y_test)
+        remaining = [model_name for model_name in self.models if model_name not in results]
         
-        for model_name in self.models.keys():
-            try:
-                model, metrics = self.train_model(model_name, X_train, y_train, X_test, y_test)
-                results[model_name] = {
-                    'model': model,
-                    'metrics': metrics
-                }
-            except Exception as e:
-                print(f"Error training {model_name}: {e}")
+        if effective_n_jobs(self.n_jobs) == 1:
+            for model_name in remaining:
+                try:
+                    model, metrics = self.train_model(model_name, X_train, y_train, X_test, y_test)
+                    results[model_name] = {
+                        'model': model,
+                        'metrics': metrics
+                    }
+                except Exception as e:
+                    print(f"Error training {model_name}: {e}")
+                    continue
+        else:
+            results.update(self.train_models_parallel(X_train, y_train, X_test, y_test, remaining))
+        
+        wall_time = time.perf_counter() - start_time
+        cpu_time = sum(result['metrics']['cpu_time'] for result in results.values())
+        self.training_summary = {
+            'n_jobs': self.n_jobs,
+            'backend': self.backend,
+            'wall_time': wall_time,
+            'cpu_time': cpu_time,
+            'parallel_speedup': cpu_time / wall_time if wall_time > 0 else 0.0
+        }
+        
+        return results
+    
+    def train_linear_models(self, X_train, y_train, X_test, y_test):
+        """Fit the linear models from shared XᵀX and Xᵀy statistics (see linear_engine.py)"""
+        print("Training linear models from chunked sufficient statistics...")
+        try:
+            fitted = fit_linear_models(self.models, X_train, y_train)
+        except Exception as e:
+            print(f"Error computing sufficient statistics, fitting linear models separately: {e}")
+            return {}
+        
+        results = {}
+        for model_name, (model, training_time, cpu_time, alpha) in fitted.items():
+            metrics = evaluate_model(model_name, model, X_train, y_train, X_test, y_test, training_time, cpu_time)
+            if alpha is not None:
+                metrics['selected_alpha'] = alpha
+                print(f"{model_name}: alpha {alpha:g} selected along the path")
+            self.record_result(model_name, model, metrics)
+            results[model_name] = {
+                'model': model,
+                'metrics': metrics
+            }
+        return results
+    
+    def train_models_parallel(self, X_train, y_train, X_test, y_test, model_names=None):
+        """Fit independent models concurrently, then record them in a fixed order"""
+        model_names = list(self.models) if model_names is None else model_names
+        if not model_names:
+            return {}
+        n_workers = min(effective_n_jobs(self.n_jobs), len(model_names))
+        
+        # Split cores between workers so models with their own n_jobs don't oversubscribe
+        threads_per_worker = max(1, cpu_count() // n_workers)
+        for model_name in model_names:
+            if 'n_jobs' in self.models[model_name].get_params():
+                self.models[model_name].set_params(n_jobs=threads_per_worker)
+        
+        print(f"Training {len(model_names)} models on {n_workers} {self.backend} workers "
+              f"({threads_per_worker} threads each)...")
+        
+        backend_options = {}
+        if self.backend == 'loky':
+            backend_options['inner_max_num_threads'] = threads_per_worker
+        
+        with parallel_config(backend=self.backend, **backend_options):
+            outputs = Parallel(n_jobs=n_workers)(
+                delayed(safe_fit_and_evaluate)(model_name, self.models[model_name], X_train, y_train, X_test, y_test)
+                for model_name in model_names
+            )
+        
+        # Record results in self.models order so history and best-model selection are deterministic
+        results = {}
+        for model_name, (model, metrics, error) in zip(model_names, outputs):
+            if error is not None:
+                print(f"Error training {model_name}: {error}")
                 continue
+            
+            self.record_result(model_name, model, metrics)
+            results[model_name] = {
+                'model': model,
+                'metrics': metrics
+            }
         
         return results
     
+    def select_by_cross_validation(self, cv_summary):
+        """Add cross-validation metrics to the training history and pick the best mean CV R²"""
+        for metrics in self.training_history:
+            metrics.update(cv_summary.get(metrics['model_name'], {}))
+        
+        scored = [metrics for metrics in self.training_history if 'cv_r2_mean' in metrics]
+        if not scored:
+            return
+        
+        best = max(scored, key=lambda metrics: metrics['cv_r2_mean'])
+        self.best_model = best['model_name']
+        self.best_score = best['cv_r2_mean']
+    
     def save_model(self, model, model_name, model_dir='models'):
         """Save trained model"""
         os.makedirs(model_dir, exist_ok=True)
         model_path = f'{model_dir}/{model_name}_model.pkl'
         joblib.dump(model, model_path)
         print(f"Model saved: {model_path}")
+        written = [f'{model_name}_model.pkl']
+        
+        # Memory-mappable copy for API workers that share model pages
+        if config.model.export_shared_models:
+            save_shared_model(model, f'{model_dir}/{model_name}_model.shared')
+            written.append(f'{model_name}_model.shared')
+        
+        # Flat-array form of tree ensembles for the compiled inference engine
+        if config.model.export_compiled_models:
+            compiled_path = f'{model_dir}/{model_name}_compiled.npz'
+            if export_compiled_model(model, compiled_path, file_digest(model_path)) is not None:
+                written.append(f'{model_name}_compiled.npz')
+        
+        # Files derived from an earlier version of this model are now stale
+        for suffix in ('_model.shared', '_compiled.npz'):
+            stale_path = f'{model_dir}/{model_name}{suffix}'
+            if f'{model_name}{suffix}' not in written and os.path.exists(stale_path):
+                os.remove(stale_path)
+        
+        self.saved_artifacts += [name for name in written if name not in self.saved_artifacts]
     
     def save_training_history(self, model_dir='models'):
         """Save training history"""
@@ -137,13 +494,22 @@ class ModelTrainer:
                 return model.feature_importances_
         return None
 
+def load_tuned_params(model_dir='models'):
+    """Read the best parameters saved by the hyperparameter search, if any"""
+    path = os.path.join(model_dir, TUNED_PARAMS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
 def load_processed_data():
     """Load processed training data"""
     try:
-        X_train = pd.read_csv('data/X_train_processed.csv').values
-        X_test = pd.read_csv('data/X_test_processed.csv').values
-        y_train = pd.read_csv('data/y_train.csv').values.ravel()
-        y_test = pd.read_csv('data/y_test.csv').values.ravel()
+        storage = get_split_storage()
+        X_train = storage.load_array('X_train_processed')
+        X_test = storage.load_array('X_test_processed')
+        y_train = storage.load_array('y_train').ravel()
+        y_test = storage.load_array('y_test').ravel()
         return X_train, X_test, y_train, y_test
     except Exception as e:
         print(f"Error loading processed data: {e}")
@@ -157,18 +523,39 @@ def main():
         # Initialize trainer
         trainer = ModelTrainer()
         
-        # Train all models
-        results = trainer.train_all_models(X_train, y_train, X_test, y_test)
+        # Grow the saved models on newly processed rows, or train all models from scratch
+        state, _ = load_processing_state()
+        increment = state.get('pending') if state else None
+        if config.model.training_mode == 'incremental' and increment:
+            results = trainer.train_incremental(X_train, y_train, X_test, y_test, increment)
+        else:
+            if config.model.training_mode == 'incremental':
+                print("No processed increment pending; training all models")
+            results = trainer.train_all_models(X_train, y_train, X_test, y_test)
+        
+        # The models now match the current scaler
+        clear_pending_increment()
+        
+        # Choose the best model on cross-validation instead of the single test split
+        if config.model.selection_method == 'cv':
+            from cross_validation import cross_validate_models
+            cv_summary = cross_validate_models(trainer.models, model_dir=config.data.models_dir)
+            trainer.select_by_cross_validation(cv_summary)
         
         # Save training history
         trainer.save_training_history()
         
+        # Snapshot the artifacts as a new bundle; running APIs pick it up on their next poll
+        version = publish_bundle(config.data.models_dir, model_artifacts=trainer.saved_artifacts)
+        print(f"Published model bundle {version}")
+        
         # Print summary
         print("\n" + "="*50)
         print("TRAINING SUMMARY")
         print("="*50)
         print(f"Best Model: {trainer.best_model}")
-        print(f"Best R² Score: {trainer.best_score:.4f}")
+        score_name = 'mean CV R²' if config.model.selection_method == 'cv' else 'R² Score'
+        print(f"Best {score_name}: {trainer.best_score:.4f}")
         
         # Display all results
         for model_name, result in results.items():
@@ -179,9 +566,14 @@ def main():
             print(f"  Test MAE: {metrics['test_mae']:.2f}")
             print(f"  Training Time: {metrics['training_time']:.2f}s")
         
+        summary = trainer.training_summary
+        print(f"\nWall-clock Time: {summary['wall_time']:.2f}s "
+              f"(summed CPU time {summary['cpu_time']:.2f}s, n_jobs={summary['n_jobs']})")
+        
         print("\nModel training completed successfully!")
     else:
         print("Please run data_processing.py first to prepare the data.")
 
 if __name__ == "__main__":
-    main()
+    with profile_from_argv('model_training'):
+        main()
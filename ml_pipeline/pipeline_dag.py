@@ -0,0 +1,429 @@
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from artifacts import file_digest, publish_bundle
+from profiling import profile_from_argv
+from config import config
+
+# The pipeline modules are flat scripts in this directory
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def pipeline_source(name):
+    """Path of the pipeline module with this name, or None"""
+    path = os.path.join(PIPELINE_DIR, f'{name}.py')
+    return path if os.path.exists(path) else None
+
+def defining_source(value):
+    """Path of the pipeline module defining a function, class or module, or None"""
+    if not (inspect.isfunction(value) or inspect.isclass(value) or inspect.ismodule(value)):
+        return None
+    try:
+        path = inspect.getsourcefile(value)
+    except TypeError:
+        return None
+    return path if path and os.path.dirname(os.path.abspath(path)) == PIPELINE_DIR else None
+
+def referenced_names(code):
+    """Global, attribute and imported names used by a code object and the code nested in it"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= referenced_names(const)
+    return names
+
+def imported_sources(path):
+    """Pipeline modules a source file imports, at module level or inside functions"""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    return {pipeline_source(name) for name in names} - {None}
+
+def code_sources(functions):
+    """Pipeline modules a stage's code depends on.
+    
+    These are the modules of the pipeline functions, classes and modules
+    the functions use (including ones they import locally), the module of
+    each method (its class calls its other methods through self), and
+    every pipeline module those import in turn.
+    """
+    pending = set()
+    for function in functions:
+        if '.' in getattr(function, '__qualname__', ''):
+            pending.add(defining_source(function))
+        code = getattr(inspect.unwrap(function), '__code__', None)
+        if code is None:
+            continue
+        for name in referenced_names(code):
+            value = function.__globals__.get(name)
+            pending.add(defining_source(value) if value is not None else pipeline_source(name))
+    
+    sources = set()
+    pending.discard(None)
+    while pending:
+        path = pending.pop()
+        sources.add(path)
+        pending |= imported_sources(path) - sources
+    return sorted(sources)
+
+def code_fingerprint(functions):
+    """Digest of the source a stage runs, so editing it or any pipeline module it calls invalidates it"""
+    digest = hashlib.sha256()
+    for function in functions:
+        try:
+            source = inspect.getsource(function)
+        except (OSError, TypeError):
+            source = getattr(function, '__qualname__', repr(function))
+        digest.update(source.encode())
+    for path in code_sources(functions):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def key_default(value):
+    """JSON form of stage parameters that are not plain values"""
+    if hasattr(value, 'get_params'):
+        # Estimators are keyed by their full parameters, not their (abbreviated) repr
+        return {'class': type(value).__name__, 'params': value.get_params()}
+    return repr(value)
+
+class StageCache:
+    """Content-addressed store of stage results on local disk.
+    
+    Each result is a joblib file named by its key. A hit refreshes the
+    file's modification time; when the cache grows past its size limit,
+    the entries used longest ago are deleted first.
+    """
+    
+    def __init__(self, cache_dir=None, max_mb=None):
+        self.cache_dir = cache_dir or config.data.stage_cache_dir
+        max_mb = max_mb if max_mb is not None else config.data.stage_cache_max_mb
+        self.max_bytes = max_mb * 1024**2
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.pkl')
+    
+    def get(self, key):
+        """Return (True, value) on a hit and (False, None) on a miss"""
+        import joblib
+        path = self.path(key)
+        try:
+            value = joblib.load(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None
+        
+        os.utime(path)
+        self.hits += 1
+        return True, value
+    
+    def put(self, key, value):
+        """Store a result, then evict old entries if over the size limit"""
+        import joblib
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+    
+    def entries(self):
+        """(last used, size, path) of every cached result"""
+        entries = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.pkl'):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits its limit"""
+        if self.max_bytes <= 0:
+            return
+        
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+    
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def stats(self):
+        entries = self.entries()
+        return {
+            'entries': len(entries),
+            'size_mb': sum(size for _, size, _ in entries) / 1024**2,
+            'max_mb': self.max_bytes / 1024**2,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+class Stage:
+    """One pipeline step: a function of its input stages' results and its parameters"""
+    
+    def __init__(self, name, func, inputs=(), params=None, code=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        # Functions whose source identifies the stage's code
+        self.code = code or (func,)
+
+class PipelineDAG:
+    """Run pipeline stages in dependency order, skipping the ones already cached.
+    
+    A stage's key hashes its name, parameters, the source of the code it
+    runs and the keys of its inputs, so any upstream change reaches every
+    downstream key without hashing intermediate data. Source files enter
+    through a stage whose parameters include a digest of the file.
+    
+    Results are loaded lazily: a cached stage is only read from disk when
+    it is requested or when a downstream stage has to be recomputed.
+    """
+    
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else StageCache()
+        self.stages = {}
+        self.keys = {}
+        self.results = {}
+        self.status = {}
+        self.timings = {}
+    
+    def add(self, name, func, inputs=(), params=None, code=None):
+        """Add a stage; its inputs must already be in the graph, so it stays acyclic"""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        missing = [stage for stage in inputs if stage not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {missing}")
+        
+        self.stages[name] = Stage(name, func, inputs, params, code)
+        return self.stages[name]
+    
+    def stage_key(self, stage):
+        import sklearn
+        payload = json.dumps({
+            'stage': stage.name,
+            'params': stage.params,
+            'code': code_fingerprint(stage.code),
+            'sklearn': sklearn.__version__,
+            'inputs': [self.keys[name] for name in stage.inputs]
+        }, sort_keys=True, default=key_default)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def value(self, name):
+        """Result of a stage: from memory, from the cache, or computed"""
+        if name in self.results:
+            return self.results[name]
+        
+        stage = self.stages[name]
+        start_time = time.perf_counter()
+        hit, result = self.cache.get(self.keys[name])
+        if not hit:
+            inputs = [self.value(upstream) for upstream in stage.inputs]
+            start_time = time.perf_counter()
+            result = stage.func(*inputs, **stage.params)
+            self.cache.put(self.keys[name], result)
+        
+        self.timings[name] = time.perf_counter() - start_time
+        self.status[name] = 'cached' if hit else 'computed'
+        self.results[name] = result
+        return result
+    
+    def run(self, targets=None):
+        """Return the results of the target stages (default: every stage)"""
+        # Insertion order is a topological order, so inputs are keyed first
+        for name, stage in self.stages.items():
+            self.keys[name] = self.stage_key(stage)
+        
+        targets = targets or list(self.stages)
+        return {name: self.value(name) for name in targets}
+    
+    def report(self):
+        """Status and time of each stage in the last run"""
+        return [{
+            'stage': name,
+            'status': self.status.get(name, 'not needed'),
+            'seconds': self.timings.get(name, 0.0),
+            'key': self.keys.get(name, '')[:12]
+        } for name in self.stages]
+
+def load_raw(file_path, digest):
+    """Read the raw dataset (the digest only keys the cache entry)"""
+    from data_processing import DataProcessor
+    df = DataProcessor().load_data(file_path)
+    if df is None:
+        raise ValueError(f"Could not load {file_path}")
+    return df
+
+def raw_summary(df):
+    """Row count and row digests, for the processing state of incremental runs"""
+    from data_processing import row_digests
+    return len(df), row_digests(df)
+
+def clean_stage(df):
+    from data_processing import DataProcessor
+    processor = DataProcessor()
+    return processor.clean_data(df), processor.salary_bounds
+
+def encode_stage(cleaned):
+    from data_processing import DataProcessor
+    processor = DataProcessor()
+    df = processor.encode_categorical_features(cleaned[0].copy())
+    return df, processor.label_encoders
+
+def features_stage(encoded):
+    from data_processing import DataProcessor
+    processor = DataProcessor()
+    df = processor.create_features(encoded[0].copy())
+    X, y = processor.prepare_features(df)
+    return X, y, processor.feature_columns
+
+def split_stage(features, test_size, random_state):
+    from data_processing import DataProcessor
+    X, y, _ = features
+    return DataProcessor().split_data(X, y, test_size, random_state)
+
+def scale_stage(split):
+    from data_processing import DataProcessor
+    processor = DataProcessor()
+    X_train, X_test, _, _ = split
+    X_train_scaled, X_test_scaled = processor.scale_features(X_train, X_test)
+    return X_train_scaled, X_test_scaled, processor.scaler
+
+def fit_stage(scaled, split, model_name, model):
+    import numpy as np
+    from sklearn.base import clone
+    from model_training import fit_and_evaluate
+    X_train, X_test, _ = scaled
+    _, _, y_train, y_test = split
+    return fit_and_evaluate(model_name, clone(model), X_train, np.asarray(y_train), X_test, np.asarray(y_test))
+
+def build_pipeline(file_path, trainer, cache=None):
+    """The data processing and training stages, with one fit stage per model"""
+    from data_processing import DataProcessor, row_digests
+    from model_training import fit_and_evaluate
+    dag = PipelineDAG(cache)
+    dag.add('raw', load_raw, params={'file_path': file_path, 'digest': file_digest(file_path)},
+            code=(load_raw, DataProcessor.load_data))
+    dag.add('raw_summary', raw_summary, ['raw'], code=(raw_summary, row_digests))
+    dag.add('clean', clean_stage, ['raw'], code=(clean_stage, DataProcessor.clean_data))
+    dag.add('encode', encode_stage, ['clean'], code=(encode_stage, DataProcessor.encode_categorical_features))
+    dag.add('features', features_stage, ['encode'],
+            code=(features_stage, DataProcessor.create_features, DataProcessor.prepare_features))
+    dag.add('split', split_stage, ['features'],
+            params={'test_size': config.model.test_size, 'random_state': config.model.random_state},
+            code=(split_stage, DataProcessor.split_data))
+    dag.add('scale', scale_stage, ['split'], code=(scale_stage, DataProcessor.scale_features))
+    
+    for model_name, model in trainer.models.items():
+        dag.add(f'fit:{model_name}', fit_stage, ['scale', 'split'],
+                params={'model_name': model_name, 'model': model}, code=(fit_stage, fit_and_evaluate))
+    return dag
+
+def run_pipeline(file_path=None, cache=None):
+    """Process the data and train every model, reusing cached stage results.
+    
+    Writes the same splits, preprocessors, models, training history and
+    bundle as data_processing.py followed by model_training.py.
+    """
+    import pandas as pd
+    from data_processing import DataProcessor, save_processing_state, save_train_rows
+    from model_training import ModelTrainer
+    from split_storage import get_split_storage
+    file_path = file_path or config.data.raw_data_path
+    trainer = ModelTrainer()
+    trainer.initialize_models()
+    dag = build_pipeline(file_path, trainer, cache)
+    results = dag.run()
+    
+    X_train_scaled, X_test_scaled, scaler = results['scale']
+    _, _, y_train, y_test = results['split']
+    _, _, feature_columns = results['features']
+    
+    storage = get_split_storage()
+    storage.save('X_train_processed', pd.DataFrame(X_train_scaled, columns=feature_columns))
+    storage.save('X_test_processed', pd.DataFrame(X_test_scaled, columns=feature_columns))
+    storage.save('y_train', y_train)
+    storage.save('y_test', y_test)
+    
+    processor = DataProcessor()
+    processor.label_encoders = results['encode'][1]
+    processor.scaler = scaler
+    processor.feature_columns = feature_columns
+    processor.save_preprocessors(config.data.models_dir)
+    
+    save_train_rows(results['split'][0].index)
+    
+    n_raw_rows, digests = results['raw_summary']
+    save_processing_state({
+        'rows_processed': n_raw_rows,
+        'bytes_processed': os.path.getsize(file_path),
+        'salary_bounds': results['clean'][1],
+        'pending': None
+    }, digests)
+    
+    # Record in the usual model order so the best-model choice matches model_training.py
+    for model_name in trainer.models:
+        model, metrics = results[f'fit:{model_name}']
+        metrics = dict(metrics, cached=dag.status[f'fit:{model_name}'] == 'cached')
+        trainer.record_result(model_name, model, metrics)
+    trainer.save_training_history(config.data.models_dir)
+    
+    version = publish_bundle(config.data.models_dir, model_artifacts=trainer.saved_artifacts)
+    print(f"Published model bundle {version}")
+    return dag, trainer
+
+def main():
+    parser = argparse.ArgumentParser(description='Run data processing and training, reusing cached stages')
+    parser.add_argument('--input', default=None, help='raw CSV path (default: DataConfig.raw_data_path)')
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--max-mb', type=float, default=None, help='cache size limit (0 = unlimited)')
+    parser.add_argument('--clear-cache', action='store_true', help='empty the cache before running')
+    args = parser.parse_args()
+    
+    cache = StageCache(args.cache_dir, args.max_mb)
+    if args.clear_cache:
+        cache.clear()
+    
+    dag, trainer = run_pipeline(args.input, cache)
+    
+    print(f"\n{'stage':<28} {'status':<11} {'time (s)':>9}  key")
+    for row in dag.report():
+        print(f"{row['stage']:<28} {row['status']:<11} {row['seconds']:>9.3f}  {row['key']}")
+    
+    stats = cache.stats()
+    print(f"\nCache: {stats['entries']} entries, {stats['size_mb']:.1f} MB of {stats['max_mb']:.0f} MB, "
+          f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+    print(f"Best Model: {trainer.best_model} (R² {trainer.best_score:.4f})")
+
+if __name__ == "__main__":
+    with profile_from_argv('pipeline_dag'):
+        main()
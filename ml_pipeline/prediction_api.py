@@ -1,184 +1,734 @@
 
-from flask import Flask, request, jsonify
-import joblib
+from flask import Flask, Response, g, request, jsonify
 import numpy as np
-import pandas as pd
 from datetime import datetime
 import os
+import threading
+import time
+from artifacts import BundleWatcher, bundle_path, current_version, file_digest, verify_bundle
+from encoders import CompiledEncoder
+from model_registry import ModelRegistry
+from shared_models import process_memory
+from cache import PredictionCache
+from materialized import MaterializedPredictor
+from instrumentation import CONTENT_TYPE, instrumentation
+from profiling import StackSampler, active_sampler, profile_from_argv, profile_lock, profile_request_error
+from config import config
 
 app = Flask(__name__)
 
-class SalaryPredictor:
-    def __init__(self):
+# Fields every prediction request must provide
+REQUIRED_FIELDS = ['experience_years', 'education_level', 'company_size', 
+                   'employment_type', 'remote_ratio', 'work_year']
+
+class ModelBundle:
+    """One consistent, immutable set of loaded artifacts.
+    
+    Requests take a reference to the active bundle once and use it
+    throughout, so a reload can never mix artifacts from two training runs.
+    """
+    
+    def __init__(self, model_name, version, artifact_dir):
+        self.model_name = model_name
+        self.version = version
+        self.artifact_dir = artifact_dir
+        self.loaded_at = None
+        
         self.model = None
         self.scaler = None
         self.label_encoders = {}
+        self.encoder = None
         self.feature_columns = []
         self.model_info = {}
+        self.uncertainty = None
+        self.materialized = None
         
-    def load_model(self, model_name='random_forest'):
-        """Load trained model and preprocessors"""
-        try:
-            # Load model
-            self.model = joblib.load(f'models/{model_name}_model.pkl')
-            
-            # Load preprocessors
-            self.scaler = joblib.load('models/scaler.pkl')
-            self.label_encoders = joblib.load('models/label_encoders.pkl')
-            self.feature_columns = joblib.load('models/feature_columns.pkl')
-            
-            # Load model info
-            self.model_info = joblib.load('models/best_model_info.pkl')
+        # Every trained model in the bundle, loaded on first use; model_name is the default
+        self.registry = None
+        self.default_entry = None
+        
+        # Precomputed arrays for lean inference
+        self.scaler_mean = None
+        self.scaler_scale = None
+    
+    def path(self, name):
+        """Path of an artifact inside this bundle"""
+        return os.path.join(self.artifact_dir, name)
+    
+    def model_score(self, model_name):
+        """Test R² of a model, falling back to the best-model info"""
+        if self.registry is not None and model_name in self.registry.scores:
+            return self.registry.scores[model_name]
+        if model_name == self.model_info.get('best_model'):
+            return self.model_info.get('best_score', 0)
+        return 0
+
+def is_linear_model(model):
+    """Whether model.predict(X) is exactly X @ coef_ + intercept_"""
+    # The model is already loaded, so sklearn is imported by now
+    from sklearn.linear_model._base import LinearModel
+    
+    return isinstance(model, LinearModel) and np.ndim(model.coef_) == 1
+
+def bundle_attribute(name, default=None):
+    """Read-only view of an attribute of the active bundle"""
+    return property(lambda self: getattr(self.bundle, name) if self.bundle is not None else default)
+
+class SalaryPredictor:
+    model = bundle_attribute('model')
+    scaler = bundle_attribute('scaler')
+    label_encoders = bundle_attribute('label_encoders', {})
+    encoder = bundle_attribute('encoder')
+    feature_columns = bundle_attribute('feature_columns', [])
+    model_info = bundle_attribute('model_info', {})
+    uncertainty = bundle_attribute('uncertainty')
+    materialized = bundle_attribute('materialized')
+    scaler_mean = bundle_attribute('scaler_mean')
+    scaler_scale = bundle_attribute('scaler_scale')
+    version = bundle_attribute('version')
+    loaded_at = bundle_attribute('loaded_at')
+    
+    def __init__(self, inference_mode=None, model_dir=None):
+        self.bundle = None
+        self.model_name = None
+        self.requested_model = None
+        self.model_dir = model_dir or config.api.model_dir
+        self.inference_mode = inference_mode or config.api.inference_mode
+        self.watcher = None
+        
+        # Serializes reloads; readers never take it
+        self._swap_lock = threading.Lock()
+        
+        # Cache of (prediction, confidence interval) keyed on the encoded feature vector
+        self.cache = PredictionCache(max_size=config.api.prediction_cache_size,
+                                     ttl=config.api.prediction_cache_ttl)
+    
+    def artifact_source(self, version=None):
+        """Resolve the bundle version and directory to load from"""
+        version = version or current_version(self.model_dir)
+        if version is None:
+            # Flat model directory from before versioned bundles
+            return 'unversioned', self.model_dir
+        verify_bundle(version, self.model_dir)
+        return version, bundle_path(version, self.model_dir)
+    
+    def load_bundle(self, model_name, version, artifact_dir):
+        """Load every artifact of one bundle, off the request path"""
+        # Imported here so the API module starts without joblib
+        import joblib
+        
+        model_info = joblib.load(os.path.join(artifact_dir, 'best_model_info.pkl'))
+        
+        # 'best' follows whichever model won the training run of this bundle
+        if model_name == 'best':
+            model_name = model_info.get('best_model') or 'random_forest'
+        
+        bundle = ModelBundle(model_name, version, artifact_dir)
+        bundle.model_info = model_info
+        
+        if self.inference_mode == 'materialized':
+            # The lookup table stands in for the model and scaler
+            if not os.path.exists(bundle.path(f'{model_name}_lookup.npy')):
+                raise FileNotFoundError(f"Bundle {version} has no lookup table for {model_name}; "
+                                        f"build one with materialized.py")
+            bundle.materialized = MaterializedPredictor.load(
+                bundle.path(f'{model_name}_lookup'),
+                encoder_path=bundle.path('compiled_encoders.pkl'),
+                unknown_value=config.api.unknown_category_code
+            )
+            # A table must come from the exact model pickle it is served with
+            table_digest = bundle.materialized.metadata.get('model_digest')
+            if table_digest != file_digest(bundle.path(f'{model_name}_model.pkl')):
+                raise ValueError(f"Lookup table for {model_name} in bundle {version} was built "
+                                 f"from a different model; rebuild it with materialized.py")
+            bundle.model = bundle.materialized
+            bundle.encoder = bundle.materialized.encoder
+            bundle.feature_columns = bundle.materialized.feature_columns
+            bundle.loaded_at = datetime.now().isoformat()
+            return bundle
+        
+        # Load the default model; the others are loaded when first requested
+        bundle.registry = ModelRegistry(artifact_dir, compiled=self.inference_mode == 'compiled')
+        bundle.default_entry = bundle.registry.get(model_name, pin=True)
+        bundle.model = bundle.default_entry.model
+        bundle.uncertainty = bundle.default_entry.uncertainty
+        
+        # Load preprocessors
+        bundle.scaler = joblib.load(bundle.path('scaler.pkl'))
+        bundle.label_encoders = joblib.load(bundle.path('label_encoders.pkl'))
+        bundle.feature_columns = joblib.load(bundle.path('feature_columns.pkl'))
+        
+        # Load the compiled encoder, building it from the label encoders if needed
+        if os.path.exists(bundle.path('compiled_encoders.pkl')):
+            bundle.encoder = CompiledEncoder.load(bundle.path('compiled_encoders.pkl'))
+        else:
+            bundle.encoder = CompiledEncoder.from_label_encoders(bundle.label_encoders)
+            if version == 'unversioned':
+                # Published bundles are immutable
+                bundle.encoder.save(bundle.path('compiled_encoders.pkl'))
+        bundle.encoder.unknown_value = config.api.unknown_category_code
+        
+        # Precompute scaler arrays so lean inference is (x - mean_) / scale_
+        n_features = len(bundle.feature_columns)
+        bundle.scaler_mean = (np.asarray(bundle.scaler.mean_, dtype=np.float64) 
+                              if bundle.scaler.mean_ is not None else np.zeros(n_features))
+        bundle.scaler_scale = (np.asarray(bundle.scaler.scale_, dtype=np.float64) 
+                               if bundle.scaler.scale_ is not None else np.ones(n_features))
+        
+        bundle.loaded_at = datetime.now().isoformat()
+        return bundle
+    
+    def check_bundle(self, bundle):
+        """Reject a freshly loaded bundle before it can serve traffic"""
+        if bundle.materialized is not None:
+            return
+        
+        n_features = len(bundle.feature_columns)
+        if len(bundle.scaler_mean) != n_features:
+            raise ValueError(f"Scaler expects {len(bundle.scaler_mean)} features, "
+                             f"feature columns list {n_features}")
+        
+        n_model_features = getattr(bundle.model, 'n_features_in_', n_features)
+        if n_model_features != n_features:
+            raise ValueError(f"Model expects {n_model_features} features, "
+                             f"feature columns list {n_features}")
+        
+        # A smoke prediction at the training mean must be finite
+        probe = self.predict_lean(np.zeros((1, n_features)), bundle)
+        if not np.all(np.isfinite(probe)):
+            raise ValueError("Model produced a non-finite probe prediction")
+    
+    def swap_bundle(self, bundle):
+        """Publish a loaded bundle to new requests in a single reference swap"""
+        self.bundle = bundle
+        self.model_name = bundle.model_name
+        
+        # Cached predictions belong to the previous artifacts
+        self.cache.clear()
+    
+    def load_model(self, model_name=None, version=None):
+        """Load, check and atomically activate a model and its preprocessors.
+        
+        The previous bundle keeps serving until the swap and stays alive for
+        requests that already hold it, so reloads need no downtime.
+        """
+        model_name = model_name or self.requested_model or config.api.default_model
+        
+        with self._swap_lock:
+            try:
+                version, artifact_dir = self.artifact_source(version)
+                bundle = self.load_bundle(model_name, version, artifact_dir)
+                self.check_bundle(bundle)
+            except Exception as e:
+                print(f"Error loading model: {e}")
+                return False
             
-            print(f"Model {model_name} loaded successfully!")
+            self.requested_model = model_name
+            self.swap_bundle(bundle)
+        
+        source = 'Lookup table' if self.inference_mode == 'materialized' else 'Model'
+        print(f"{source} {bundle.model_name} loaded successfully! (version {version})")
+        return True
+    
+    def reload(self, version=None):
+        """Load the active bundle if it differs from the one being served"""
+        version = version or current_version(self.model_dir)
+        if version is None or version == self.version:
             return True
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            return False
+        return self.load_model(version=version)
+    
+    def start_watcher(self, interval=None):
+        """Reload in the background whenever a new bundle is activated"""
+        self.watcher = BundleWatcher(self.reload, model_dir=self.model_dir, interval=interval)
+        self.watcher.last_seen = self.version
+        return self.watcher.start()
     
-    def preprocess_input(self, input_data):
-        """Preprocess input data for prediction"""
+    def preprocess_input(self, input_data, bundle=None):
+        """Preprocess input data into a scaled feature row using NumPy only"""
+        bundle = bundle or self.bundle
         try:
-            # Create DataFrame from input
-            df = pd.DataFrame([input_data])
-            
-            # Encode categorical variables
-            for col, encoder in self.label_encoders.items():
-                if col in df.columns:
-                    # Handle unknown categories
-                    try:
-                        df[col] = encoder.transform(df[col])
-                    except ValueError:
-                        # Use most frequent class for unknown categories
-                        df[col] = encoder.transform([encoder.classes_[0]])
+            row = np.empty((1, len(bundle.feature_columns)), dtype=np.float64)
+            mappings = bundle.encoder.mappings
+            unknown_value = bundle.encoder.unknown_value
             
-            # Select and reorder features
-            df = df[self.feature_columns]
+            # Encode categorical variables and fill the row in feature_columns order
+            with instrumentation.span('encode'):
+                for i, col in enumerate(bundle.feature_columns):
+                    value = input_data[col]
+                    if col in mappings:
+                        row[0, i] = mappings[col].get(str(value), unknown_value)
+                    else:
+                        row[0, i] = value
             
-            # Scale features
-            scaled_features = self.scaler.transform(df)
+            # Scale features in place with the scaler's mean_ / scale_
+            with instrumentation.span('scale'):
+                row -= bundle.scaler_mean
+                row /= bundle.scaler_scale
             
-            return scaled_features
+            return row
         except Exception as e:
             print(f"Error preprocessing input: {e}")
             return None
     
-    def predict_salary(self, input_data):
+    def predict_lean(self, processed_input, bundle=None, model=None):
+        """Predict with the model's low-level arrays where possible"""
+        model = model if model is not None else (bundle or self.bundle).model
+        
+        # Single-target linear models reduce to a dot product
+        if is_linear_model(model):
+            return processed_input @ model.coef_ + model.intercept_
+        return model.predict(processed_input)
+    
+    def resolve_models(self, model=None, combine=None, bundle=None):
+        """Turn the `model` / `combine` request parameters into model names.
+        
+        `model` is a trained model name, 'best', 'all' or a list of names; a
+        request for several models is combined as an 'ensemble' (mean) or a
+        side-by-side 'compare' (the default). Raises ValueError for bad input.
+        """
+        bundle = bundle or self.bundle
+        
+        if model is None:
+            names = [bundle.model_name]
+        elif model == 'best':
+            names = [bundle.model_info.get('best_model') or bundle.model_name]
+        elif model == 'all':
+            names = bundle.registry.available() if bundle.registry else [bundle.model_name]
+        elif isinstance(model, str):
+            names = [model]
+        elif isinstance(model, list) and model and all(isinstance(name, str) for name in model):
+            names = list(dict.fromkeys(model))
+        else:
+            raise ValueError("Field 'model' must be a model name or a non-empty list of names")
+        
+        if bundle.registry is None:
+            if names != [bundle.model_name]:
+                raise ValueError(f"Only {bundle.model_name} is available in {self.inference_mode} mode")
+        else:
+            unknown = [name for name in names if name not in bundle.registry.available()]
+            if unknown:
+                raise ValueError(f"Unknown model: {', '.join(unknown)}. "
+                                 f"Available: {bundle.registry.available()}")
+        
+        if len(names) == 1:
+            return names, None
+        combine = combine or 'compare'
+        if combine not in ('ensemble', 'compare'):
+            raise ValueError("Field 'combine' must be 'ensemble' or 'compare'")
+        return names, combine
+    
+    def predict_salary(self, input_data, model=None, combine=None):
         """Make salary prediction"""
-        if self.model is None:
+        # Take one reference so a concurrent reload cannot change artifacts mid-request
+        bundle = self.bundle
+        if bundle is None:
             return None, "Model not loaded"
         
-        # Preprocess input
-        processed_input = self.preprocess_input(input_data)
+        try:
+            names, combine = self.resolve_models(model, combine, bundle)
+        except ValueError as e:
+            return None, str(e)
+        
+        if self.inference_mode == 'materialized':
+            try:
+                error = bundle.materialized.range_error(input_data)
+                if error:
+                    return None, error
+                with instrumentation.span('lookup'):
+                    prediction = bundle.materialized.predict_records([input_data])[0]
+            except Exception as e:
+                print(f"Error preprocessing input: {e}")
+                return None, "Error preprocessing input"
+            return self.build_result(prediction, bundle=bundle), None
+        
+        # Preprocess input once, whichever models answer
+        processed_input = self.preprocess_input(input_data, bundle)
         
         if processed_input is None:
             return None, "Error preprocessing input"
         
         try:
-            # Make prediction
-            prediction = self.model.predict(processed_input)[0]
+            return self.predict_models(processed_input, bundle, names, combine)[0], None
+        except Exception as e:
+            return None, f"Error making prediction: {e}"
+    
+    def confidence_intervals(self, processed_input, predictions, bundle=None, entry=None):
+        """Get a confidence interval per row, or None when the model has none"""
+        uncertainty = entry.uncertainty if entry is not None else (bundle or self.bundle).uncertainty
+        if uncertainty is None:
+            return [None] * len(predictions)
+        return self.format_intervals(uncertainty.intervals(processed_input, predictions))
+    
+    def format_intervals(self, bounds, n_rows=0):
+        """Turn (lower, upper) arrays into per-row interval dicts"""
+        if bounds is None:
+            return [None] * n_rows
+        lower, upper = bounds
+        return [{'lower': float(lo), 'upper': float(hi)} for lo, hi in zip(lower, upper)]
+    
+    def build_result(self, prediction, confidence_interval=None, bundle=None, model_name=None):
+        """Build the JSON-serializable response for a single prediction"""
+        bundle = bundle or self.bundle
+        model_name = model_name or bundle.model_name
+        return {
+            'predicted_salary': float(prediction),
+            'confidence_interval': confidence_interval,
+            'model_used': model_name,
+            'model_accuracy': bundle.model_score(model_name),
+            'model_version': bundle.version,
+            'prediction_timestamp': datetime.now().isoformat()
+        }
+    
+    def validate_record(self, record, bundle=None):
+        """Validate a single batch record, returning an error message or None"""
+        bundle = bundle or self.bundle
+        if not isinstance(record, dict):
+            return 'Record must be a JSON object'
+        
+        for field in REQUIRED_FIELDS + bundle.feature_columns:
+            if field not in record:
+                return f'Missing required field: {field}'
+        
+        for col in bundle.feature_columns:
+            if col not in bundle.encoder.mappings:
+                try:
+                    float(record[col])
+                except (TypeError, ValueError):
+                    return f'Invalid numeric value for field: {col}'
+        
+        # Lookup tables do not extrapolate beyond their grid
+        if bundle.materialized is not None:
+            return bundle.materialized.range_error(record)
+        return None
+    
+    def preprocess_batch(self, records, bundle=None):
+        """Preprocess a list of valid records into one scaled feature matrix"""
+        bundle = bundle or self.bundle
+        n_rows = len(records)
+        
+        X = np.empty((n_rows, len(bundle.feature_columns)), dtype=np.float64)
+        
+        # Build each feature column once across all records
+        with instrumentation.span('encode'):
+            for i, col in enumerate(bundle.feature_columns):
+                if col in bundle.encoder.mappings:
+                    X[:, i] = bundle.encoder.encode_array(col, [str(record[col]) for record in records])
+                else:
+                    X[:, i] = np.fromiter((float(record[col]) for record in records),
+                                          dtype=np.float64, count=n_rows)
+        
+        # Scale the full matrix in one pass
+        with instrumentation.span('scale'):
+            X -= bundle.scaler_mean
+            X /= bundle.scaler_scale
+        return X
+    
+    def predict_rows(self, processed_input, bundle, entry=None):
+        """Predict (value, confidence interval) per row, calling the model only for cache misses"""
+        entry = entry or bundle.default_entry
+        n_rows = len(processed_input)
+        outputs = [None] * n_rows
+        
+        # Rows share cache entries with single /predict calls for the same feature vector
+        keys = None
+        if self.cache.enabled:
+            with instrumentation.span('cache'):
+                keys = [(bundle.version, entry.name, processed_input[row].tobytes()) for row in range(n_rows)]
+                outputs = [self.cache.get(key) for key in keys]
+        
+        misses = [row for row in range(n_rows) if outputs[row] is None]
+        if misses:
+            X = processed_input[misses]
+            if entry.compiled:
+                # One lockstep traversal gives the predictions and the per-tree spread
+                with instrumentation.span('predict'):
+                    predictions, bounds = entry.model.predict_with_intervals(X)
+                confidence_intervals = self.format_intervals(bounds, len(predictions))
+            else:
+                with instrumentation.span('predict'):
+                    if self.inference_mode in ('lean', 'compiled'):
+                        predictions = self.predict_lean(X, model=entry.model)
+                    else:
+                        predictions = entry.model.predict(X)
+                with instrumentation.span('intervals'):
+                    confidence_intervals = self.confidence_intervals(X, predictions, entry=entry)
             
-            # Get confidence interval (for tree-based models)
+            for row, prediction, confidence_interval in zip(misses, predictions, confidence_intervals):
+                outputs[row] = (prediction, confidence_interval)
+                if keys is not None:
+                    self.cache.put(keys[row], outputs[row])
+        
+        return outputs
+    
+    def predict_models(self, processed_input, bundle, names, combine=None):
+        """Run one or more models on the same preprocessed rows and shape the results"""
+        outputs = {name: self.predict_rows(processed_input, bundle, bundle.registry.get(name))
+                   for name in names}
+        
+        with instrumentation.span('format'):
+            return self.format_results(outputs, bundle, names, combine, len(processed_input))
+    
+    def format_results(self, outputs, bundle, names, combine, n_rows):
+        """Shape per-model (prediction, interval) rows into response dicts"""
+        if combine is None:
+            name = names[0]
+            return [self.build_result(prediction, confidence_interval, bundle, name)
+                    for prediction, confidence_interval in outputs[name]]
+        
+        results = []
+        for row in range(n_rows):
+            members = {name: outputs[name][row] for name in names}
+            
+            if combine == 'compare':
+                results.append({
+                    'comparison': {name: self.build_result(prediction, confidence_interval, bundle, name)
+                                   for name, (prediction, confidence_interval) in members.items()},
+                    'model_version': bundle.version,
+                    'prediction_timestamp': datetime.now().isoformat()
+                })
+                continue
+            
+            # Ensemble: average the members, and their intervals when every member has one
+            prediction = np.mean([member[0] for member in members.values()])
+            intervals = [member[1] for member in members.values()]
             confidence_interval = None
-            if hasattr(self.model, 'estimators_'):
-                predictions = [tree.predict(processed_input)[0] for tree in self.model.estimators_]
-                std_dev = np.std(predictions)
+            if all(interval is not None for interval in intervals):
                 confidence_interval = {
-                    'lower': prediction - 1.96 * std_dev,
-                    'upper': prediction + 1.96 * std_dev
+                    'lower': float(np.mean([interval['lower'] for interval in intervals])),
+                    'upper': float(np.mean([interval['upper'] for interval in intervals]))
                 }
             
-            return {
-                'predicted_salary': float(prediction),
-                'confidence_interval': confidence_interval,
-                'model_used': self.model_info.get('best_model', 'unknown'),
-                'model_accuracy': self.model_info.get('best_score', 0),
-                'prediction_timestamp': datetime.now().isoformat()
-            }, None
-            
+            result = self.build_result(prediction, confidence_interval, bundle, 'ensemble')
+            result['model_accuracy'] = None
+            result['ensemble_members'] = {name: float(member[0]) for name, member in members.items()}
+            results.append(result)
+        
+        return results
+    
+    def predict_batch(self, records, model=None, combine=None):
+        """Make salary predictions for a list of records in one vectorized pass"""
+        # Every record in the batch is served by the same bundle
+        bundle = self.bundle
+        if bundle is None:
+            return [{'error': 'Model not loaded'} for _ in records]
+        
+        try:
+            names, combine = self.resolve_models(model, combine, bundle)
+        except ValueError as e:
+            return [{'error': str(e)} for _ in records]
+        
+        results = [None] * len(records)
+        valid_indices = []
+        
+        # Validate records, keeping errors at their original index
+        with instrumentation.span('validate'):
+            for idx, record in enumerate(records):
+                error = self.validate_record(record, bundle)
+                if error:
+                    results[idx] = {'error': error}
+                else:
+                    valid_indices.append(idx)
+        
+        if not valid_indices:
+            return results
+        
+        if self.inference_mode == 'materialized':
+            try:
+                with instrumentation.span('lookup'):
+                    predictions = bundle.materialized.predict_records([records[idx] for idx in valid_indices])
+                for row, idx in enumerate(valid_indices):
+                    results[idx] = self.build_result(predictions[row], bundle=bundle)
+            except Exception as e:
+                for idx in valid_indices:
+                    results[idx] = {'error': f"Error making prediction: {e}"}
+            return results
+        
+        try:
+            processed_input = self.preprocess_batch([records[idx] for idx in valid_indices], bundle)
         except Exception as e:
-            return None, f"Error making prediction: {e}"
+            print(f"Error preprocessing batch: {e}")
+            for idx in valid_indices:
+                results[idx] = {'error': 'Error preprocessing input'}
+            return results
+        
+        try:
+            outputs = self.predict_models(processed_input, bundle, names, combine)
+            for idx, result in zip(valid_indices, outputs):
+                results[idx] = result
+        except Exception as e:
+            for idx in valid_indices:
+                results[idx] = {'error': f"Error making prediction: {e}"}
+        
+        return results
+    
+    def health(self):
+        """Health status shared by the Flask and ASGI servers"""
+        bundle = self.bundle
+        return {
+            'status': 'healthy',
+            'timestamp': datetime.now().isoformat(),
+            'model_loaded': bundle is not None,
+            'model_version': bundle.version if bundle else None,
+            'model_loaded_at': bundle.loaded_at if bundle else None
+        }
+    
+    def describe(self):
+        """Model information shared by the Flask and ASGI servers"""
+        bundle = self.bundle
+        return {
+            'model_info': bundle.model_info if bundle else {},
+            'feature_columns': bundle.feature_columns if bundle else [],
+            'available_encoders': list(bundle.label_encoders.keys()) if bundle else [],
+            'model_loaded': bundle is not None,
+            'model_name': bundle.model_name if bundle else None,
+            'model_version': bundle.version if bundle else None,
+            'model_loaded_at': bundle.loaded_at if bundle else None,
+            'models': bundle.registry.stats() if bundle and bundle.registry else None,
+            'prediction_cache': self.cache.stats(),
+            'process': dict(process_memory(), pid=os.getpid())
+        }
 
 # Initialize predictor
 predictor = SalaryPredictor()
 
+def model_request_error(model, combine):
+    """Return an error message for an invalid model selection, or None"""
+    if predictor.bundle is None:
+        return None
+    try:
+        predictor.resolve_models(model, combine)
+    except ValueError as e:
+        return str(e)
+    return None
+
+@app.before_request
+def start_request_timer():
+    if instrumentation.enabled:
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count every request by route and status, with its latency"""
+    if instrumentation.enabled and 'request_start' in g:
+        # Route patterns, not raw paths, keep label cardinality bounded
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        instrumentation.record_request(endpoint, response.status_code, time.perf_counter() - g.request_start)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint"""
+    if not instrumentation.enabled:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(instrumentation.render(), content_type=CONTENT_TYPE)
+
+@app.route('/debug/profile', methods=['GET'])
+def debug_profile():
+    """Sample every thread for ?seconds=N and return the collapsed stacks"""
+    seconds = request.args.get('seconds', '10')
+    error = profile_request_error(seconds, request.headers.get('X-Profile-Token'))
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    if not profile_lock.acquire(blocking=False):
+        return jsonify({'error': 'A profile is already being captured'}), 409
+    
+    # This thread only sleeps, so it is left out of the profile
+    sampler = StackSampler(exclude_threads=[threading.get_ident()]).start()
+    try:
+        time.sleep(float(seconds))
+    finally:
+        sampler.stop()
+        profile_lock.release()
+    
+    response = Response(sampler.collapsed(), content_type='text/plain; charset=utf-8')
+    response.headers['X-Profile-Path'] = sampler.write('prediction_api')
+    return response
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'model_loaded': predictor.model is not None
-    })
+    return jsonify(predictor.health())
 
 @app.route('/predict', methods=['POST'])
 def predict():
     """Salary prediction endpoint"""
     try:
         # Get input data
-        input_data = request.json
+        with instrumentation.span('parse_json'):
+            input_data = request.json
         
         # Validate required fields
-        required_fields = ['experience_years', 'education_level', 'company_size', 
-                          'employment_type', 'remote_ratio', 'work_year']
-        
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             if field not in input_data:
                 return jsonify({
                     'error': f'Missing required field: {field}'
                 }), 400
         
+        # Route to one model, an ensemble or a comparison (JSON field or query parameter)
+        model = input_data.get('model', request.args.get('model'))
+        combine = input_data.get('combine', request.args.get('combine'))
+        error = model_request_error(model, combine)
+        if error:
+            return jsonify({'error': error}), 400
+        
         # Make prediction
-        result, error = predictor.predict_salary(input_data)
+        result, error = predictor.predict_salary(input_data, model, combine)
         
         if error:
             return jsonify({'error': error}), 500
         
-        return jsonify(result)
-        
+        with instrumentation.span('serialize'):
+            return jsonify(result)
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/model-info', methods=['GET'])
 def model_info():
     """Get model information"""
-    return jsonify({
-        'model_info': predictor.model_info,
-        'feature_columns': predictor.feature_columns,
-        'available_encoders': list(predictor.label_encoders.keys()),
-        'model_loaded': predictor.model is not None
-    })
+    return jsonify(predictor.describe())
 
 @app.route('/predict-batch', methods=['POST'])
 def predict_batch():
     """Batch prediction endpoint"""
     try:
         # Get input data
-        input_data = request.json
+        with instrumentation.span('parse_json'):
+            input_data = request.json
         
         if not isinstance(input_data, list):
             return jsonify({'error': 'Input must be a list of records'}), 400
         
-        results = []
-        for record in input_data:
-            result, error = predictor.predict_salary(record)
-            if error:
-                results.append({'error': error})
-            else:
-                results.append(result)
+        # Route the whole batch with ?model=name (repeatable) and ?combine=
+        model = request.args.getlist('model') or None
+        if model is not None and len(model) == 1:
+            model = model[0]
+        combine = request.args.get('combine')
+        error = model_request_error(model, combine)
+        if error:
+            return jsonify({'error': error}), 400
         
-        return jsonify({'predictions': results})
+        results = predictor.predict_batch(input_data, model, combine)
+        instrumentation.record_batch('/predict-batch', results)
         
+        with instrumentation.span('serialize'):
+            return jsonify({'predictions': results})
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 def main():
     # Load model
     if predictor.load_model():
+        # Pick up newly published bundles without restarting
+        predictor.start_watcher()
+        
         print("Starting Flask API server...")
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        # The reloader would serve from a child process that --profile cannot see
+        app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=active_sampler() is None)
     else:
         print("Failed to load model. Please train the model first.")
 
 if __name__ == '__main__':
-    main()
+    with profile_from_argv('prediction_api'):
+        main()
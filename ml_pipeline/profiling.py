@@ -0,0 +1,147 @@
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from config import config
+
+# Collapsed stacks go next to the other logs (see Config.create_directories)
+PROFILE_DIR = 'logs'
+SAMPLE_INTERVAL = 0.005
+
+# One /debug/profile capture at a time per process
+profile_lock = threading.Lock()
+_active = None
+
+class StackSampler:
+    """Statistical profiler that samples the Python stack of every thread.
+    
+    A background thread wakes up every `interval` seconds and records the
+    stack of each other thread from sys._current_frames(), so the profiled
+    code runs unmodified and pays only for the sampling thread's share of
+    the GIL. Samples are wall-clock: threads blocked on I/O or locks show
+    up where they wait.
+    
+    Stacks are counted in the collapsed format read by flamegraph.pl and
+    speedscope: one `thread;outer;...;inner count` line per distinct stack.
+    """
+    
+    def __init__(self, interval=None, exclude_threads=()):
+        self.interval = interval or SAMPLE_INTERVAL
+        self.exclude_threads = set(exclude_threads)
+        self.counts = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+    
+    def run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(own)
+    
+    def sample(self, own=None):
+        """Record the current stack of every thread except the sampler"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own or ident in self.exclude_threads:
+                continue
+            
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            stack.append(names.get(ident, f'thread-{ident}'))
+            self.counts[';'.join(reversed(stack))] += 1
+        self.samples += 1
+    
+    def collapsed(self):
+        """The profile in collapsed-stack format, most frequent stacks first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+    
+    def write(self, name, directory=PROFILE_DIR):
+        """Write the collapsed stacks to a timestamped file and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"profile-{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.collapsed")
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+        return path
+
+def active_sampler():
+    """The sampler profiling this process from the command line, if any"""
+    return _active
+
+@contextmanager
+def profiled(name, interval=None):
+    """Sample the enclosed block and write its collapsed stacks to logs/"""
+    global _active
+    sampler = StackSampler(interval).start()
+    _active = sampler
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
+        _active = None
+        path = sampler.write(name)
+        print(f"Profile of {sampler.duration:.1f}s ({sampler.samples} samples) written to {path}")
+
+@contextmanager
+def profile_from_argv(name):
+    """Profile an entry point when `--profile` (and optionally `--profile-interval MS`) is given.
+    
+    The options are removed from sys.argv before the entry point parses
+    its own arguments. Only the calling process is sampled, not worker
+    processes it starts.
+    """
+    argv = sys.argv[1:]
+    enabled = '--profile' in argv
+    interval = None
+    if '--profile-interval' in argv:
+        position = argv.index('--profile-interval')
+        interval = float(argv[position + 1]) / 1000
+        del argv[position:position + 2]
+    sys.argv[1:] = [arg for arg in argv if arg != '--profile']
+    
+    if not enabled:
+        yield None
+        return
+    with profiled(name, interval) as sampler:
+        yield sampler
+
+def profile_request_error(seconds, token):
+    """Check a /debug/profile request; return (error message, status) or None"""
+    if not config.api.profiling_enabled:
+        return 'Profiling is disabled', 404
+    
+    # Without a configured token nobody may profile: the endpoint exposes stacks of every thread
+    expected = config.api.profiling_token
+    if not expected:
+        return 'Profiling token is not configured', 403
+    if not hmac.compare_digest(token or '', expected):
+        return 'Invalid profiling token', 403
+    
+    try:
+        seconds = float(seconds)
+    except (TypeError, ValueError):
+        return 'Parameter seconds must be a number', 400
+    if not 0 < seconds <= config.api.profiling_max_seconds:
+        return f'Parameter seconds must be between 0 and {config.api.profiling_max_seconds:g}', 400
+    return None
@@ -0,0 +1,255 @@
+
+import io
+import pickle
+import struct
+import numpy as np
+
+# File layout: magic, skeleton length, pickled skeleton, then 64-byte aligned array data
+MAGIC = b'SHMODEL1'
+HEADER = struct.Struct('<8sQ')
+ALIGNMENT = 64
+
+# Arrays smaller than this stay inside the pickled skeleton
+MIN_SHARED_BYTES = 4096
+
+# Batches up to this size are walked row by row, which beats per-level array passes
+SCALAR_TRAVERSAL_ROWS = 8
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def shares_trees(model):
+    """Whether a model's trees can be served from mapped memory.
+    
+    Forests call each tree's Python-level `predict`, so a mapped stand-in
+    works. Gradient boosting walks its trees from Cython and needs real
+    sklearn Tree objects; those still load correctly, but from private copies.
+    """
+    estimators = getattr(model, 'estimators_', None)
+    return not isinstance(estimators, np.ndarray)
+
+class SharedTree:
+    """Read-only stand-in for sklearn's Tree backed by memory-mapped arrays.
+    
+    Node and value arrays are views into the shared model file, so every
+    process that maps the file shares the same physical pages. `apply` and
+    `predict` follow sklearn's traversal rules exactly (float32 features
+    compared against float64 thresholds, NaNs routed by missing_go_to_left),
+    so predictions are bit-for-bit the same as with the pickled Tree.
+    """
+    
+    def __init__(self, n_features, n_classes, n_outputs, max_depth, node_count, nodes, values):
+        self.n_features = n_features
+        self.n_classes = np.asarray(n_classes, dtype=np.intp)
+        self.n_outputs = n_outputs
+        self.max_n_classes = int(self.n_classes.max())
+        self.max_depth = max_depth
+        self.node_count = node_count
+        self.capacity = len(nodes)
+        self.nodes = nodes
+        self.values = values
+        
+        self.children_left = nodes['left_child'][:node_count]
+        self.children_right = nodes['right_child'][:node_count]
+        self.feature = nodes['feature'][:node_count]
+        self.threshold = nodes['threshold'][:node_count]
+        self.impurity = nodes['impurity'][:node_count]
+        self.n_node_samples = nodes['n_node_samples'][:node_count]
+        self.weighted_n_node_samples = nodes['weighted_n_node_samples'][:node_count]
+        self.missing_go_to_left = nodes['missing_go_to_left'][:node_count]
+        self.value = values[:node_count]
+    
+    @property
+    def n_leaves(self):
+        return int(np.sum((self.children_left == -1) & (self.children_right == -1)))
+    
+    def apply_row(self, row):
+        """Walk one row from the root to its leaf"""
+        node = 0
+        while True:
+            left = self.children_left[node]
+            if left == -1:
+                return node
+            
+            x = row[self.feature[node]]
+            if x != x:
+                node = left if self.missing_go_to_left[node] else self.children_right[node]
+            elif x <= self.threshold[node]:
+                node = left
+            else:
+                node = self.children_right[node]
+    
+    def apply(self, X):
+        """Find the leaf reached by each row of a dense float32 matrix"""
+        if not isinstance(X, np.ndarray):
+            raise ValueError("SharedTree only supports dense arrays")
+        if X.dtype != np.float32:
+            raise ValueError("X.dtype should be np.float32, got %s" % X.dtype)
+        
+        if X.shape[0] <= SCALAR_TRAVERSAL_ROWS:
+            return np.array([self.apply_row(row) for row in X], dtype=np.intp)
+        
+        rows = np.arange(X.shape[0])
+        leaves = np.zeros(X.shape[0], dtype=np.intp)
+        has_missing = np.isnan(X).any()
+        
+        # Step every row down one level at a time; rows already on a leaf stay put
+        for _ in range(self.max_depth):
+            left = self.children_left[leaves]
+            x = X[rows, self.feature[leaves]]
+            go_left = x <= self.threshold[leaves]
+            if has_missing:
+                go_left = np.where(np.isnan(x), self.missing_go_to_left[leaves] != 0, go_left)
+            
+            step = np.where(go_left, left, self.children_right[leaves])
+            leaves = np.where(left == -1, leaves, step)
+        return leaves
+    
+    def predict(self, X):
+        """Leaf values for each row, shaped like sklearn's Tree.predict"""
+        out = self.value.take(self.apply(X), axis=0, mode='clip')
+        if self.n_outputs == 1:
+            out = out.reshape(X.shape[0], self.max_n_classes)
+        return out
+    
+    def compute_feature_importances(self, normalize=True):
+        """Impurity-based feature importances, as computed by sklearn"""
+        importances = np.zeros(self.n_features)
+        internal = np.flatnonzero(self.children_left != -1)
+        left = self.children_left[internal]
+        right = self.children_right[internal]
+        weighted = self.weighted_n_node_samples
+        decrease = (weighted[internal] * self.impurity[internal]
+                    - weighted[left] * self.impurity[left]
+                    - weighted[right] * self.impurity[right])
+        np.add.at(importances, self.feature[internal], decrease)
+        importances /= weighted[0]
+        
+        if normalize:
+            normalizer = importances.sum()
+            if normalizer > 0.0:
+                importances /= normalizer
+        return importances
+    
+    def __reduce__(self):
+        from sklearn.tree._tree import Tree
+        
+        # Pickling (e.g. to a process pool) produces an ordinary sklearn Tree
+        state = {
+            'max_depth': self.max_depth,
+            'node_count': self.node_count,
+            'nodes': np.ascontiguousarray(self.nodes),
+            'values': np.ascontiguousarray(self.values)
+        }
+        return (Tree, (self.n_features, self.n_classes, self.n_outputs), state)
+
+class SharedModelPickler(pickle.Pickler):
+    """Pickle a model with its large arrays moved out to a separate data section"""
+    
+    def __init__(self, file, share_trees=True, min_shared_bytes=MIN_SHARED_BYTES):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.share_trees = share_trees
+        self.min_shared_bytes = min_shared_bytes
+        self.arrays = []
+        self.size = 0
+        
+        # Only imported when saving, so loading does not pull sklearn in up front
+        from sklearn.tree._tree import Tree
+        self.tree_type = Tree
+    
+    def add_array(self, array):
+        """Reserve space for an array and return its reference"""
+        array = np.ascontiguousarray(array)
+        offset = align(self.size)
+        self.arrays.append((offset, array))
+        self.size = offset + array.nbytes
+        return (offset, np.lib.format.dtype_to_descr(array.dtype), array.shape)
+    
+    def persistent_id(self, obj):
+        if self.share_trees and isinstance(obj, self.tree_type):
+            state = obj.__getstate__()
+            return ('tree', obj.n_features, [int(n) for n in obj.n_classes], obj.n_outputs,
+                    state['max_depth'], state['node_count'],
+                    self.add_array(state['nodes']), self.add_array(state['values']))
+        
+        if (isinstance(obj, np.ndarray) and not obj.dtype.hasobject
+                and obj.nbytes >= self.min_shared_bytes):
+            return ('array', self.add_array(obj))
+        return None
+
+class SharedModelUnpickler(pickle.Unpickler):
+    """Rebuild a model whose large arrays are views into a mapped file"""
+    
+    def __init__(self, file, buffer, data_start):
+        super().__init__(file)
+        self.buffer = buffer
+        self.data_start = data_start
+    
+    def view(self, reference):
+        offset, descr, shape = reference
+        return np.ndarray(shape, dtype=np.lib.format.descr_to_dtype(descr),
+                          buffer=self.buffer, offset=self.data_start + offset)
+    
+    def persistent_load(self, pid):
+        if pid[0] == 'array':
+            return self.view(pid[1])
+        if pid[0] == 'tree':
+            _, n_features, n_classes, n_outputs, max_depth, node_count, nodes, values = pid
+            return SharedTree(n_features, n_classes, n_outputs, max_depth, node_count,
+                              self.view(nodes), self.view(values))
+        raise pickle.UnpicklingError(f"Unknown persistent id: {pid[0]}")
+
+def save_shared_model(model, path, min_shared_bytes=MIN_SHARED_BYTES):
+    """Write a model as a pickled skeleton plus one block of mappable arrays"""
+    skeleton = io.BytesIO()
+    pickler = SharedModelPickler(skeleton, share_trees=shares_trees(model),
+                                 min_shared_bytes=min_shared_bytes)
+    pickler.dump(model)
+    skeleton = skeleton.getvalue()
+    
+    data_start = align(HEADER.size + len(skeleton))
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(skeleton)))
+        f.write(skeleton)
+        for offset, array in pickler.arrays:
+            f.seek(data_start + offset)
+            f.write(array.tobytes())
+        f.truncate(data_start + pickler.size)
+    return path
+
+def load_shared_model(path):
+    """Load a model whose large arrays map the file's pages (shared between processes).
+    
+    The mapping is copy-on-write, so arrays look writable to libraries that
+    insist on it, but pages stay shared as long as nothing writes to them.
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode='c')
+    magic, skeleton_size = HEADER.unpack(bytes(buffer[:HEADER.size]))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a shared model file")
+    
+    skeleton = io.BytesIO(bytes(buffer[HEADER.size:HEADER.size + skeleton_size]))
+    data_start = align(HEADER.size + skeleton_size)
+    return SharedModelUnpickler(skeleton, buffer, data_start).load()
+
+def predictions_identical(pickled_model, shared_model, X):
+    """Check that both models give byte-identical predictions on X"""
+    expected = np.asarray(pickled_model.predict(X))
+    actual = np.asarray(shared_model.predict(X))
+    return (expected.dtype == actual.dtype and expected.shape == actual.shape
+            and expected.tobytes() == actual.tobytes())
+
+def process_memory():
+    """RSS, PSS and private memory of this process in MB (Linux)"""
+    fields = {'Rss': 'rss_mb', 'Pss': 'pss_mb', 'Private_Clean': 'private_mb', 'Private_Dirty': 'private_mb'}
+    memory = {'rss_mb': None, 'pss_mb': None, 'private_mb': None}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                if name in fields:
+                    key = fields[name]
+                    memory[key] = (memory[key] or 0.0) + int(rest.split()[0]) / 1024.0
+    except OSError:
+        pass
+    return memory
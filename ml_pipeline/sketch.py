@@ -0,0 +1,79 @@
+
+import numpy as np
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch for streams of floats.
+    
+    Items live in a hierarchy of compactors; an item at level h stands for
+    2**h original values. When a level overflows it is sorted and every
+    other item is promoted, so memory stays O(k log(n / k)) and rank error
+    is roughly O(1 / k). Until the first compaction the sketch holds every
+    value and quantiles are exact.
+    """
+    
+    def __init__(self, k=1000, c=2 / 3, random_state=None):
+        self.k = k
+        self.c = c
+        self.count = 0
+        self.compactors = [np.empty(0, dtype=np.float64)]
+        self.rng = np.random.default_rng(random_state)
+    
+    def capacity(self, level):
+        """Maximum number of items held at a level before it is compacted"""
+        depth = len(self.compactors) - level - 1
+        return max(2, int(np.ceil(self.k * self.c ** depth)))
+    
+    def update(self, values):
+        """Add an array of values to the sketch"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self.compress()
+    
+    def compress(self):
+        """Compact every level that is over capacity"""
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0, dtype=np.float64))
+                
+                items = np.sort(items)
+                
+                # Keep an odd item behind so the promoted half has equal weight
+                leftover = items[len(items) - len(items) % 2:]
+                pairs = items[:len(items) - len(leftover)]
+                promoted = pairs[self.rng.integers(2)::2]
+                
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1], promoted])
+                self.compactors[level] = leftover
+            level += 1
+    
+    def merge(self, other):
+        """Merge another sketch into this one"""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate([self.compactors[level], items])
+        self.count += other.count
+        self.compress()
+        return self
+    
+    def quantile(self, q):
+        """Estimate the q-th quantile (0 <= q <= 1)"""
+        if self.count == 0:
+            raise ValueError("Cannot compute a quantile of an empty sketch")
+        
+        # No compaction has happened yet, so the answer is exact
+        if len(self.compactors) == 1:
+            return float(np.quantile(self.compactors[0], q))
+        
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                                  for level, level_items in enumerate(self.compactors)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(items[order][min(index, len(items) - 1)])
@@ -0,0 +1,210 @@
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from config import config
+
+class SplitStorage:
+    """Read and write processed train/test splits in one file format"""
+    
+    extension = None
+    
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir or config.data.processed_data_dir
+    
+    def path(self, name):
+        """File path for a named split"""
+        return os.path.join(self.data_dir, f'{name}{self.extension}')
+    
+    def exists(self, name):
+        """Check whether a named split has been saved"""
+        return os.path.exists(self.path(name))
+    
+    def save(self, name, frame):
+        """Save a DataFrame or Series under name"""
+        raise NotImplementedError
+    
+    def load_frame(self, name):
+        """Load a split as a DataFrame with its column names and dtypes"""
+        raise NotImplementedError
+    
+    def load_array(self, name):
+        """Load a split as a NumPy array"""
+        return self.load_frame(name).to_numpy()
+    
+    def open_writer(self, name, n_rows):
+        """Open a writer that saves a split chunk by chunk"""
+        raise NotImplementedError
+
+class CSVSplitWriter:
+    """Append DataFrame chunks to a CSV file"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.header_written = False
+    
+    def write(self, frame):
+        pd.DataFrame(frame).to_csv(self.path, mode='a' if self.header_written else 'w',
+                                   header=not self.header_written, index=False)
+        self.header_written = True
+    
+    def close(self):
+        pass
+
+class NpySplitWriter:
+    """Fill a preallocated .npy memory map chunk by chunk"""
+    
+    def __init__(self, storage, name, n_rows):
+        self.storage = storage
+        self.name = name
+        self.n_rows = n_rows
+        self.array = None
+        self.position = 0
+        self.metadata = None
+    
+    def write(self, frame):
+        frame = pd.DataFrame(frame)
+        values = frame.to_numpy()
+        if values.shape[1] == 1:
+            values = values[:, 0]
+        
+        # Allocate the full array once the first chunk fixes dtype and width
+        if self.array is None:
+            self.array = np.lib.format.open_memmap(self.storage.path(self.name), mode='w+',
+                                                   dtype=values.dtype,
+                                                   shape=(self.n_rows,) + values.shape[1:])
+            self.metadata = {
+                'columns': [str(col) for col in frame.columns],
+                'dtypes': {str(col): str(dtype) for col, dtype in frame.dtypes.items()}
+            }
+        
+        self.array[self.position:self.position + len(values)] = values
+        self.position += len(values)
+    
+    def close(self):
+        if self.position != self.n_rows:
+            raise ValueError(f"Split {self.name} expected {self.n_rows} rows, got {self.position}")
+        if self.array is None:
+            return
+        
+        self.array.flush()
+        with open(self.storage.metadata_path(self.name), 'w') as f:
+            json.dump(self.metadata, f, indent=2)
+
+class ParquetSplitWriter:
+    """Append DataFrame chunks as Parquet row groups"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+    
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        table = pa.Table.from_pandas(pd.DataFrame(frame), preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+    
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+class CSVStorage(SplitStorage):
+    """Plain-text CSV splits (the original format)"""
+    
+    extension = '.csv'
+    
+    def save(self, name, frame):
+        os.makedirs(self.data_dir, exist_ok=True)
+        pd.DataFrame(frame).to_csv(self.path(name), index=False)
+    
+    def load_frame(self, name):
+        return pd.read_csv(self.path(name))
+    
+    def open_writer(self, name, n_rows=None):
+        os.makedirs(self.data_dir, exist_ok=True)
+        return CSVSplitWriter(self.path(name))
+
+class NpyStorage(SplitStorage):
+    """Binary .npy splits loaded as zero-copy memory maps.
+    
+    Column names and dtypes are kept in a JSON sidecar next to each array.
+    """
+    
+    extension = '.npy'
+    
+    def metadata_path(self, name):
+        """Path of the JSON sidecar holding column names and dtypes"""
+        return os.path.join(self.data_dir, f'{name}.columns.json')
+    
+    def save(self, name, frame):
+        os.makedirs(self.data_dir, exist_ok=True)
+        frame = pd.DataFrame(frame)
+        values = frame.to_numpy()
+        if values.dtype == object:
+            raise ValueError(f"Split {name} has non-numeric columns and cannot be stored as .npy")
+        
+        # Single-column splits (targets) are stored 1-D
+        if values.shape[1] == 1:
+            values = values[:, 0]
+        np.save(self.path(name), np.ascontiguousarray(values))
+        
+        metadata = {
+            'columns': [str(col) for col in frame.columns],
+            'dtypes': {str(col): str(dtype) for col, dtype in frame.dtypes.items()}
+        }
+        with open(self.metadata_path(name), 'w') as f:
+            json.dump(metadata, f, indent=2)
+    
+    def load_array(self, name):
+        return np.load(self.path(name), mmap_mode='r')
+    
+    def load_frame(self, name):
+        with open(self.metadata_path(name), 'r') as f:
+            metadata = json.load(f)
+        
+        values = self.load_array(name)
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+        
+        frame = pd.DataFrame(values, columns=metadata['columns'], copy=False)
+        if any(str(dtype) != metadata['dtypes'][col] for col, dtype in frame.dtypes.items()):
+            frame = frame.astype(metadata['dtypes'])
+        return frame
+    
+    def open_writer(self, name, n_rows):
+        os.makedirs(self.data_dir, exist_ok=True)
+        return NpySplitWriter(self, name, n_rows)
+
+class ParquetStorage(SplitStorage):
+    """Columnar Parquet splits (requires pyarrow)"""
+    
+    extension = '.parquet'
+    
+    def save(self, name, frame):
+        os.makedirs(self.data_dir, exist_ok=True)
+        pd.DataFrame(frame).to_parquet(self.path(name), index=False)
+    
+    def load_frame(self, name):
+        return pd.read_parquet(self.path(name), memory_map=True)
+    
+    def open_writer(self, name, n_rows=None):
+        os.makedirs(self.data_dir, exist_ok=True)
+        return ParquetSplitWriter(self.path(name))
+
+STORAGE_BACKENDS = {
+    'csv': CSVStorage,
+    'npy': NpyStorage,
+    'parquet': ParquetStorage
+}
+
+def get_split_storage(split_format=None, data_dir=None):
+    """Create the split storage backend for a format name"""
+    split_format = split_format or config.data.split_format
+    if split_format not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown split format: {split_format}. "
+                         f"Choose from {sorted(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[split_format](data_dir)
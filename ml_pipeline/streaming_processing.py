@@ -0,0 +1,332 @@
+
+import argparse
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+from data_processing import DataProcessor, row_digests, save_processing_state, train_rows_path
+from sketch import KLLSketch
+from split_storage import get_split_storage
+from profiling import profile_from_argv
+from config import config
+
+# Rows per block when drawing the test rows, so the split does not depend on chunk_size
+SPLIT_BLOCK_ROWS = 1 << 16
+
+class DigestStore:
+    """Sorted on-disk set of 64-bit row digests with the first raw row of each.
+    
+    Digests and positions live in two .npy memory maps sorted by digest.
+    Lookups are binary searches over the maps, and each `add` merges a
+    sorted batch into new files block by block, so memory stays bounded by
+    the batch and block sizes whatever the number of stored digests.
+    """
+    
+    def __init__(self, directory, block_size=100_000):
+        self.directory = directory
+        self.block_size = block_size
+        self.generation = 0
+        self.digests = np.empty(0, dtype=np.uint64)
+        self.positions = np.empty(0, dtype=np.int64)
+    
+    def __len__(self):
+        return len(self.digests)
+    
+    def lookup(self, digests):
+        """First raw row of each digest, or -1 for digests not in the store"""
+        digests = np.asarray(digests, dtype=np.uint64)
+        positions = np.full(len(digests), -1, dtype=np.int64)
+        if len(self.digests) == 0 or len(digests) == 0:
+            return positions
+        
+        index = np.minimum(np.searchsorted(self.digests, digests), len(self.digests) - 1)
+        found = self.digests[index] == digests
+        positions[found] = self.positions[index[found]]
+        return positions
+    
+    def add(self, digests, positions):
+        """Merge digests that are not in the store yet, with their raw row positions"""
+        order = np.argsort(digests, kind='stable')
+        digests = np.asarray(digests, dtype=np.uint64)[order]
+        positions = np.asarray(positions, dtype=np.int64)[order]
+        
+        self.generation += 1
+        paths = [os.path.join(self.directory, f'{name}-{self.generation}.npy') for name in ('digests', 'positions')]
+        n_rows = len(self.digests) + len(digests)
+        merged_digests = np.lib.format.open_memmap(paths[0], mode='w+', dtype=np.uint64, shape=(n_rows,))
+        merged_positions = np.lib.format.open_memmap(paths[1], mode='w+', dtype=np.int64, shape=(n_rows,))
+        
+        # Each stored block takes the new digests up to its last digest with it
+        written = new_start = 0
+        for start in range(0, len(self.digests), self.block_size):
+            block = np.asarray(self.digests[start:start + self.block_size])
+            last = start + self.block_size >= len(self.digests)
+            new_stop = len(digests) if last else np.searchsorted(digests, block[-1], side='right')
+            
+            block_digests = np.concatenate([block, digests[new_start:new_stop]])
+            block_positions = np.concatenate([self.positions[start:start + self.block_size],
+                                              positions[new_start:new_stop]])
+            order = np.argsort(block_digests, kind='stable')
+            merged_digests[written:written + len(order)] = block_digests[order]
+            merged_positions[written:written + len(order)] = block_positions[order]
+            written += len(order)
+            new_start = new_stop
+        
+        merged_digests[written:] = digests[new_start:]
+        merged_positions[written:] = positions[new_start:]
+        merged_digests.flush()
+        merged_positions.flush()
+        
+        old_paths = [getattr(array, 'filename', None) for array in (self.digests, self.positions)]
+        self.digests = np.load(paths[0], mmap_mode='r')
+        self.positions = np.load(paths[1], mmap_mode='r')
+        for path in old_paths:
+            if path:
+                os.remove(path)
+
+class StreamingDataProcessor(DataProcessor):
+    """Out-of-core version of the DataProcessor pipeline.
+    
+    The raw CSV is read in chunks over four passes:
+    
+    1. dedupe and drop missing rows, feeding salaries into a KLL sketch
+    2. apply the IQR filter, collect the categories of each column and
+       count the clean rows
+    3. encode and `partial_fit` the scaler on the training rows
+    4. encode, scale and write the train/test splits chunk by chunk
+    
+    Peak memory is O(chunk_size x columns) for the chunk being processed,
+    plus O(sketch_size log n) for the salary sketch, the distinct categories
+    of each column and SPLIT_BLOCK_ROWS positions for the split. The row
+    digests used for deduplication are kept on disk in a DigestStore under
+    `work_dir`, which grows by 16 bytes per distinct raw row.
+    
+    The split holds exactly ceil(test_size * n) test rows, as in
+    `train_test_split`, drawn by sequential sampling over fixed blocks of
+    rows; it depends on the seed but, unlike batch processing, not on a
+    shuffle of the whole dataset, so the rows chosen differ from batch.
+    """
+    
+    def __init__(self, chunk_size=None, sketch_size=None, test_size=None, random_state=None, work_dir=None):
+        super().__init__()
+        self.chunk_size = chunk_size or config.data.chunk_size
+        self.sketch_size = sketch_size or config.data.sketch_size
+        self.test_size = test_size if test_size is not None else config.model.test_size
+        self.random_state = random_state if random_state is not None else config.model.random_state
+        
+        self.categorical_columns = config.data.categorical_features
+        self.numerical_columns = config.data.numerical_features
+        self.target_column = config.data.target_column
+        
+        self.salary_sketch = None
+        self.salary_bounds = None
+        self.split_counts = {'train': 0, 'test': 0}
+        
+        # Digest of every distinct raw row and where it first occurs, filled by the first pass
+        self.digest_store = DigestStore(work_dir or config.data.processed_data_dir, self.chunk_size)
+        self.rows_read = 0
+    
+    def iter_chunks(self, file_path):
+        """Read the raw CSV in chunks with stable dtypes across chunks"""
+        dtypes = {col: 'object' for col in self.categorical_columns}
+        dtypes.update({col: 'float64' for col in self.numerical_columns + [self.target_column]})
+        return pd.read_csv(file_path, chunksize=self.chunk_size, dtype=dtypes)
+    
+    def first_occurrences(self, chunk, offset):
+        """Mask of the chunk rows that are the first occurrence of their raw row.
+        
+        The first pass adds unseen digests to the store; later passes only
+        look up where each digest first occurred.
+        """
+        digests = row_digests(chunk)
+        positions = offset + np.arange(len(chunk), dtype=np.int64)
+        first_positions = self.digest_store.lookup(digests)
+        
+        unseen = first_positions < 0
+        if unseen.any():
+            # Within the chunk, the first of several identical rows wins
+            new = unseen & ~pd.Series(digests).duplicated().to_numpy()
+            self.digest_store.add(digests[new], positions[new])
+            first_positions = self.digest_store.lookup(digests)
+        return first_positions == positions
+    
+    def iter_clean_chunks(self, file_path, apply_bounds=True):
+        """Yield deduplicated, complete and (optionally) outlier-free chunks"""
+        self.rows_read = 0
+        for chunk in self.iter_chunks(file_path):
+            offset = self.rows_read
+            self.rows_read += len(chunk)
+            
+            # Remove duplicates and handle missing values
+            chunk = chunk[self.first_occurrences(chunk, offset)]
+            chunk = chunk.dropna()
+            
+            if apply_bounds:
+                lower, upper = self.salary_bounds
+                salary = chunk[self.target_column]
+                chunk = chunk[~((salary < lower) | (salary > upper))]
+            
+            if len(chunk):
+                yield chunk
+    
+    def choose_test_rows(self, n_rows):
+        """Set the split sizes for n_rows clean rows as train_test_split does"""
+        n_test = int(np.ceil(self.test_size * n_rows))
+        self.split_counts = {'train': n_rows - n_test, 'test': n_test}
+    
+    def iter_test_positions(self):
+        """Yield (rows covered, sorted test positions) for each block of clean rows.
+        
+        Each block draws its number of test rows from the hypergeometric
+        distribution of the rows still to place, so every set of
+        split_counts['test'] rows is equally likely.
+        """
+        rng = np.random.RandomState(self.random_state)
+        n_rows = self.split_counts['train'] + self.split_counts['test']
+        needed = self.split_counts['test']
+        for start in range(0, n_rows, SPLIT_BLOCK_ROWS):
+            size = min(SPLIT_BLOCK_ROWS, n_rows - start)
+            n_test = rng.hypergeometric(needed, n_rows - start - needed, size) if needed else 0
+            needed -= n_test
+            yield start + size, start + np.sort(rng.choice(size, n_test, replace=False))
+    
+    def iter_split_masks(self, file_path):
+        """Yield clean chunks with their test-row mask (after choose_test_rows)"""
+        blocks = self.iter_test_positions()
+        pending = np.empty(0, dtype=np.int64)
+        covered = offset = 0
+        for chunk in self.iter_clean_chunks(file_path):
+            end = offset + len(chunk)
+            while covered < end:
+                covered, positions = next(blocks)
+                pending = np.concatenate([pending, positions])
+            
+            n_in_chunk = np.searchsorted(pending, end)
+            test_mask = np.zeros(len(chunk), dtype=bool)
+            test_mask[pending[:n_in_chunk] - offset] = True
+            pending = pending[n_in_chunk:]
+            offset = end
+            yield chunk, test_mask
+    
+    def fit_salary_bounds(self, file_path, threshold=1.5):
+        """Pass 1: estimate the IQR outlier bounds with a quantile sketch"""
+        self.salary_sketch = KLLSketch(k=self.sketch_size, random_state=self.random_state)
+        for chunk in self.iter_clean_chunks(file_path, apply_bounds=False):
+            self.salary_sketch.update(chunk[self.target_column].to_numpy())
+        
+        Q1 = self.salary_sketch.quantile(0.25)
+        Q3 = self.salary_sketch.quantile(0.75)
+        IQR = Q3 - Q1
+        self.salary_bounds = (Q1 - threshold * IQR, Q3 + threshold * IQR)
+        
+        print(f"Salary bounds from {self.salary_sketch.count:,} rows: "
+              f"{self.salary_bounds[0]:,.0f} - {self.salary_bounds[1]:,.0f}")
+        return self.salary_bounds
+    
+    def fit_encoders(self, file_path):
+        """Pass 2: collect categories and split the clean rows"""
+        categories = {col: set() for col in self.categorical_columns}
+        n_rows = 0
+        
+        for chunk in self.iter_clean_chunks(file_path):
+            for col in self.categorical_columns:
+                if col in chunk.columns:
+                    categories[col].update(chunk[col].unique())
+            n_rows += len(chunk)
+        self.choose_test_rows(n_rows)
+        
+        # Fitting on the sorted uniques gives the same codes as fitting on the full column
+        for col, values in categories.items():
+            if values:
+                le = LabelEncoder()
+                le.fit(sorted(values))
+                self.label_encoders[col] = le
+        
+        print(f"Data cleaned. Rows: {self.split_counts['train'] + self.split_counts['test']:,} "
+              f"(train {self.split_counts['train']:,}, test {self.split_counts['test']:,})")
+    
+    def transform_chunk(self, chunk):
+        """Encode a clean chunk with the fitted encoders and select features"""
+        chunk = chunk.copy()
+        for col, le in self.label_encoders.items():
+            chunk[col] = le.transform(chunk[col])
+        chunk = self.create_features(chunk)
+        return self.prepare_features(chunk)
+    
+    def fit_scaler(self, file_path):
+        """Pass 3: fit the scaler incrementally on training rows"""
+        for chunk, test_mask in self.iter_split_masks(file_path):
+            X, _ = self.transform_chunk(chunk)
+            if (~test_mask).any():
+                self.scaler.partial_fit(X[~test_mask])
+    
+    def write_splits(self, file_path, storage):
+        """Pass 4: scale and write the train/test splits, and the raw positions of the training rows"""
+        train_rows = np.lib.format.open_memmap(train_rows_path(), mode='w+', dtype=np.int64,
+                                               shape=(self.split_counts['train'],))
+        n_train = 0
+        writers = {
+            'X_train_processed': storage.open_writer('X_train_processed', self.split_counts['train']),
+            'X_test_processed': storage.open_writer('X_test_processed', self.split_counts['test']),
+            'y_train': storage.open_writer('y_train', self.split_counts['train']),
+            'y_test': storage.open_writer('y_test', self.split_counts['test'])
+        }
+        
+        for chunk, test_mask in self.iter_split_masks(file_path):
+            X, y = self.transform_chunk(chunk)
+            X_scaled = pd.DataFrame(self.scaler.transform(X), columns=self.feature_columns)
+            
+            for split, mask in (('train', ~test_mask), ('test', test_mask)):
+                if mask.any():
+                    writers[f'X_{split}_processed'].write(X_scaled[mask])
+                    writers[f'y_{split}'].write(y[mask].reset_index(drop=True))
+            
+            # Chunks continue the reader's index, so it holds the raw row positions
+            positions = chunk.index[~test_mask]
+            train_rows[n_train:n_train + len(positions)] = positions
+            n_train += len(positions)
+        
+        for writer in writers.values():
+            writer.close()
+        train_rows.flush()
+        del train_rows
+    
+    def process(self, file_path, storage=None):
+        """Run all passes and write the processed splits"""
+        storage = storage or get_split_storage()
+        
+        self.fit_salary_bounds(file_path)
+        self.fit_encoders(file_path)
+        self.fit_scaler(file_path)
+        self.write_splits(file_path, storage)
+
+def main(file_path=None, chunk_size=None):
+    file_path = file_path or config.data.raw_data_path
+    os.makedirs(config.data.processed_data_dir, exist_ok=True)
+    
+    with tempfile.TemporaryDirectory(dir=config.data.processed_data_dir) as work_dir:
+        processor = StreamingDataProcessor(chunk_size=chunk_size, work_dir=work_dir)
+        processor.process(file_path)
+        
+        # Save preprocessors
+        processor.save_preprocessors()
+        
+        # Later incremental runs start after these rows
+        save_processing_state({
+            'rows_processed': processor.rows_read,
+            'bytes_processed': os.path.getsize(file_path),
+            'salary_bounds': list(processor.salary_bounds),
+            'pending': None
+        }, processor.digest_store.digests)
+    
+    print("Streaming data processing completed successfully!")
+
+if __name__ == "__main__":
+    with profile_from_argv('streaming_processing'):
+        parser = argparse.ArgumentParser(description='Process the raw dataset in bounded-memory chunks')
+        parser.add_argument('--input', default=None, help='raw CSV path (default: DataConfig.raw_data_path)')
+        parser.add_argument('--chunk-size', type=int, default=None)
+        args = parser.parse_args()
+        
+        main(args.input, args.chunk_size)
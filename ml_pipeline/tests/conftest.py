@@ -0,0 +1,47 @@
+
+import os
+import shutil
+import sys
+import pytest
+
+# The pipeline modules are flat scripts that import each other by name
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DATASET = os.path.join(os.path.dirname(PIPELINE_DIR), 'data', 'salary_dataset.csv')
+sys.path.insert(0, PIPELINE_DIR)
+
+def copy_sample_dataset(directory):
+    """Put the sample dataset at the configured (relative) raw data path"""
+    os.makedirs(os.path.join(directory, 'data'), exist_ok=True)
+    shutil.copy(SAMPLE_DATASET, os.path.join(directory, 'data', 'salary_dataset.csv'))
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Empty working directory holding only the sample dataset"""
+    copy_sample_dataset(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture(scope='session')
+def trained_dir(tmp_path_factory):
+    """Processed splits, models and a published bundle from one batch run"""
+    import data_processing
+    import model_training
+    
+    path = tmp_path_factory.mktemp('trained')
+    copy_sample_dataset(path)
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        data_processing.main()
+        model_training.main()
+    finally:
+        os.chdir(cwd)
+    return path
+
+@pytest.fixture
+def trained_workspace(trained_dir, tmp_path, monkeypatch):
+    """Private copy of the trained run, used as the working directory"""
+    path = tmp_path / 'run'
+    shutil.copytree(trained_dir, path)
+    monkeypatch.chdir(path)
+    return path
@@ -0,0 +1,92 @@
+
+import json
+import os
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+import model_training
+from artifacts import (BundleWatcher, activate_bundle, bundle_path, current_version, extend_bundle,
+                       list_bundles, publish_bundle, read_manifest, verify_bundle)
+from prediction_api import SalaryPredictor
+from config import config
+
+def bundle_files(version=None):
+    return set(read_manifest(version or current_version())['files'])
+
+def test_training_publishes_only_its_own_artifacts(trained_workspace):
+    # Leftovers of an earlier run in the flat model directory
+    for name in ('retired_model.pkl', 'retired_compiled.npz', 'random_forest_lookup.npy'):
+        (trained_workspace / 'models' / name).write_bytes(b'stale')
+    
+    model_training.main()
+    files = bundle_files()
+    assert not {'retired_model.pkl', 'retired_compiled.npz', 'random_forest_lookup.npy'} & files
+    assert {'random_forest_model.pkl', 'random_forest_compiled.npz', 'scaler.pkl'} <= files
+    verify_bundle(current_version())
+
+def test_switching_backends_drops_stale_compiled_arrays(trained_workspace, monkeypatch):
+    assert 'gradient_boosting_compiled.npz' in bundle_files()
+    
+    monkeypatch.setattr(config.model, 'gradient_boosting_backend', 'histogram')
+    model_training.main()
+    assert 'gradient_boosting_compiled.npz' not in bundle_files()
+    assert not os.path.exists('models/gradient_boosting_compiled.npz')
+    
+    predictor = SalaryPredictor(inference_mode='compiled')
+    assert predictor.load_model('gradient_boosting')
+    assert type(predictor.model).__name__ == 'HistGradientBoostingRegressor'
+
+def test_identical_content_published_twice_reuses_the_bundle(trained_workspace):
+    first = publish_bundle(config.data.models_dir)
+    second = publish_bundle(config.data.models_dir)
+    assert first.split('-')[-1] == second.split('-')[-1]
+    assert current_version() == second
+    verify_bundle(second)
+
+def test_published_bundles_are_immutable(trained_workspace):
+    version = current_version()
+    path = os.path.join(bundle_path(version), 'scaler.pkl')
+    joblib.dump(StandardScaler().fit(np.zeros((2, 1))), path)
+    with pytest.raises(ValueError):
+        verify_bundle(version)
+
+def test_extend_bundle_adds_files_to_a_new_version(trained_workspace, tmp_path):
+    base = current_version()
+    extra = tmp_path / 'notes.json'
+    extra.write_text(json.dumps({'source': base}))
+    
+    version = extend_bundle(base, [str(extra)])
+    assert current_version() == version != base
+    assert bundle_files(version) == bundle_files(base) | {'notes.json'}
+    assert 'notes.json' not in os.listdir(bundle_path(base))
+
+def test_reload_follows_activation_and_rollback(trained_workspace):
+    first = current_version()
+    predictor = SalaryPredictor(inference_mode='lean')
+    assert predictor.load_model(config.api.default_model)
+    
+    second = publish_bundle(config.data.models_dir, version='second')
+    assert predictor.reload() and predictor.version == second
+    
+    activate_bundle(first)
+    assert predictor.reload() and predictor.version == first
+    assert list_bundles() == sorted([first, second])
+
+def test_watcher_keeps_serving_when_a_bundle_is_rejected(trained_workspace, tmp_path):
+    predictor = SalaryPredictor(inference_mode='lean')
+    assert predictor.load_model(config.api.default_model)
+    served = predictor.version
+    watcher = BundleWatcher(predictor.reload, interval=0)
+    
+    # A scaler for the wrong number of features fails the pre-swap check
+    bad_scaler = str(tmp_path / 'scaler.pkl')
+    joblib.dump(StandardScaler().fit(np.zeros((2, 3))), bad_scaler)
+    bad = extend_bundle(served, [bad_scaler])
+    watcher.poll()
+    assert watcher.rejected == bad
+    assert predictor.version == served
+    
+    good = publish_bundle(config.data.models_dir, version='good')
+    watcher.poll()
+    assert watcher.last_seen == good == predictor.version
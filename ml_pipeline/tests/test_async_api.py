@@ -0,0 +1,133 @@
+
+import json
+import asyncio
+import pandas as pd
+import pytest
+from async_api import MicroBatcher
+from prediction_api import SalaryPredictor
+from config import config
+
+class EchoPredictor:
+    """Stands in for SalaryPredictor: returns each record's id and model selection"""
+    
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+    
+    def predict_batch(self, records, model=None, combine=None):
+        self.calls.append((len(records), model, combine))
+        if self.fail:
+            raise RuntimeError('model exploded')
+        return [{'id': record['id'], 'model': model, 'combine': combine} for record in records]
+
+def run_requests(batcher, requests):
+    """Submit (record, model, combine) requests concurrently and gather their results"""
+    async def main():
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(*request) for request in requests))
+        finally:
+            await batcher.stop()
+    return asyncio.run(main())
+
+def test_concurrent_requests_share_batches():
+    predictor = EchoPredictor()
+    batcher = MicroBatcher(predictor, max_batch_size=8, max_wait_us=50_000)
+    results = run_requests(batcher, [({'id': i}, None, None) for i in range(20)])
+    
+    assert [result['id'] for result in results] == list(range(20))
+    assert batcher.records == 20
+    assert batcher.largest_batch == 8
+    assert batcher.batches == len(predictor.calls) == 3
+
+def test_batches_are_split_by_model_selection():
+    predictor = EchoPredictor()
+    batcher = MicroBatcher(predictor, max_batch_size=16, max_wait_us=50_000)
+    requests = [({'id': i}, ['ridge_regression', 'random_forest'] if i % 2 else 'lasso_regression',
+                 'mean' if i % 2 else None) for i in range(10)]
+    results = run_requests(batcher, requests)
+    
+    for (record, model, combine), result in zip(requests, results):
+        assert result == {'id': record['id'], 'model': model, 'combine': combine}
+    assert sorted(calls[0] for calls in predictor.calls) == [5, 5]
+
+def test_model_errors_reach_every_request():
+    batcher = MicroBatcher(EchoPredictor(fail=True), max_batch_size=4, max_wait_us=1000)
+    results = run_requests(batcher, [({'id': i}, None, None) for i in range(3)])
+    assert all('model exploded' in result['error'] for result in results)
+
+@pytest.mark.parametrize('inference_mode', ['lean', 'compiled'])
+def test_results_match_direct_batch_prediction(trained_workspace, inference_mode):
+    predictor = SalaryPredictor(inference_mode=inference_mode)
+    assert predictor.load_model(config.api.default_model)
+    records = pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column).head(25)
+    records = records.to_dict('records')
+    
+    batched = run_requests(MicroBatcher(predictor, max_batch_size=8, max_wait_us=20_000),
+                           [(record, None, None) for record in records])
+    direct = predictor.predict_batch(records)
+    for batched_result, direct_result in zip(batched, direct):
+        assert batched_result['predicted_salary'] == direct_result['predicted_salary']
+        assert batched_result['confidence_interval'] == direct_result['confidence_interval']
+
+def test_batcher_restarts_after_stop():
+    batcher = MicroBatcher(EchoPredictor(), max_batch_size=4, max_wait_us=1000)
+    first = run_requests(batcher, [({'id': 1}, None, None)])
+    second = run_requests(batcher, [({'id': 2}, None, None)])
+    assert [first[0]['id'], second[0]['id']] == [1, 2]
+    assert batcher.executor is None
+
+def call_asgi(requests):
+    """Send (path, body, content_type) requests through the ASGI app; return (status, json) pairs"""
+    import async_api
+    
+    async def call(path, body, content_type):
+        headers = [(b'content-type', content_type.encode())] if content_type else []
+        scope = {'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'', 'headers': headers}
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+        
+        async def receive():
+            return messages.pop(0)
+        
+        async def send(message):
+            sent.append(message)
+        
+        await async_api.app(scope, receive, send)
+        return sent[0]['status'], json.loads(sent[1]['body'])
+    
+    async def main():
+        async_api.batcher.start()
+        try:
+            return [await call(*request) for request in requests]
+        finally:
+            await async_api.batcher.stop()
+    return asyncio.run(main())
+
+def test_predict_errors_match_flask(trained_workspace):
+    import prediction_api
+    assert prediction_api.predictor.load_model(config.api.default_model)
+    record = pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column).iloc[0]
+    record = json.loads(record.to_json())
+    
+    bad_numeric = dict(record, experience_years='lots')
+    no_company = {key: value for key, value in record.items() if key != 'company_name'}
+    requests = [
+        ('/predict', json.dumps({'job_title': 'Data Scientist'}).encode(), 'application/json'),
+        ('/predict', json.dumps(bad_numeric).encode(), 'application/json'),
+        ('/predict', json.dumps(no_company).encode(), 'application/json'),
+        ('/predict', json.dumps(dict(record, model='no_such_model')).encode(), 'application/json'),
+        ('/predict', json.dumps([record]).encode(), 'application/json'),
+        ('/predict', b'{not json', 'application/json'),
+        ('/predict', json.dumps(record).encode(), 'text/plain'),
+        ('/predict', json.dumps(record).encode(), None),
+        ('/predict-batch', json.dumps(record).encode(), 'application/json'),
+    ]
+    
+    client = prediction_api.app.test_client()
+    expected = []
+    for path, body, content_type in requests:
+        response = client.post(path, data=body, content_type=content_type)
+        expected.append((response.status_code, response.get_json()))
+    assert all(status != 200 for status, _ in expected)
+    assert call_asgi(requests) == expected
@@ -0,0 +1,38 @@
+import json
+import pandas as pd
+import pytest
+import benchmark_suite
+from benchmarks import REFERENCE_BASELINE, bench_suite, compare_with_baseline, generate_salary_dataset
+from config import config
+
+def result(benchmark, value, unit='s', rows=1000):
+    return {'benchmark': benchmark, 'rows': rows, 'value': value, 'unit': unit}
+
+def test_slowdowns_beyond_the_tolerance_are_regressions():
+    baseline = {'results': [result('fit', 1.0), result('predict', 1.0), result('tiny', 0.001),
+                            result('latency', 100.0, 'us')]}
+    current = [result('fit', 1.3), result('predict', 0.5), result('tiny', 0.0025),
+               result('latency', 110.0, 'us'), result('fit', 1.0, rows=10_000)]
+    statuses = [r['status'] for r in compare_with_baseline(current, baseline, tolerance=0.2)]
+    # Timer noise below the floor is never a regression
+    assert statuses == ['regression', 'improvement', 'ok', 'ok', 'new']
+
+def test_reference_baseline_is_committed():
+    with open(REFERENCE_BASELINE, 'r') as f:
+        baseline = json.load(f)
+    assert baseline['meta']['sizes']
+    benchmarks = {r['benchmark'] for r in baseline['results']}
+    assert {'processing.clean_data', 'predictor.predict_salary', 'api./predict-batch'} <= benchmarks
+
+def test_ci_mode_fails_without_writing_a_missing_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark_suite, 'generate_salary_dataset',
+                        lambda *args, **kwargs: pytest.fail('benchmarks ran without a baseline'))
+    path = tmp_path / 'baseline.json'
+    with pytest.raises(FileNotFoundError):
+        bench_suite(baseline_path=str(path), ci=True)
+    assert not path.exists()
+
+def test_synthetic_data_keeps_the_schema(workspace):
+    df = generate_salary_dataset(500, seed=0)
+    assert list(df.columns) == list(pd.read_csv(config.data.raw_data_path).columns)
+    assert len(df) == 500 and df[config.data.target_column].gt(0).all()
@@ -0,0 +1,85 @@
+
+import threading
+import pandas as pd
+import cache as cache_module
+from cache import PredictionCache
+from prediction_api import SalaryPredictor
+from config import config
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(max_size=4, ttl=10)
+    cache.put('a', 1)
+    
+    now[0] += 5
+    assert cache.get('a') == 1
+    now[0] += 6
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_zero_size_disables_the_cache():
+    cache = PredictionCache(max_size=0)
+    cache.put('a', 1)
+    assert not cache.enabled
+    assert cache.get('a') is None
+
+def test_concurrent_puts_respect_max_size():
+    cache = PredictionCache(max_size=50)
+    
+    def fill(offset):
+        for i in range(1000):
+            cache.put((offset, i), i)
+            cache.get((offset, i - 1))
+    
+    threads = [threading.Thread(target=fill, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    stats = cache.stats()
+    assert stats['size'] == 50
+    assert stats['evictions'] == 8 * 1000 - 50
+
+def test_predictor_reuses_cached_predictions(trained_workspace, monkeypatch):
+    monkeypatch.setattr(config.api, 'prediction_cache_size', 128)
+    predictor = SalaryPredictor(inference_mode='lean')
+    assert predictor.load_model(config.api.default_model)
+    record = pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column).iloc[0].to_dict()
+    
+    first, _ = predictor.predict_salary(record)
+    # Equivalent raw input: numbers as floats map to the same encoded feature vector
+    second, _ = predictor.predict_salary({**record, 'experience_years': float(record['experience_years'])})
+    batch = predictor.predict_batch([record])[0]
+    
+    stats = predictor.cache.stats()
+    assert stats['misses'] == 1 and stats['hits'] == 2
+    assert first['predicted_salary'] == second['predicted_salary'] == batch['predicted_salary']
+    assert first['confidence_interval'] == batch['confidence_interval']
+
+def test_cache_is_cleared_when_a_new_bundle_is_served(trained_workspace, monkeypatch):
+    from artifacts import current_version, publish_bundle
+    
+    monkeypatch.setattr(config.api, 'prediction_cache_size', 128)
+    predictor = SalaryPredictor(inference_mode='lean')
+    assert predictor.load_model(config.api.default_model)
+    record = pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column).iloc[0].to_dict()
+    predictor.predict_salary(record)
+    
+    version = publish_bundle(config.data.models_dir, version='next')
+    assert predictor.reload() and predictor.version == version == current_version()
+    assert predictor.cache.stats()['size'] == 0
+    result, _ = predictor.predict_salary(record)
+    assert result['model_version'] == 'next'
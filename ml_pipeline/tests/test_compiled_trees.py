@@ -0,0 +1,82 @@
+
+import os
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+from compiled_trees import CompiledTreeEnsemble, compiled_source_digest, export_compiled_model
+from model_registry import ModelRegistry
+from uncertainty import TreeUncertainty
+
+@pytest.fixture(scope='module')
+def regression_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 6))
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + rng.normal(scale=0.1, size=400)
+    return X, y
+
+@pytest.mark.parametrize('model', [
+    RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0),
+    GradientBoostingRegressor(n_estimators=30, random_state=0),
+    GradientBoostingRegressor(n_estimators=30, init='zero', random_state=0)
+])
+def test_predictions_match_sklearn(model, regression_data):
+    X, y = regression_data
+    model.fit(X, y)
+    compiled = CompiledTreeEnsemble.from_model(model)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-9, atol=1e-9)
+
+def test_missing_values_follow_sklearn(regression_data):
+    X, y = regression_data
+    X = X.copy()
+    X[::7, 0] = np.nan
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    compiled = CompiledTreeEnsemble.from_model(model)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=1e-9)
+
+@pytest.mark.parametrize('method', ['normal', 'quantile'])
+def test_intervals_match_tree_uncertainty(method, regression_data):
+    X, y = regression_data
+    model = RandomForestRegressor(n_estimators=15, random_state=0).fit(X, y)
+    compiled = CompiledTreeEnsemble.from_model(model, method=method)
+    
+    prediction, (lower, upper) = compiled.predict_with_intervals(X)
+    expected_lower, expected_upper = TreeUncertainty(model, method=method).intervals(X, model.predict(X))
+    np.testing.assert_allclose(prediction, model.predict(X), rtol=1e-9)
+    np.testing.assert_allclose(lower, expected_lower, rtol=1e-6)
+    np.testing.assert_allclose(upper, expected_upper, rtol=1e-6)
+
+def test_boosted_ensembles_have_no_intervals(regression_data):
+    X, y = regression_data
+    model = GradientBoostingRegressor(n_estimators=10, random_state=0).fit(X, y)
+    _, intervals = CompiledTreeEnsemble.from_model(model).predict_with_intervals(X)
+    assert intervals is None
+
+def test_unsupported_models_are_not_exported(tmp_path, regression_data):
+    X, y = regression_data
+    path = str(tmp_path / 'ridge_compiled.npz')
+    assert export_compiled_model(Ridge().fit(X, y), path) is None
+    assert not os.path.exists(path)
+
+def test_save_load_round_trip_keeps_source_digest(tmp_path, regression_data):
+    X, y = regression_data
+    model = GradientBoostingRegressor(n_estimators=10, random_state=0).fit(X, y)
+    path = export_compiled_model(model, str(tmp_path / 'gb_compiled.npz'), 'abc123')
+    
+    loaded = CompiledTreeEnsemble.load(path)
+    assert compiled_source_digest(path) == 'abc123'
+    assert not loaded.bagged
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X), rtol=1e-9)
+
+def test_registry_ignores_arrays_from_another_pickle(tmp_path, regression_data):
+    X, y = regression_data
+    served = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    other = RandomForestRegressor(n_estimators=5, random_state=1).fit(X, y)
+    joblib.dump(served, tmp_path / 'random_forest_model.pkl')
+    export_compiled_model(other, str(tmp_path / 'random_forest_compiled.npz'), 'stale digest')
+    
+    registry = ModelRegistry(str(tmp_path), compiled=True, scores={})
+    entry = registry.get('random_forest')
+    assert entry.compiled
+    np.testing.assert_allclose(entry.model.predict(X), served.predict(X), rtol=1e-9)
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+import data_processing
+import incremental_processing
+import streaming_processing
+from cross_validation import CrossValidator, load_training_rows
+from data_processing import train_rows_path
+from split_storage import get_split_storage
+from config import config
+
+def assert_rows_match_training_split(capsys):
+    rows = load_training_rows()
+    y_train = np.array(get_split_storage().load_array('y_train')).ravel()
+    np.testing.assert_allclose(rows[config.data.target_column].to_numpy(), y_train)
+    assert 'Warning' not in capsys.readouterr().out
+    return rows
+
+def test_rows_of_the_batch_split(trained_workspace, capsys):
+    assert_rows_match_training_split(capsys)
+
+def test_rows_of_the_streaming_split(workspace, capsys):
+    streaming_processing.main(chunk_size=37)
+    assert_rows_match_training_split(capsys)
+
+def test_rows_after_incremental_processing(workspace, capsys):
+    path = workspace / config.data.raw_data_path
+    lines = path.read_text().splitlines(keepends=True)
+    split = next(i for i, line in enumerate(lines) if line.strip()) + 81
+    path.write_text(''.join(lines[:split]))
+    data_processing.main()
+    with open(path, 'a') as f:
+        f.writelines(lines[split:])
+    
+    summary = incremental_processing.main()
+    assert summary['train_rows'] > 0
+    assert_rows_match_training_split(capsys)
+
+def test_missing_split_record_falls_back_to_resplitting(trained_workspace, capsys):
+    os.remove(train_rows_path())
+    rows = load_training_rows()
+    assert 'Warning' in capsys.readouterr().out
+    assert len(rows) == len(get_split_storage().load_array('y_train'))
+
+def test_grouped_folds_hold_out_whole_groups(trained_workspace):
+    rows = load_training_rows()
+    validator = CrossValidator(n_splits=3, n_repeats=2, group_column='company_name', n_jobs=1)
+    folds = validator.make_folds(rows)
+    groups = rows['company_name'].to_numpy()
+    
+    for repeat in range(2):
+        valid = np.concatenate([valid_idx for fold_repeat, _, valid_idx in folds if fold_repeat == repeat])
+        assert sorted(valid) == list(range(len(rows)))
+    for _, train_idx, valid_idx in folds:
+        assert not set(groups[train_idx]) & set(groups[valid_idx])
+    
+    summary = validator.run(rows, {'linear_regression': LinearRegression()})
+    assert summary['linear_regression']['cv_folds'] == 6
+
+def test_too_few_groups_are_rejected(trained_workspace):
+    rows = load_training_rows()
+    validator = CrossValidator(n_splits=3, group_column='employment_type', n_jobs=1)
+    with pytest.raises(ValueError, match='cannot fill'):
+        validator.make_folds(rows)
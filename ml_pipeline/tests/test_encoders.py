@@ -0,0 +1,34 @@
+
+import joblib
+import numpy as np
+import pandas as pd
+from encoders import CompiledEncoder
+from config import config
+
+def test_codes_match_the_label_encoders(trained_workspace):
+    label_encoders = joblib.load('models/label_encoders.pkl')
+    encoder = CompiledEncoder.load('models/compiled_encoders.pkl')
+    df = pd.read_csv(config.data.raw_data_path)
+    
+    for col, label_encoder in label_encoders.items():
+        # Rows dropped as outliers can hold categories the encoders never saw
+        values = [value for value in df[col].astype(str) if value in label_encoder.classes_]
+        np.testing.assert_array_equal(encoder.encode_array(col, values), label_encoder.transform(values))
+        assert [encoder.encode(col, value) for value in values] == label_encoder.transform(values).tolist()
+
+def test_unknown_categories_use_the_fallback_code(trained_workspace):
+    label_encoders = joblib.load('models/label_encoders.pkl')
+    encoder = CompiledEncoder.from_label_encoders(label_encoders, unknown_value=-1)
+    
+    assert encoder.encode('company_size', 'Enormous') == -1
+    codes = encoder.encode_array('company_size', ['Enormous', 'Small'])
+    assert codes.tolist() == [-1, label_encoders['company_size'].transform(['Small'])[0]]
+
+def test_save_and_load_round_trip(tmp_path):
+    encoder = CompiledEncoder({'size': {'Large': 0, 'Small': 1}}, unknown_value=7)
+    encoder.save(tmp_path / 'encoders.pkl')
+    loaded = CompiledEncoder.load(tmp_path / 'encoders.pkl')
+    
+    assert loaded.mappings == encoder.mappings
+    assert loaded.unknown_value == 7
+    assert loaded.columns == ['size']
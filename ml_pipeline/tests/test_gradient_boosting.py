@@ -0,0 +1,53 @@
+
+import json
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from model_training import ModelTrainer, TUNED_PARAMS_FILE, categorical_feature_mask, make_gradient_boosting
+from split_storage import get_split_storage
+from config import config
+
+@pytest.fixture
+def histogram_backend(trained_workspace, monkeypatch):
+    monkeypatch.setattr(config.model, 'gradient_boosting_backend', 'histogram')
+    return trained_workspace
+
+def test_label_encoded_columns_are_native_categories(histogram_backend):
+    feature_columns = joblib.load('models/feature_columns.pkl')
+    label_encoders = joblib.load('models/label_encoders.pkl')
+    model = make_gradient_boosting()
+    
+    assert isinstance(model, HistGradientBoostingRegressor)
+    assert list(model.categorical_features) == [col in label_encoders for col in feature_columns]
+
+def test_high_cardinality_columns_stay_numeric():
+    class Encoder:
+        def __init__(self, n_classes):
+            self.classes_ = np.arange(n_classes)
+    
+    mask = categorical_feature_mask(['small', 'large', 'numeric'],
+                                    {'small': Encoder(3), 'large': Encoder(300)}, max_bins=255)
+    assert mask == [True, False, False]
+
+def test_scaled_category_codes_train(histogram_backend):
+    # The stored splits hold standard-scaled codes, not 0..n-1 integers
+    storage = get_split_storage()
+    X = np.array(storage.load_array('X_train_processed'))
+    y = np.array(storage.load_array('y_train')).ravel()
+    model = make_gradient_boosting().fit(X, y)
+    assert np.all(np.isfinite(model.predict(X)))
+
+def test_parameters_tuned_for_the_other_backend_are_ignored(histogram_backend):
+    tuned = {'gradient_boosting': {'estimator': 'GradientBoostingRegressor', 'params': {'subsample': 0.5}}}
+    with open(f'models/{TUNED_PARAMS_FILE}', 'w') as f:
+        json.dump(tuned, f)
+    
+    trainer = ModelTrainer()
+    trainer.initialize_models(use_tuned_params=True)
+    assert isinstance(trainer.models['gradient_boosting'], HistGradientBoostingRegressor)
+    
+    config.model.gradient_boosting_backend = 'exact'
+    trainer.initialize_models(use_tuned_params=True)
+    model = trainer.models['gradient_boosting']
+    assert isinstance(model, GradientBoostingRegressor) and model.subsample == 0.5
@@ -0,0 +1,48 @@
+import json
+import numpy as np
+from hyperparameter_search import HyperparameterSearch, save_tuned_params
+from model_training import ModelTrainer, TUNED_PARAMS_FILE, data_fingerprint, load_processed_data
+from config import config
+
+def run_search():
+    X_train, _, y_train, _ = load_processed_data()
+    search = HyperparameterSearch('halving', n_candidates=3, cv_folds=2, n_jobs=1)
+    return search, search.run(np.asarray(X_train), np.asarray(y_train), ['ridge_regression'])
+
+def test_tuned_params_apply_to_the_searched_data(trained_workspace):
+    _, results = run_search()
+    save_tuned_params(results, config.data.models_dir)
+    
+    trainer = ModelTrainer()
+    trainer.initialize_models(use_tuned_params=True)
+    assert trainer.models['ridge_regression'].alpha == results['ridge_regression']['params']['alpha']
+
+def test_tuned_params_from_other_data_are_ignored(trained_workspace, capsys):
+    tuned = {'ridge_regression': {'estimator': 'Ridge', 'params': {'alpha': 123.0},
+                                  'data_fingerprint': '0123456789abcdef'}}
+    with open(f'{config.data.models_dir}/{TUNED_PARAMS_FILE}', 'w') as f:
+        json.dump(tuned, f)
+    
+    trainer = ModelTrainer()
+    trainer.initialize_models(use_tuned_params=True)
+    assert trainer.models['ridge_regression'].alpha == config.model.linear_models_params['ridge_alpha']
+    assert 'other training data' in capsys.readouterr().out
+    
+    # Arrays passed by the caller are checked instead of the saved split
+    X_train, _, y_train, _ = load_processed_data()
+    tuned['ridge_regression']['data_fingerprint'] = data_fingerprint(X_train, y_train)
+    with open(f'{config.data.models_dir}/{TUNED_PARAMS_FILE}', 'w') as f:
+        json.dump(tuned, f)
+    trainer.initialize_models(use_tuned_params=True, X_train=X_train, y_train=y_train)
+    assert trainer.models['ridge_regression'].alpha == 123.0
+    trainer.initialize_models(use_tuned_params=True, X_train=X_train[:-1], y_train=y_train[:-1])
+    assert trainer.models['ridge_regression'].alpha != 123.0
+
+def test_search_resumes_from_its_cache(trained_workspace):
+    first, first_results = run_search()
+    second, second_results = run_search()
+    
+    assert first.evaluations > 0 and first.cache_hits == 0
+    assert second.evaluations == 0 and second.cache_hits == first.evaluations
+    assert second_results['ridge_regression']['params'] == first_results['ridge_regression']['params']
+    assert second_results['ridge_regression']['data_fingerprint'] == first_results['ridge_regression']['data_fingerprint']
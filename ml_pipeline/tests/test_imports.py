@@ -0,0 +1,29 @@
+
+import json
+import os
+import subprocess
+import sys
+import pytest
+from benchmarks import HEAVY_MODULES
+from conftest import PIPELINE_DIR
+
+PROBE = """
+import json, sys
+sys.path.insert(0, {pipeline_dir!r})
+import {module}
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+def loaded_heavy_modules(module, cwd):
+    probe = PROBE.format(pipeline_dir=PIPELINE_DIR, module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', probe], cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+@pytest.mark.parametrize('module', ['prediction_api', 'async_api', 'utils'])
+def test_serving_modules_import_without_analysis_libraries(module, tmp_path):
+    assert loaded_heavy_modules(module, tmp_path) == []
+
+def test_importing_utils_does_not_open_a_log_file(tmp_path):
+    loaded_heavy_modules('utils', tmp_path)
+    assert not os.path.exists(tmp_path / 'ml_pipeline.log')
+
@@ -0,0 +1,120 @@
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+import data_processing
+import incremental_processing
+import model_training
+from data_processing import load_processing_state
+from encoders import CompiledEncoder
+from model_training import rescale_tree_thresholds
+from split_storage import get_split_storage
+from config import config
+
+INITIAL_ROWS = 80
+
+@pytest.mark.parametrize('model', [
+    RandomForestRegressor(n_estimators=10, random_state=0),
+    GradientBoostingRegressor(n_estimators=20, random_state=0)
+], ids=lambda model: type(model).__name__)
+def test_rescaled_trees_reach_the_same_leaves(model):
+    rng = np.random.default_rng(0)
+    raw = rng.normal(size=(300, 4)) * [1, 50, 1000, 0.2] + [0, 100, 5e4, 1]
+    y = raw[:, 0] + raw[:, 1] / 50 + rng.normal(scale=0.1, size=300)
+    old_scaler = StandardScaler().fit(raw[:200])
+    new_scaler = StandardScaler().fit(raw)
+    
+    model.fit(old_scaler.transform(raw[:200]), y[:200])
+    expected = model.predict(old_scaler.transform(raw[:200]))
+    
+    X_new = new_scaler.transform(raw[:200])
+    assert rescale_tree_thresholds(model, old_scaler.mean_, old_scaler.scale_,
+                                   new_scaler.mean_, new_scaler.scale_, X_new)
+    np.testing.assert_array_equal(model.predict(X_new), expected)
+
+@pytest.fixture
+def appended_workspace(workspace):
+    """A full run on the first rows of the sample dataset, then the rest appended"""
+    path = workspace / config.data.raw_data_path
+    lines = path.read_text().splitlines(keepends=True)
+    header = next(i for i, line in enumerate(lines) if line.strip())
+    split = header + 1 + INITIAL_ROWS
+    path.write_text(''.join(lines[:split]))
+    
+    data_processing.main()
+    model_training.main()
+    
+    with open(path, 'a') as f:
+        f.writelines(lines[split:])
+    return workspace
+
+def unscaled(name, scaler):
+    X = np.array(get_split_storage().load_frame(name))
+    return X * scaler.scale_ + scaler.mean_
+
+def test_incremental_processing_keeps_earlier_rows(appended_workspace):
+    old_scaler = joblib.load('models/scaler.pkl')
+    old_encoders = joblib.load('models/label_encoders.pkl')
+    old_mappings = CompiledEncoder.load('models/compiled_encoders.pkl').mappings
+    old_train = unscaled('X_train_processed', old_scaler)
+    
+    summary = incremental_processing.main()
+    assert summary['raw_rows'] == len(pd.read_csv(config.data.raw_data_path)) - INITIAL_ROWS
+    
+    # Earlier rows are rescaled, not re-encoded or dropped
+    new_scaler = joblib.load('models/scaler.pkl')
+    new_train = unscaled('X_train_processed', new_scaler)
+    assert len(new_train) == len(old_train) + summary['train_rows']
+    np.testing.assert_allclose(new_train[:len(old_train)], old_train, rtol=1e-9, atol=1e-6)
+    
+    # Existing categories keep their codes; new ones get the next free codes
+    mappings = CompiledEncoder.load('models/compiled_encoders.pkl').mappings
+    for col, mapping in mappings.items():
+        assert {category: mapping[category] for category in old_mappings[col]} == old_mappings[col]
+        new_codes = sorted(code for category, code in mapping.items() if category not in old_mappings[col])
+        assert new_codes == list(range(len(old_mappings[col]), len(mapping)))
+        assert len(new_codes) == summary['new_categories'].get(col, 0)
+    assert sum(summary['new_categories'].values()) > 0
+    
+    # The LabelEncoders stay as fitted, with sorted classes
+    for col, encoder in joblib.load('models/label_encoders.pkl').items():
+        assert list(encoder.classes_) == list(old_encoders[col].classes_)
+    
+    state, _ = load_processing_state()
+    assert state['pending']['train_start'] == len(old_train)
+
+def test_incremental_training_grows_saved_ensembles(appended_workspace, monkeypatch):
+    old_forest = joblib.load('models/random_forest_model.pkl')
+    storage = get_split_storage()
+    # Copy: the stored splits are memory maps of files that processing rewrites
+    old_rows = np.array(storage.load_frame('X_train_processed'))
+    
+    incremental_processing.main()
+    monkeypatch.setattr(config.model, 'training_mode', 'incremental')
+    model_training.main()
+    
+    forest = joblib.load('models/random_forest_model.pkl')
+    assert len(forest.estimators_) > len(old_forest.estimators_)
+    assert not forest.warm_start
+    
+    # The original trees give their original outputs on the rescaled training rows
+    rows = np.array(storage.load_frame('X_train_processed'))[:len(old_rows)]
+    for old_tree, tree in zip(old_forest.estimators_, forest.estimators_):
+        np.testing.assert_array_equal(tree.predict(rows), old_tree.predict(old_rows))
+    
+    state, _ = load_processing_state()
+    assert state['pending'] is None
+    history = pd.read_csv('models/training_history.csv')
+    assert history.set_index('model_name').loc['random_forest', 'incremental']
+
+def test_models_failing_the_leaf_check_are_refitted(appended_workspace, monkeypatch):
+    incremental_processing.main()
+    monkeypatch.setattr(model_training, 'rescale_tree_thresholds', lambda *args: False)
+    monkeypatch.setattr(config.model, 'training_mode', 'incremental')
+    model_training.main()
+    
+    history = pd.read_csv('models/training_history.csv').set_index('model_name')
+    assert not history.loc['random_forest', 'incremental']
@@ -0,0 +1,83 @@
+import threading
+import pandas as pd
+from instrumentation import CONTENT_TYPE, NULL_SPAN, Instrumentation, MetricFamily
+from config import config
+
+def samples(text):
+    """{sample name with labels: value} of an exposition, skipping comments"""
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in text.splitlines() if line and not line.startswith('#')}
+
+def test_histograms_render_cumulative_buckets():
+    family = MetricFamily('latency_seconds', 'Latency.', 'histogram', ('stage',), (0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        family.observe(('encode',), value)
+    
+    lines = family.render()
+    assert lines[:2] == ['# HELP latency_seconds Latency.', '# TYPE latency_seconds histogram']
+    assert samples('\n'.join(lines)) == {
+        'latency_seconds_bucket{stage="encode",le="0.1"}': 1,
+        'latency_seconds_bucket{stage="encode",le="1.0"}': 3,
+        'latency_seconds_bucket{stage="encode",le="+Inf"}': 4,
+        'latency_seconds_sum{stage="encode"}': 6.05,
+        'latency_seconds_count{stage="encode"}': 4
+    }
+
+def test_counts_from_many_threads_add_up():
+    family = MetricFamily('requests_total', 'Requests.', 'counter', ('endpoint',))
+    
+    def work():
+        for _ in range(1000):
+            family.inc(('/predict',))
+    
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert family.collect() == {('/predict',): [8000]}
+    # Shards of finished threads are folded into one
+    assert family._shards == [] and family._retired == {('/predict',): [8000]}
+
+def test_disabled_instrumentation_records_nothing():
+    metrics = Instrumentation(enabled=False)
+    assert metrics.span('encode') is NULL_SPAN
+    metrics.record_request('/predict', 500, 0.1)
+    metrics.record_batch('/predict-batch', [{'error': 'bad'}])
+    assert samples(metrics.render()) == {}
+
+def test_request_errors_and_batches_are_counted():
+    metrics = Instrumentation(enabled=True)
+    metrics.record_request('/predict', 200, 0.01)
+    metrics.record_request('/predict', 400, 0.01)
+    metrics.record_request('/predict', 500, 0.01)
+    metrics.record_batch('/predict-batch', [{}, {'error': 'bad'}, {'error': 'bad'}])
+    
+    exposed = samples(metrics.render())
+    assert exposed['salary_api_requests_total{endpoint="/predict",status="400"}'] == 1
+    assert exposed['salary_api_errors_total{endpoint="/predict",kind="client"}'] == 1
+    assert exposed['salary_api_errors_total{endpoint="/predict",kind="server"}'] == 1
+    assert exposed['salary_api_errors_total{endpoint="/predict-batch",kind="record"}'] == 2
+    assert exposed['salary_api_batch_size_sum{source="/predict-batch"}'] == 3
+
+def test_flask_metrics_endpoint(trained_workspace, monkeypatch):
+    import prediction_api
+    metrics = Instrumentation(enabled=True)
+    monkeypatch.setattr(prediction_api, 'instrumentation', metrics)
+    assert prediction_api.predictor.load_model(config.api.default_model)
+    record = pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column).iloc[0]
+    
+    client = prediction_api.app.test_client()
+    assert client.post('/predict', data=record.to_json(), content_type='application/json').status_code == 200
+    assert client.get('/no-such-page').status_code == 404
+    
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.content_type == CONTENT_TYPE
+    exposed = samples(response.get_data(as_text=True))
+    assert exposed['salary_api_requests_total{endpoint="/predict",status="200"}'] == 1
+    assert exposed['salary_api_requests_total{endpoint="unmatched",status="404"}'] == 1
+    assert exposed['salary_api_stage_seconds_count{stage="encode"}'] >= 1
+    
+    metrics.enabled = False
+    assert client.get('/metrics').status_code == 404
@@ -0,0 +1,91 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from linear_engine import GramLinearEngine, GramStatistics, fit_linear_models, gram_solvable
+from model_training import ModelTrainer, load_processed_data
+from config import config
+
+@pytest.fixture(scope='module')
+def regression_data():
+    # Features far from zero and of mixed scale, as in the unscaled salary data
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 6)) * [1, 10, 100, 0.1, 5, 1] + [1e4, 50, 0, 3, -200, 7]
+    y = X @ [2.0, -0.5, 0.01, 30.0, 0.2, 0.0] + rng.normal(scale=5, size=500)
+    return X, y
+
+def test_chunked_statistics_match_one_pass(regression_data):
+    X, y = regression_data
+    whole = GramStatistics.from_arrays(X, y, chunk_size=len(X))
+    chunked = GramStatistics.from_arrays(X, y, chunk_size=37)
+    
+    centered = X - X.mean(axis=0)
+    np.testing.assert_allclose(chunked.xx, centered.T @ centered, rtol=1e-10)
+    for name in ('x_mean', 'y_mean', 'xx', 'xy', 'yy'):
+        np.testing.assert_allclose(getattr(chunked, name), getattr(whole, name), rtol=1e-10)
+
+def test_merged_workers_match_one_pass(regression_data):
+    X, y = regression_data
+    merged = GramStatistics.from_arrays(X[:123], y[:123]).merge(GramStatistics.from_arrays(X[123:], y[123:]))
+    whole = GramStatistics.from_arrays(X, y)
+    assert merged.n == whole.n
+    np.testing.assert_allclose(merged.xx, whole.xx, rtol=1e-10)
+    np.testing.assert_allclose(merged.xy, whole.xy, rtol=1e-10)
+
+@pytest.mark.parametrize('template', [
+    LinearRegression(),
+    LinearRegression(fit_intercept=False),
+    Ridge(alpha=3.0),
+    Ridge(alpha=0.5, fit_intercept=False),
+    Lasso(alpha=0.5, tol=1e-8, max_iter=100000)
+], ids=repr)
+def test_coefficients_match_sklearn(template, regression_data):
+    X, y = regression_data
+    assert gram_solvable(template)
+    results = fit_linear_models({'model': template}, X, y, chunk_size=64, select_alpha=False)
+    model = results['model'][0]
+    expected = template.fit(X, y)
+    
+    np.testing.assert_allclose(model.coef_, expected.coef_, rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(model.intercept_, expected.intercept_, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(model.predict(X), expected.predict(X), rtol=1e-7)
+
+def test_ridge_path_matches_separate_fits(regression_data):
+    X, y = regression_data
+    engine = GramLinearEngine(GramStatistics.from_arrays(X, y))
+    alphas = [0.01, 1.0, 100.0]
+    for alpha, coef in zip(alphas, engine.ridge_path(alphas)):
+        np.testing.assert_allclose(coef, Ridge(alpha=alpha).fit(X, y).coef_, rtol=1e-6, atol=1e-10)
+
+def test_warm_started_lasso_path_matches_cold_fits(regression_data):
+    X, y = regression_data
+    engine = GramLinearEngine(GramStatistics.from_arrays(X, y))
+    alphas = np.array([0.1, 10.0, 1.0])
+    coefs, _, _ = engine.lasso_path(alphas, tol=1e-10, max_iter=100000)
+    for alpha, coef in zip(alphas, coefs):
+        cold, _, _ = engine.lasso(alpha, tol=1e-10, max_iter=100000)
+        np.testing.assert_allclose(coef, cold, rtol=1e-6, atol=1e-8)
+
+def test_unsupported_estimators_are_left_to_sklearn(regression_data):
+    X, y = regression_data
+    models = {'positive': LinearRegression(positive=True), 'ridge': Ridge()}
+    assert set(fit_linear_models(models, X, y, select_alpha=False)) == {'ridge'}
+
+def test_sklearn_stays_the_default_engine():
+    assert config.model.linear_engine == 'sklearn'
+
+def test_opt_in_engine_trains_like_sklearn(trained_workspace, monkeypatch):
+    X_train, X_test, y_train, y_test = load_processed_data()
+    expected = pd.read_csv('models/training_history.csv').set_index('model_name')
+    
+    monkeypatch.setattr(config.model, 'linear_engine', 'gram')
+    trainer = ModelTrainer()
+    trainer.initialize_models()
+    results = trainer.train_linear_models(X_train, y_train, X_test, y_test)
+    
+    assert sorted(results) == ['lasso_regression', 'linear_regression', 'ridge_regression']
+    for model_name, result in results.items():
+        np.testing.assert_allclose(result['metrics']['test_r2'], expected.loc[model_name, 'test_r2'], rtol=1e-6)
+    # Only attributes the sklearn estimators define are set
+    assert not hasattr(results['ridge_regression']['model'], 'solver_')
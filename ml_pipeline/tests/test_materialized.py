@@ -0,0 +1,116 @@
+
+import json
+import os
+import sys
+import pandas as pd
+import pytest
+import materialized
+import model_training
+from artifacts import bundle_path, current_version, extend_bundle, file_digest, read_manifest
+from materialized import MaterializedPredictor
+from prediction_api import SalaryPredictor
+from config import config
+
+MODEL = 'ridge_regression'
+
+def build_table(monkeypatch):
+    """Run materialized.py for the linear model, whose interpolation is exact on a two-point grid"""
+    max_experience = pd.read_csv(config.data.raw_data_path)['experience_years'].max()
+    monkeypatch.setattr(sys, 'argv', ['materialized.py', '--model', MODEL,
+                                      '--experience-step', str(max_experience),
+                                      '--remote-step', '100', '--samples', '100'])
+    materialized.main()
+
+@pytest.fixture
+def table_bundle(trained_workspace, monkeypatch):
+    source = current_version()
+    build_table(monkeypatch)
+    return source, current_version()
+
+def test_table_is_published_next_to_its_model(table_bundle):
+    source, version = table_bundle
+    assert version != source
+    
+    files = set(read_manifest(version)['files'])
+    assert files == set(read_manifest(source)['files']) | {f'{MODEL}_lookup.npy', f'{MODEL}_lookup.json'}
+    assert not os.path.exists(os.path.join(config.api.model_dir, f'{MODEL}_lookup.npy'))
+    
+    with open(os.path.join(bundle_path(version), f'{MODEL}_lookup.json')) as f:
+        metadata = json.load(f)
+    assert metadata['model_name'] == MODEL
+    assert metadata['bundle_version'] == source
+    assert metadata['model_digest'] == file_digest(os.path.join(bundle_path(source), f'{MODEL}_model.pkl'))
+
+def test_lookups_match_the_live_model(table_bundle):
+    records = pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column).to_dict('records')
+    lean = SalaryPredictor(inference_mode='lean')
+    table = SalaryPredictor(inference_mode='materialized')
+    assert lean.load_model(MODEL) and table.load_model(MODEL)
+    
+    expected = [result['predicted_salary'] for result in lean.predict_batch(records)]
+    looked_up = [result['predicted_salary'] for result in table.predict_batch(records)]
+    # The table is stored as float32
+    assert looked_up == pytest.approx(expected, rel=1e-5)
+
+def test_encoder_is_read_from_the_table_directory(table_bundle, monkeypatch, tmp_path):
+    _, version = table_bundle
+    path_prefix = os.path.abspath(os.path.join(bundle_path(version), f'{MODEL}_lookup'))
+    # No models/ directory relative to the new working directory
+    monkeypatch.chdir(tmp_path)
+    table = MaterializedPredictor.load(path_prefix)
+    assert 'company_size' in table.encoder.mappings
+
+def test_retrained_bundles_need_a_new_table(table_bundle):
+    model_training.main()
+    predictor = SalaryPredictor(inference_mode='materialized')
+    assert not predictor.load_model(MODEL)
+
+def test_tables_from_another_model_are_rejected(table_bundle, monkeypatch):
+    _, version = table_bundle
+    table_files = [os.path.join(bundle_path(version), f'{MODEL}_lookup.{ext}') for ext in ('npy', 'json')]
+    
+    params = dict(config.model.linear_models_params, ridge_alpha=123.0)
+    monkeypatch.setattr(config.model, 'linear_models_params', params)
+    model_training.main()
+    extend_bundle(current_version(), table_files)
+    
+    predictor = SalaryPredictor(inference_mode='materialized')
+    assert not predictor.load_model(MODEL)
+    assert SalaryPredictor(inference_mode='lean').load_model(MODEL)
+
+def test_unknown_categories_use_the_configured_code(table_bundle, monkeypatch):
+    # A saved encoder whose own fallback code differs from the configured one
+    load_encoder = materialized.CompiledEncoder.load
+    def load_with_other_code(path):
+        encoder = load_encoder(path)
+        encoder.unknown_value = 2
+        return encoder
+    monkeypatch.setattr(materialized.CompiledEncoder, 'load', load_with_other_code)
+    
+    record = dict(pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column).iloc[0],
+                  company_size='Enormous')
+    lean = SalaryPredictor(inference_mode='lean')
+    table = SalaryPredictor(inference_mode='materialized')
+    assert lean.load_model(MODEL) and table.load_model(MODEL)
+    
+    assert table.encoder.unknown_value == config.api.unknown_category_code
+    expected = lean.predict_batch([record])[0]['predicted_salary']
+    assert table.predict_batch([record])[0]['predicted_salary'] == pytest.approx(expected, rel=1e-5)
+
+def test_unknown_code_outside_the_grid_is_rejected(table_bundle, monkeypatch):
+    monkeypatch.setattr(config.api, 'unknown_category_code', 10**6)
+    assert not SalaryPredictor(inference_mode='materialized').load_model(MODEL)
+
+def test_records_outside_the_grid_are_errors(table_bundle):
+    records = pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column).head(3)
+    records = records.to_dict('records')
+    records[1]['experience_years'] = 1000
+    table = SalaryPredictor(inference_mode='materialized')
+    assert table.load_model(MODEL)
+    
+    results = table.predict_batch(records)
+    assert 'predicted_salary' in results[0] and 'predicted_salary' in results[2]
+    assert 'outside the lookup table range' in results[1]['error']
+    
+    result, error = table.predict_salary(records[1])
+    assert result is None and 'experience_years' in error
@@ -0,0 +1,39 @@
+
+import joblib
+import numpy as np
+import pytest
+import model_evaluation
+from model_evaluation import ModelEvaluator
+from split_storage import get_split_storage
+
+def test_parallel_evaluation_matches_each_model(trained_workspace):
+    results = ModelEvaluator().evaluate_all_models(n_jobs=4, plots=False)
+    
+    storage = get_split_storage()
+    X_test = np.array(storage.load_array('X_test_processed'))
+    y_test = np.array(storage.load_array('y_test')).ravel()
+    assert set(results) >= {'random_forest', 'ridge_regression', 'support_vector'}
+    for model_name, result in results.items():
+        model = joblib.load(f'models/{model_name}_model.pkl')
+        expected = ModelEvaluator().evaluate_model(model, X_test, y_test)
+        assert result['metrics']['r2_score'] == pytest.approx(expected['r2_score'])
+        np.testing.assert_allclose(result['metrics']['predictions'], expected['predictions'])
+        assert (trained_workspace / 'models' / f'{model_name}_evaluation_report.md').exists()
+
+def test_test_data_is_loaded_once(trained_workspace, monkeypatch):
+    loads = []
+    original = model_evaluation.get_split_storage
+    def counting_storage(*args, **kwargs):
+        loads.append(1)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(model_evaluation, 'get_split_storage', counting_storage)
+    
+    evaluator = ModelEvaluator()
+    evaluator.evaluate_all_models(plots=False)
+    evaluator.load_model_and_data('random_forest')
+    assert len(loads) == 1
+
+def test_broken_models_are_reported_and_skipped(trained_workspace):
+    (trained_workspace / 'models' / 'broken_model.pkl').write_bytes(b'not a pickle')
+    results = ModelEvaluator().evaluate_all_models(plots=False)
+    assert 'broken' not in results and 'random_forest' in results
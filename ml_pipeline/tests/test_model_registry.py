@@ -0,0 +1,67 @@
+
+import os
+import shutil
+import threading
+import pandas as pd
+import pytest
+from artifacts import bundle_path, current_version
+from model_registry import ModelRegistry
+from shared_models import SharedTree
+
+@pytest.fixture
+def bundle_dir(trained_workspace):
+    return bundle_path(current_version())
+
+def test_every_trained_model_is_served(bundle_dir):
+    history = pd.read_csv(os.path.join(bundle_dir, 'training_history.csv'))
+    registry = ModelRegistry(bundle_dir)
+    assert registry.available() == sorted(history['model_name'])
+    assert set(registry.scores) == set(history['model_name'])
+
+def test_models_outside_the_training_history_are_not_served(bundle_dir, tmp_path):
+    artifact_dir = str(tmp_path / 'bundle')
+    shutil.copytree(bundle_dir, artifact_dir)
+    shutil.copy(os.path.join(artifact_dir, 'ridge_regression_model.pkl'),
+                os.path.join(artifact_dir, 'stale_model.pkl'))
+    
+    registry = ModelRegistry(artifact_dir)
+    assert 'stale' not in registry.available()
+    with pytest.raises(KeyError):
+        registry.get('missing')
+
+def test_models_load_once_on_first_use(bundle_dir):
+    registry = ModelRegistry(bundle_dir, shared_loading=False, compiled=False)
+    assert registry.loads == 0
+    
+    entries = []
+    threads = [threading.Thread(target=lambda: entries.append(registry.get('random_forest')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert registry.loads == 1
+    assert all(entry is entries[0] for entry in entries)
+    assert entries[0].uncertainty is not None
+
+def test_idle_models_are_evicted_over_budget(bundle_dir):
+    registry = ModelRegistry(bundle_dir, memory_budget_mb=1e-6, shared_loading=False, compiled=False)
+    registry.get('ridge_regression', pin=True)
+    registry.get('lasso_regression')
+    registry.get('linear_regression')
+    
+    stats = registry.stats()
+    assert stats['loaded'] == ['ridge_regression']
+    assert stats['pinned'] == ['ridge_regression']
+    assert stats['evictions'] == 2
+    
+    # An evicted model is loaded again on its next use
+    registry.get('lasso_regression')
+    assert registry.loads == 4
+
+def test_shared_copies_are_preferred(bundle_dir):
+    registry = ModelRegistry(bundle_dir, shared_loading=True, compiled=False)
+    entry = registry.get('random_forest')
+    assert entry.shared
+    assert isinstance(entry.model.estimators_[0].tree_, SharedTree)
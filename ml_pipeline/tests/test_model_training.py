@@ -0,0 +1,33 @@
+
+import numpy as np
+import pytest
+from model_training import ModelTrainer, load_processed_data
+
+def train(n_jobs, backend):
+    X_train, X_test, y_train, y_test = (np.array(split) for split in load_processed_data())
+    trainer = ModelTrainer(n_jobs=n_jobs, backend=backend)
+    results = trainer.train_all_models(X_train, y_train, X_test, y_test)
+    return trainer, results, X_test
+
+@pytest.mark.parametrize('backend', ['threading', 'loky'])
+def test_parallel_training_matches_sequential(trained_workspace, backend):
+    sequential, sequential_results, X_test = train(1, backend)
+    parallel, parallel_results, _ = train(2, backend)
+    
+    assert [m['model_name'] for m in parallel.training_history] == \
+        [m['model_name'] for m in sequential.training_history]
+    assert parallel.best_model == sequential.best_model
+    for model_name, result in sequential_results.items():
+        np.testing.assert_allclose(parallel_results[model_name]['model'].predict(X_test),
+                                   result['model'].predict(X_test))
+        assert parallel_results[model_name]['metrics']['test_r2'] == pytest.approx(result['metrics']['test_r2'])
+
+def test_failed_models_are_skipped_in_parallel(trained_workspace, monkeypatch):
+    X_train, X_test, y_train, y_test = (np.array(split) for split in load_processed_data())
+    trainer = ModelTrainer(n_jobs=2, backend='threading')
+    trainer.initialize_models()
+    trainer.models['support_vector'].set_params(C=-1.0)
+    
+    results = trainer.train_models_parallel(X_train, y_train, X_test, y_test)
+    assert 'support_vector' not in results
+    assert set(results) == set(trainer.models) - {'support_vector'}
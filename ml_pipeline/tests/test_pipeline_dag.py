@@ -0,0 +1,116 @@
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from artifacts import bundle_path, current_version
+import pipeline_dag
+from data_processing import DataProcessor
+from pipeline_dag import (PipelineDAG, StageCache, clean_stage, code_fingerprint, code_sources, fit_stage,
+                          run_pipeline)
+from test_imports import loaded_heavy_modules
+from config import config
+
+def statuses(dag):
+    return {row['stage']: row['status'] for row in dag.report()}
+
+def test_matches_separate_processing_and_training(trained_dir, workspace):
+    run_pipeline(cache=StageCache('cache', max_mb=0))
+    
+    expected = pd.read_csv(trained_dir / 'models' / 'training_history.csv').set_index('model_name')
+    history = pd.read_csv('models/training_history.csv').set_index('model_name')
+    assert sorted(history.index) == sorted(expected.index)
+    np.testing.assert_allclose(history.loc[expected.index, 'test_r2'], expected['test_r2'], rtol=1e-6)
+    
+    served = sorted(name for name in os.listdir(bundle_path(current_version())) if name.endswith('_model.pkl'))
+    assert served == sorted(f'{name}_model.pkl' for name in expected.index)
+
+def test_second_run_is_served_from_the_cache(workspace):
+    cache = StageCache('cache', max_mb=0)
+    run_pipeline(cache=cache)
+    dag, _ = run_pipeline(cache=StageCache('cache', max_mb=0))
+    
+    # Only the stages whose results are needed are read back from disk
+    assert set(statuses(dag).values()) <= {'cached', 'not needed'}
+    assert all(status == 'cached' for stage, status in statuses(dag).items() if stage.startswith('fit:'))
+    assert pd.read_csv('models/training_history.csv')['cached'].all()
+
+def test_changed_parameters_only_refit_that_model(workspace, monkeypatch):
+    run_pipeline(cache=StageCache('cache', max_mb=0))
+    params = dict(config.model.random_forest_params, n_estimators=7)
+    monkeypatch.setattr(config.model, 'random_forest_params', params)
+    dag, trainer = run_pipeline(cache=StageCache('cache', max_mb=0))
+    
+    computed = {stage for stage, status in statuses(dag).items() if status == 'computed'}
+    assert computed == {'fit:random_forest'}
+    assert len(trainer.models['random_forest'].estimators_) == 7
+
+def test_changed_input_recomputes_downstream_stages(workspace):
+    run_pipeline(cache=StageCache('cache', max_mb=0))
+    with open(config.data.raw_data_path, 'a') as f:
+        f.write('Acme,Data Scientist,Pune,4,Master,50,Medium,Full-time,2024,1500000\n')
+    dag, _ = run_pipeline(cache=StageCache('cache', max_mb=0))
+    
+    assert all(status == 'computed' for status in statuses(dag).values())
+
+def test_stage_results_are_loaded_lazily(tmp_path):
+    calls = []
+    
+    def stage(*inputs, value):
+        calls.append(value)
+        return sum(inputs) + value
+    
+    def build():
+        dag = PipelineDAG(StageCache(str(tmp_path), max_mb=0))
+        dag.add('a', stage, params={'value': 1})
+        dag.add('b', stage, ['a'], params={'value': 2})
+        return dag
+    
+    assert build().run(['b']) == {'b': 3}
+    dag = build()
+    assert dag.run(['b']) == {'b': 3}
+    assert calls == [1, 2]
+    assert statuses(dag) == {'a': 'not needed', 'b': 'cached'}
+
+def test_cache_evicts_least_recently_used_results(tmp_path):
+    # Room for two of the three 64 KB results
+    cache = StageCache(str(tmp_path), max_mb=0.15)
+    for last_used, key in enumerate(('aa1', 'bb2', 'cc3'), start=1):
+        cache.put(key, np.zeros(8_000))
+        os.utime(cache.path(key), (last_used, last_used))
+    
+    assert cache.get('aa1') == (False, None)
+    assert cache.get('cc3')[0]
+    assert cache.stats()['evictions'] >= 1
+
+def test_duplicate_or_unknown_stages_are_rejected():
+    dag = PipelineDAG(StageCache(os.devnull, max_mb=0))
+    dag.add('a', lambda: 1)
+    with pytest.raises(ValueError):
+        dag.add('a', lambda: 2)
+    with pytest.raises(ValueError):
+        dag.add('b', lambda a: a, ['missing'])
+
+def test_stage_code_includes_the_pipeline_modules_it_calls():
+    sources = {os.path.basename(path) for path in code_sources((fit_stage,))}
+    assert {'model_training.py', 'linear_engine.py', 'config.py'} <= sources
+    
+    # Data stages do not depend on the training code
+    sources = {os.path.basename(path) for path in code_sources((clean_stage, DataProcessor.clean_data))}
+    assert 'data_processing.py' in sources and 'model_training.py' not in sources
+
+def test_editing_a_callee_changes_the_stage_fingerprint(tmp_path, monkeypatch):
+    (tmp_path / 'dag_helpers.py').write_text('def helper(x):\n    return x + 1\n')
+    (tmp_path / 'dag_stages.py').write_text(
+        'def stage(x):\n    from dag_helpers import helper\n    return helper(x)\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(pipeline_dag, 'PIPELINE_DIR', str(tmp_path))
+    from dag_stages import stage
+    
+    before = code_fingerprint((stage,))
+    assert code_fingerprint((stage,)) == before
+    (tmp_path / 'dag_helpers.py').write_text('def helper(x):\n    return x + 2\n')
+    assert code_fingerprint((stage,)) != before
+
+def test_importing_the_runner_is_lazy(tmp_path):
+    assert loaded_heavy_modules('pipeline_dag', tmp_path) == []
@@ -0,0 +1,118 @@
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import prediction_api
+from prediction_api import SalaryPredictor
+from split_storage import get_split_storage
+from config import config
+
+def sample_records(n_rows=30):
+    df = pd.read_csv(config.data.raw_data_path).drop(columns=config.data.target_column)
+    return df.head(n_rows).to_dict('records')
+
+@pytest.fixture
+def serve(trained_workspace, monkeypatch):
+    """Load a predictor in the given inference mode and serve it from the Flask app"""
+    # Without the cache every request is computed on its own path
+    monkeypatch.setattr(config.api, 'prediction_cache_size', 0)
+    
+    def start(inference_mode, model_name=None):
+        predictor = SalaryPredictor(inference_mode=inference_mode)
+        assert predictor.load_model(model_name or config.api.default_model)
+        monkeypatch.setattr(prediction_api, 'predictor', predictor)
+        return predictor, prediction_api.app.test_client()
+    return start
+
+def post_single_and_batch(client, records, query=''):
+    singles = [client.post(f'/predict{query}', json=record).get_json() for record in records]
+    batch = client.post(f'/predict-batch{query}', json=records).get_json()['predictions']
+    return singles, batch
+
+@pytest.mark.parametrize('inference_mode', ['full', 'lean', 'compiled'])
+@pytest.mark.parametrize('model_name', ['random_forest', 'gradient_boosting', 'ridge_regression'])
+def test_single_and_batch_predictions_agree(serve, inference_mode, model_name):
+    _, client = serve(inference_mode, model_name)
+    singles, batch = post_single_and_batch(client, sample_records())
+    
+    for single, batched in zip(singles, batch):
+        assert single['model_used'] == batched['model_used'] == model_name
+        assert single['predicted_salary'] == pytest.approx(batched['predicted_salary'], rel=1e-12)
+        assert (single['confidence_interval'] is None) == (batched['confidence_interval'] is None)
+        if single['confidence_interval'] is not None:
+            assert single['confidence_interval'] == pytest.approx(batched['confidence_interval'], rel=1e-9)
+
+@pytest.mark.parametrize('inference_mode', ['lean', 'compiled'])
+def test_fast_paths_match_sklearn(serve, inference_mode):
+    predictor, client = serve(inference_mode, 'random_forest')
+    records = sample_records()
+    batch = client.post('/predict-batch', json=records).get_json()['predictions']
+    
+    # Reference: the saved preprocessors and model, used through sklearn
+    df = pd.DataFrame(records)
+    for col, encoder in joblib.load('models/label_encoders.pkl').items():
+        df[col] = encoder.transform(df[col])
+    X = joblib.load('models/scaler.pkl').transform(df[joblib.load('models/feature_columns.pkl')])
+    expected = joblib.load('models/random_forest_model.pkl').predict(X)
+    np.testing.assert_allclose([result['predicted_salary'] for result in batch], expected, rtol=1e-9)
+
+def test_ensembles_agree_between_endpoints(serve):
+    _, client = serve('lean')
+    records = sample_records(10)
+    # /predict takes a list of models in the body, /predict-batch as repeated query parameters
+    singles = [client.post('/predict', json=dict(record, model=['ridge_regression', 'random_forest'],
+                                                 combine='ensemble')).get_json()
+               for record in records]
+    batch = client.post('/predict-batch?model=ridge_regression&model=random_forest&combine=ensemble',
+                        json=records).get_json()['predictions']
+    for single, batched in zip(singles, batch):
+        assert single['model_used'] == batched['model_used'] == 'ensemble'
+        assert single['ensemble_members'] == pytest.approx(batched['ensemble_members'], rel=1e-12)
+
+def test_non_string_categories_encode_alike(serve):
+    predictor, client = serve('lean')
+    # A category whose label looks like a number, sent as a JSON number
+    mapping = predictor.bundle.encoder.mappings['company_size']
+    mapping['3'] = mapping['Small']
+    record = dict(sample_records(1)[0], company_size='Small')
+    
+    expected = client.post('/predict', json=record).get_json()['predicted_salary']
+    singles, batch = post_single_and_batch(client, [dict(record, company_size=3)])
+    assert singles[0]['predicted_salary'] == expected
+    assert batch[0]['predicted_salary'] == expected
+
+def test_batch_errors_keep_their_position(serve):
+    _, client = serve('lean')
+    records = sample_records(3)
+    del records[1]['education_level']
+    batch = client.post('/predict-batch', json=records).get_json()['predictions']
+    
+    assert 'predicted_salary' in batch[0] and 'predicted_salary' in batch[2]
+    assert batch[1] == {'error': 'Missing required field: education_level'}
+
+@pytest.mark.parametrize('model_name', ['linear_regression', 'ridge_regression', 'lasso_regression',
+                                        'random_forest', 'support_vector'])
+def test_lean_predictions_match_standard(serve, model_name):
+    records = sample_records()
+    _, client = serve('standard', model_name)
+    standard = [client.post('/predict', json=record).get_json() for record in records]
+    _, client = serve('lean', model_name)
+    lean = [client.post('/predict', json=record).get_json() for record in records]
+    
+    for expected, result in zip(standard, lean):
+        assert result['predicted_salary'] == pytest.approx(expected['predicted_salary'], rel=1e-9)
+
+def test_lean_path_falls_back_for_two_dimensional_coefficients(serve):
+    from sklearn.svm import SVR
+    
+    predictor, _ = serve('lean', 'ridge_regression')
+    storage = get_split_storage()
+    X = np.array(storage.load_array('X_train_processed'))
+    y = np.array(storage.load_array('y_train')).ravel()
+    model = SVR(kernel='linear').fit(X, y)
+    
+    assert model.coef_.ndim == 2
+    assert not prediction_api.is_linear_model(model)
+    assert prediction_api.is_linear_model(predictor.model)
+    np.testing.assert_allclose(predictor.predict_lean(X[:5], model=model), model.predict(X[:5]))
@@ -0,0 +1,59 @@
+import asyncio
+import json
+import os
+import pytest
+from profiling import profile_request_error
+from config import config
+
+@pytest.fixture
+def profiling_enabled(monkeypatch):
+    monkeypatch.setattr(config.api, 'profiling_enabled', True)
+    monkeypatch.setattr(config.api, 'profiling_token', 'secret')
+
+def test_profiling_is_off_by_default():
+    assert profile_request_error('1', 'secret') == ('Profiling is disabled', 404)
+
+def test_requests_need_the_configured_token(profiling_enabled, monkeypatch):
+    assert profile_request_error('1', None) == ('Invalid profiling token', 403)
+    assert profile_request_error('1', 'guess') == ('Invalid profiling token', 403)
+    assert profile_request_error('1', 'secret') is None
+    assert profile_request_error('abc', 'secret')[1] == 400
+    assert profile_request_error(str(config.api.profiling_max_seconds + 1), 'secret')[1] == 400
+    
+    # Enabled without a token refuses everyone rather than allowing anyone
+    monkeypatch.setattr(config.api, 'profiling_token', None)
+    assert profile_request_error('1', None) == ('Profiling token is not configured', 403)
+    assert profile_request_error('1', '') == ('Profiling token is not configured', 403)
+
+def test_enabling_profiling_without_a_token_is_invalid(workspace, monkeypatch, capsys):
+    assert config.validate_config()
+    monkeypatch.setattr(config.api, 'profiling_enabled', True)
+    assert not config.validate_config()
+    assert 'profiling_token' in capsys.readouterr().out
+    monkeypatch.setattr(config.api, 'profiling_token', 'secret')
+    assert config.validate_config()
+
+def test_flask_profile_endpoint(workspace, profiling_enabled):
+    import prediction_api
+    client = prediction_api.app.test_client()
+    assert client.get('/debug/profile?seconds=0.05').status_code == 403
+    
+    response = client.get('/debug/profile?seconds=0.05', headers={'X-Profile-Token': 'secret'})
+    assert response.status_code == 200
+    assert os.path.exists(response.headers['X-Profile-Path'])
+
+def test_asgi_profile_endpoint_refuses_without_token(workspace, profiling_enabled):
+    import async_api
+    sent = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {'type': 'http', 'method': 'GET', 'path': '/debug/profile', 'query_string': b'seconds=0.05',
+             'headers': [(b'x-profile-token', b'guess')]}
+    asyncio.run(async_api.app(scope, receive, send))
+    assert sent[0]['status'] == 403
+    assert json.loads(sent[1]['body']) == {'error': 'Invalid profiling token'}
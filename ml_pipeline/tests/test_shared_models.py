@@ -0,0 +1,56 @@
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression
+from sklearn.svm import SVR
+from shared_models import SharedTree, load_shared_model, predictions_identical, save_shared_model
+
+@pytest.fixture(scope='module')
+def regression_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 5))
+    y = X[:, 0] * 2 - X[:, 2] ** 2 + rng.normal(scale=0.1, size=300)
+    return X, y
+
+@pytest.mark.parametrize('model', [
+    RandomForestRegressor(n_estimators=10, random_state=0),
+    GradientBoostingRegressor(n_estimators=20, random_state=0),
+    HistGradientBoostingRegressor(max_iter=20, random_state=0),
+    LinearRegression(),
+    Lasso(alpha=0.01),
+    SVR()
+], ids=lambda model: type(model).__name__)
+def test_predictions_are_byte_identical(model, regression_data, tmp_path):
+    X, y = regression_data
+    model.fit(X, y)
+    path = save_shared_model(model, str(tmp_path / 'model.shared'))
+    shared = load_shared_model(path)
+    
+    # Small batches take the row-by-row traversal, larger ones the level-wise one
+    assert predictions_identical(model, shared, X[:3])
+    assert predictions_identical(model, shared, X)
+
+def test_forest_trees_map_the_file(regression_data, tmp_path):
+    X, y = regression_data
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    shared = load_shared_model(save_shared_model(model, str(tmp_path / 'forest.shared')))
+    
+    tree = shared.estimators_[0].tree_
+    assert isinstance(tree, SharedTree)
+    assert isinstance(tree.nodes.base, np.memmap)
+    np.testing.assert_allclose(shared.feature_importances_, model.feature_importances_)
+
+def test_missing_values_follow_sklearn(regression_data, tmp_path):
+    X, y = regression_data
+    X = X.copy()
+    X[::5, 1] = np.nan
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    shared = load_shared_model(save_shared_model(model, str(tmp_path / 'forest.shared')))
+    assert predictions_identical(model, shared, X)
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'model.pkl'
+    path.write_bytes(b'not a shared model file')
+    with pytest.raises(ValueError):
+        load_shared_model(str(path))
@@ -0,0 +1,52 @@
+
+import numpy as np
+import pytest
+from sketch import KLLSketch
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+@pytest.fixture(scope='module')
+def salaries():
+    return np.random.default_rng(1).lognormal(12, 1, 200_000)
+
+def rank_error(values, sketch):
+    """Largest distance between the true rank of each estimate and its quantile"""
+    ordered = np.sort(values)
+    return max(abs(np.searchsorted(ordered, sketch.quantile(q)) / len(values) - q) for q in QUANTILES)
+
+def test_exact_until_first_compaction():
+    values = np.random.default_rng(0).normal(size=500)
+    sketch = KLLSketch(k=1000)
+    sketch.update(values)
+    for q in QUANTILES:
+        assert sketch.quantile(q) == np.quantile(values, q)
+
+def test_rank_error_and_memory_stay_bounded(salaries):
+    sketch = KLLSketch(k=200, random_state=0)
+    for chunk in np.array_split(salaries, 50):
+        sketch.update(chunk)
+    
+    assert sketch.count == len(salaries)
+    assert rank_error(salaries, sketch) < 0.03
+    assert sum(len(items) for items in sketch.compactors) < 1000
+
+def test_merged_sketches_cover_both_streams(salaries):
+    half = len(salaries) // 2
+    left = KLLSketch(k=200, random_state=0)
+    right = KLLSketch(k=200, random_state=1)
+    left.update(salaries[:half])
+    right.update(salaries[half:])
+    
+    merged = left.merge(right)
+    assert merged.count == len(salaries)
+    assert rank_error(salaries, merged) < 0.03
+
+def test_missing_values_are_ignored():
+    sketch = KLLSketch()
+    sketch.update([1.0, np.nan, 3.0])
+    assert sketch.count == 2
+    assert sketch.quantile(0.5) == 2.0
+
+def test_empty_sketch_has_no_quantiles():
+    with pytest.raises(ValueError):
+        KLLSketch().quantile(0.5)
@@ -0,0 +1,67 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from split_storage import get_split_storage
+from config import config
+
+def sample_frame(n_rows=50):
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({
+        'experience_years': rng.uniform(0, 30, n_rows),
+        'company_size': rng.randint(0, 3, n_rows),
+        'remote_ratio': rng.choice([0.0, 50.0, 100.0], n_rows)
+    })
+
+@pytest.fixture(params=['csv', 'npy', 'parquet'])
+def storage(request, tmp_path):
+    if request.param == 'parquet':
+        pytest.importorskip('pyarrow')
+    return get_split_storage(request.param, str(tmp_path))
+
+def test_frames_round_trip(storage):
+    frame = sample_frame()
+    storage.save('X_train_processed', frame)
+    
+    assert storage.exists('X_train_processed')
+    pd.testing.assert_frame_equal(storage.load_frame('X_train_processed'), frame)
+    np.testing.assert_allclose(storage.load_array('X_train_processed'), frame.to_numpy())
+
+def test_targets_load_as_one_column(storage):
+    target = pd.Series(np.arange(10, dtype=np.float64), name='salary')
+    storage.save('y_train', target)
+    np.testing.assert_array_equal(np.ravel(storage.load_array('y_train')), target.to_numpy())
+
+def test_chunked_writes_match_a_single_save(storage):
+    frame = sample_frame(95)
+    writer = storage.open_writer('X_train_processed', len(frame))
+    for start in range(0, len(frame), 20):
+        writer.write(frame.iloc[start:start + 20])
+    writer.close()
+    
+    pd.testing.assert_frame_equal(storage.load_frame('X_train_processed'), frame)
+
+def test_npy_rejects_short_writes(tmp_path):
+    storage = get_split_storage('npy', str(tmp_path))
+    writer = storage.open_writer('X_train_processed', 10)
+    writer.write(sample_frame(5))
+    with pytest.raises(ValueError):
+        writer.close()
+
+def test_npy_rejects_text_columns(tmp_path):
+    with pytest.raises(ValueError):
+        get_split_storage('npy', str(tmp_path)).save('X', pd.DataFrame({'a': ['x', 'y']}))
+
+def test_csv_is_the_default_format(tmp_path):
+    assert get_split_storage(data_dir=str(tmp_path)).extension == '.csv'
+
+def test_unknown_formats_are_rejected(workspace, monkeypatch):
+    with pytest.raises(ValueError):
+        get_split_storage('feather')
+    
+    assert config.validate_config()
+    monkeypatch.setattr(config.data, 'split_format', 'feather')
+    assert not config.validate_config()
+    monkeypatch.setattr(config.data, 'split_format', 'csv')
+    monkeypatch.setattr(config.data, 'processing_mode', 'eventually')
+    assert not config.validate_config()
@@ -0,0 +1,113 @@
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import data_processing
+import incremental_processing
+import streaming_processing
+from data_processing import load_processing_state, row_digests
+from split_storage import get_split_storage
+from streaming_processing import DigestStore, StreamingDataProcessor
+from config import config
+
+SPLITS = ['X_train_processed', 'X_test_processed', 'y_train', 'y_test']
+
+def load_splits():
+    storage = get_split_storage()
+    # Copy: the splits may be memory maps of files the next run overwrites
+    splits = {name: np.array(storage.load_array(name), dtype=np.float64) for name in SPLITS}
+    
+    # Undo the scaling, which depends on the rows chosen for training
+    scaler = joblib.load('models/scaler.pkl')
+    for name in ('X_train_processed', 'X_test_processed'):
+        splits[name] = scaler.inverse_transform(splits[name])
+    return splits
+
+def sorted_rows(array):
+    # Rounded so that inverse-scaling noise cannot change the order
+    array = np.round(array.reshape(len(array), -1), 6)
+    return array[np.lexsort(array.T[::-1])]
+
+@pytest.fixture
+def batch_result(workspace):
+    data_processing.main()
+    return load_splits(), joblib.load('models/label_encoders.pkl')
+
+@pytest.mark.parametrize('chunk_size', [17, 1000])
+def test_streaming_keeps_the_batch_rows(batch_result, chunk_size):
+    batch_splits, batch_encoders = batch_result
+    streaming_processing.main(chunk_size=chunk_size)
+    streamed_splits = load_splits()
+    
+    # Same split sizes and the same clean rows overall; only the test rows chosen differ
+    for name in SPLITS:
+        assert len(streamed_splits[name]) == len(batch_splits[name])
+    for prefix in ('X_{}_processed', 'y_{}'):
+        streamed = np.concatenate([streamed_splits[prefix.format(split)] for split in ('train', 'test')])
+        batch = np.concatenate([batch_splits[prefix.format(split)] for split in ('train', 'test')])
+        np.testing.assert_allclose(sorted_rows(streamed), sorted_rows(batch), atol=1e-6)
+    
+    streamed_encoders = joblib.load('models/label_encoders.pkl')
+    assert streamed_encoders.keys() == batch_encoders.keys()
+    for col, encoder in batch_encoders.items():
+        assert list(streamed_encoders[col].classes_) == list(encoder.classes_)
+
+def test_split_does_not_depend_on_chunk_size(workspace):
+    streaming_processing.main(chunk_size=17)
+    small_chunks = load_splits()
+    streaming_processing.main(chunk_size=1000)
+    large_chunks = load_splits()
+    for name in SPLITS:
+        np.testing.assert_allclose(small_chunks[name], large_chunks[name], atol=1e-6)
+
+def test_scaler_is_fitted_on_the_streamed_training_rows(workspace):
+    streaming_processing.main(chunk_size=17)
+    X_train = load_splits()['X_train_processed']
+    np.testing.assert_allclose(joblib.load('models/scaler.pkl').mean_, X_train.mean(axis=0))
+
+@pytest.mark.parametrize('block_rows', [7, 1 << 16])
+def test_split_sizes_follow_train_test_split(monkeypatch, block_rows):
+    monkeypatch.setattr(streaming_processing, 'SPLIT_BLOCK_ROWS', block_rows)
+    processor = StreamingDataProcessor(test_size=0.2, random_state=42)
+    processor.choose_test_rows(105)
+    assert processor.split_counts == {'train': 84, 'test': 21}
+    
+    blocks = list(processor.iter_test_positions())
+    positions = np.concatenate([positions for _, positions in blocks])
+    assert blocks[-1][0] == 105
+    assert len(np.unique(positions)) == 21 and positions.min() >= 0 and positions.max() < 105
+
+def test_digest_store_merges_batches(tmp_path):
+    rng = np.random.default_rng(0)
+    store = DigestStore(str(tmp_path), block_size=5)
+    expected = {}
+    for batch in range(6):
+        digests = np.unique(rng.integers(0, 2**63, 20, dtype=np.uint64))
+        digests = digests[[digest not in expected for digest in digests.tolist()]]
+        positions = np.arange(len(digests)) + 100 * batch
+        store.add(digests, positions)
+        expected.update(zip(digests.tolist(), positions.tolist()))
+    
+    assert len(store) == len(expected)
+    assert np.all(np.diff(store.digests.astype(np.float64)) >= 0)
+    queried = np.array(list(expected) + [12345], dtype=np.uint64)
+    assert store.lookup(queried).tolist() == list(expected.values()) + [-1]
+    # Only the latest merge is kept on disk
+    assert len(list(tmp_path.iterdir())) == 2
+
+def test_saved_digests_match_batch_reads(workspace):
+    streaming_processing.main(chunk_size=17)
+    _, digests = load_processing_state()
+    raw = pd.read_csv(config.data.raw_data_path)
+    assert set(digests.tolist()) == set(row_digests(raw).tolist())
+
+def test_incremental_run_after_streaming_skips_known_rows(workspace):
+    streaming_processing.main(chunk_size=17)
+    lines = open(config.data.raw_data_path).read().strip().splitlines()
+    with open(config.data.raw_data_path, 'a') as f:
+        f.write(lines[-1] + '\n')
+    
+    summary = incremental_processing.main()
+    assert summary['raw_rows'] == 1
+    assert summary['train_rows'] == summary['test_rows'] == 0
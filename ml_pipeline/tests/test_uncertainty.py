@@ -0,0 +1,43 @@
+
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+from uncertainty import TreeUncertainty
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(300, 5))
+    y = X[:, 0] * 3 + rng.normal(size=300)
+    return X, y
+
+@pytest.mark.parametrize('estimator', [RandomForestRegressor, ExtraTreesRegressor])
+def test_per_tree_predictions_match_each_tree(data, estimator):
+    X, y = data
+    model = estimator(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    expected = np.column_stack([tree.predict(X) for tree in model.estimators_])
+    np.testing.assert_allclose(TreeUncertainty(model).per_tree_predictions(X), expected)
+
+def test_normal_intervals_use_the_tree_spread(data):
+    X, y = data
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+    predictions = model.predict(X)
+    spread = np.std([tree.predict(X) for tree in model.estimators_], axis=0)
+    
+    lower, upper = TreeUncertainty(model, z=2.0).intervals(X, predictions)
+    np.testing.assert_allclose(lower, predictions - 2.0 * spread)
+    np.testing.assert_allclose(upper, predictions + 2.0 * spread)
+
+def test_quantile_intervals(data):
+    X, y = data
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+    per_tree = np.column_stack([tree.predict(X) for tree in model.estimators_])
+    
+    lower, upper = TreeUncertainty(model, method='quantile', quantiles=(0.1, 0.9)).intervals(X, model.predict(X))
+    np.testing.assert_allclose(lower, np.quantile(per_tree, 0.1, axis=1))
+    np.testing.assert_allclose(upper, np.quantile(per_tree, 0.9, axis=1))
+
+def test_boosted_ensembles_are_not_supported(data):
+    X, y = data
+    assert not TreeUncertainty.supports(GradientBoostingRegressor(n_estimators=5).fit(X, y))
+    assert TreeUncertainty.supports(RandomForestRegressor(n_estimators=5).fit(X, y))
@@ -0,0 +1,52 @@
+
+import numpy as np
+
+class TreeUncertainty:
+    """Vectorized per-tree spread for bagged tree ensembles.
+    
+    Leaf values of every tree are stacked into one flat array at construction,
+    so the per-tree outputs for a whole batch are a single gather over the
+    (n_samples, n_trees) leaf matrix of the ensemble's `apply`. Boosted ensembles are not
+    supported: their stages fit residuals, so the spread of stage outputs is
+    not a measure of predictive uncertainty.
+    """
+    
+    def __init__(self, model, method='normal', z=1.96, quantiles=(0.025, 0.975)):
+        if method not in ('normal', 'quantile'):
+            raise ValueError("Method must be 'normal' or 'quantile'")
+        
+        self.method = method
+        self.z = z
+        self.quantiles = quantiles
+        
+        # Flatten all leaf values and remember where each tree starts
+        self.model = model
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        node_counts = np.array([tree.node_count for tree in trees], dtype=np.intp)
+        self.offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]])
+        self.values = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+    
+    @staticmethod
+    def supports(model):
+        """Check whether a model is a bagged ensemble of single-output trees"""
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None or isinstance(estimators, np.ndarray):
+            # Gradient boosting stores a 2-D array of stages
+            return False
+        return len(estimators) > 0 and all(hasattr(e, 'tree_') for e in estimators)
+    
+    def per_tree_predictions(self, X):
+        """Return per-tree predictions with shape (n_samples, n_trees)"""
+        leaves = self.model.apply(X)
+        return self.values[leaves + self.offsets]
+    
+    def intervals(self, X, predictions):
+        """Return (lower, upper) interval arrays for each row of X"""
+        tree_predictions = self.per_tree_predictions(X)
+        
+        if self.method == 'quantile':
+            lower, upper = np.quantile(tree_predictions, self.quantiles, axis=1)
+            return lower, upper
+        
+        std_dev = np.std(tree_predictions, axis=1)
+        return predictions - self.z * std_dev, predictions + self.z * std_dev
@@ -1,8 +1,5 @@
 
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import os
 import json
@@ -22,6 +19,8 @@ def setup_logging(log_level='INFO', log_file='ml_pipeline.log'):
 
 def load_dataset(file_path, encoding='utf-8'):
     """Load dataset with error handling"""
+    import pandas as pd
+    
     try:
         df = pd.read_csv(file_path, encoding=encoding)
         logger = logging.getLogger(__name__)
@@ -79,6 +78,8 @@ def remove_outliers(df, column, method='iqr', threshold=1.5):
 
 def create_salary_bins(df, salary_column='salary', bins=5):
     """Create salary bins for analysis"""
+    import pandas as pd
+    
     df['salary_bin'] = pd.cut(df[salary_column], bins=bins, labels=[
         'Low', 'Medium-Low', 'Medium', 'Medium-High', 'High'
     ])
@@ -115,6 +116,8 @@ def calculate_statistics(df, column):
 
 def plot_distribution(df, column, title=None, figsize=(10, 6)):
     """Plot distribution of a numerical column"""
+    import matplotlib.pyplot as plt
+    
     plt.figure(figsize=figsize)
     
     # Create subplots
@@ -141,6 +144,9 @@ def plot_distribution(df, column, title=None, figsize=(10, 6)):
 
 def plot_correlation_matrix(df, figsize=(12, 8)):
     """Plot correlation matrix for numerical columns"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
     numerical_cols = df.select_dtypes(include=[np.number]).columns
     
     plt.figure(figsize=figsize)
@@ -234,7 +240,7 @@ def generate_prediction_report(y_true, y_pred, model_name):
     else:
         report += "- **Poor**: Model needs significant improvement\n"
     
-    report += f"\n## Report Generated
+    report += f"""\n## Report Generated
 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
     
@@ -243,6 +249,10 @@ def generate_prediction_report(y_true, y_pred, model_name):
 def create_feature_importance_plot(model, feature_names, model_name, top_n=10):
     """Create feature importance plot"""
     if hasattr(model, 'feature_importances_'):
+        import pandas as pd
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
         importance = model.feature_importances_
         
         # Create dataframe
@@ -300,5 +310,5 @@ def create_directory_structure():
     
     print("Directory structure created successfully")
 
-# Initialize logging
-logger = setup_logging()
+# Module logger; entry points call setup_logging() to attach handlers
+logger = logging.getLogger(__name__)